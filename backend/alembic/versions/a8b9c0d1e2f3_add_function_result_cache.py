@@ -0,0 +1,36 @@
+"""add function result cache settings
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-03-10 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a8b9c0d1e2f3"
+down_revision = "f7a8b9c0d1e2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("functions", sa.Column("cache_ttl", sa.Integer(), nullable=True))
+    op.add_column("functions", sa.Column("cache_key_fields", sa.JSON(), nullable=True))
+    op.add_column(
+        "functions",
+        sa.Column("cache_max_bytes", sa.Integer(), server_default="1000000", nullable=False),
+    )
+    op.add_column(
+        "executions",
+        sa.Column("cached", sa.Boolean(), server_default="false", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("executions", "cached")
+    op.drop_column("functions", "cache_max_bytes")
+    op.drop_column("functions", "cache_key_fields")
+    op.drop_column("functions", "cache_ttl")
@@ -0,0 +1,74 @@
+"""add denormalized chat activity columns
+
+Revision ID: b3c4d5e6f7a8
+Revises: a2b3c4d5e6f7
+Create Date: 2026-03-02 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3c4d5e6f7a8"
+down_revision = "a2b3c4d5e6f7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "chats",
+        sa.Column("last_message_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.add_column(
+        "chats",
+        sa.Column("message_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "chats",
+        sa.Column("last_message_preview", sa.String(200), nullable=True),
+    )
+
+    # Backfill counters from existing messages
+    op.execute(
+        """
+        UPDATE chats
+        SET message_count = stats.message_count,
+            last_message_at = stats.last_message_at
+        FROM (
+            SELECT chat_id, COUNT(*) AS message_count, MAX(created_at) AS last_message_at
+            FROM messages
+            GROUP BY chat_id
+        ) AS stats
+        WHERE chats.id = stats.chat_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE chats
+        SET last_message_preview = latest.preview
+        FROM (
+            SELECT DISTINCT ON (chat_id)
+                chat_id, LEFT(REGEXP_REPLACE(content, '\\s+', ' ', 'g'), 200) AS preview
+            FROM messages
+            WHERE role IN ('user', 'assistant') AND content IS NOT NULL AND content <> ''
+            ORDER BY chat_id, created_at DESC
+        ) AS latest
+        WHERE chats.id = latest.chat_id
+        """
+    )
+
+    # Matches the chat list order (last_message_at DESC NULLS LAST, id DESC)
+    op.create_index(
+        "ix_chats_user_archived_last_message",
+        "chats",
+        ["user_id", "archived", sa.text("last_message_at DESC NULLS LAST"), sa.text("id DESC")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_chats_user_archived_last_message", table_name="chats")
+    op.drop_column("chats", "last_message_preview")
+    op.drop_column("chats", "message_count")
+    op.drop_column("chats", "last_message_at")
@@ -0,0 +1,24 @@
+"""add webhook idempotency key expression
+
+Revision ID: b9c0d1e2f3a4
+Revises: a8b9c0d1e2f3
+Create Date: 2026-03-12 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b9c0d1e2f3a4"
+down_revision = "a8b9c0d1e2f3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("webhooks", sa.Column("idempotency_key", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("webhooks", "idempotency_key")
@@ -0,0 +1,24 @@
+"""add function queue lane
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-03-14 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c0d1e2f3a4b5"
+down_revision = "b9c0d1e2f3a4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("functions", sa.Column("queue_lane", sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("functions", "queue_lane")
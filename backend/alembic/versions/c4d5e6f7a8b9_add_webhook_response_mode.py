@@ -0,0 +1,29 @@
+"""add webhook response mode and callback url
+
+Revision ID: c4d5e6f7a8b9
+Revises: b3c4d5e6f7a8
+Create Date: 2026-03-03 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c4d5e6f7a8b9"
+down_revision = "b3c4d5e6f7a8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "webhooks",
+        sa.Column("response_mode", sa.String(20), server_default="sync", nullable=False),
+    )
+    op.add_column("webhooks", sa.Column("callback_url", sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("webhooks", "callback_url")
+    op.drop_column("webhooks", "response_mode")
@@ -0,0 +1,53 @@
+"""add message insertion sequence
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-03-16 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d1e2f3a4b5c6"
+down_revision = "c0d1e2f3a4b5"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("messages", sa.Column("seq", sa.BigInteger(), nullable=True))
+
+    # Number existing messages in their current (created_at, id) order
+    op.execute(
+        """
+        UPDATE messages
+        SET seq = numbered.seq
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (ORDER BY created_at, id) AS seq
+            FROM messages
+        ) AS numbered
+        WHERE messages.id = numbered.id
+        """
+    )
+    op.alter_column("messages", "seq", nullable=False)
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            EXECUTE format(
+                'ALTER TABLE messages ALTER COLUMN seq ADD GENERATED BY DEFAULT AS IDENTITY '
+                '(START WITH %s)',
+                (SELECT COALESCE(MAX(seq), 0) + 1 FROM messages)
+            );
+        END $$
+        """
+    )
+
+    op.create_index("ix_messages_chat_seq", "messages", ["chat_id", "seq"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_messages_chat_seq", table_name="messages")
+    op.drop_column("messages", "seq")
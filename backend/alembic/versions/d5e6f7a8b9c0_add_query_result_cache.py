@@ -0,0 +1,34 @@
+"""add query result cache settings
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-03-04 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d5e6f7a8b9c0"
+down_revision = "c4d5e6f7a8b9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("queries", sa.Column("cache_ttl", sa.Integer(), nullable=True))
+    op.add_column(
+        "queries",
+        sa.Column("cache_max_bytes", sa.Integer(), server_default="1000000", nullable=False),
+    )
+    op.add_column(
+        "queries",
+        sa.Column("cache_tags", sa.JSON(), server_default="[]", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("queries", "cache_tags")
+    op.drop_column("queries", "cache_max_bytes")
+    op.drop_column("queries", "cache_ttl")
@@ -0,0 +1,69 @@
+"""convert filterable JSON columns to JSONB with GIN indexes
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-03-05 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e6f7a8b9c0d1"
+down_revision = "d5e6f7a8b9c0"
+branch_labels = None
+depends_on = None
+
+# (table, column, nullable)
+JSONB_COLUMNS = [
+    ("states", "value", False),
+    ("states", "tags", False),
+    ("files", "file_metadata", False),
+    ("chats", "chat_metadata", True),
+    ("messages", "tool_calls", True),
+]
+
+# (index name, table, column) - jsonb_path_ops supports the @> containment operator
+GIN_INDEXES = [
+    ("ix_states_value_gin", "states", "value"),
+    ("ix_states_tags_gin", "states", "tags"),
+    ("ix_files_file_metadata_gin", "files", "file_metadata"),
+]
+
+
+def upgrade() -> None:
+    for table, column, nullable in JSONB_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=postgresql.JSONB(),
+            existing_type=sa.JSON(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column}::jsonb",
+        )
+
+    for name, table, column in GIN_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "jsonb_path_ops"},
+        )
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(GIN_INDEXES):
+        op.drop_index(name, table_name=table)
+
+    for table, column, nullable in reversed(JSONB_COLUMNS):
+        op.alter_column(
+            table,
+            column,
+            type_=sa.JSON(),
+            existing_type=postgresql.JSONB(),
+            existing_nullable=nullable,
+            postgresql_using=f"{column}::json",
+        )
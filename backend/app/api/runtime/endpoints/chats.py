@@ -1,15 +1,17 @@
 """Runtime chat endpoints - agent chat creation, message execution, and chat management."""
 import asyncio
+import base64
 import json
 import logging
 import traceback
 import uuid
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import jsonschema
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.responses import JSONResponse
-from sqlalchemy import func, select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sse_starlette.sse import EventSourceResponse
 
@@ -42,6 +44,57 @@ from app.utils.schema import validate_with_coercion
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+CHAT_PAGE_SIZE = 50  # default page size once a chat list is paginated
+MESSAGE_PAGE_SIZE = 100  # default page size once chat messages are paginated
+
+
+def _encode_cursor(ts: Optional[datetime], row_id: uuid.UUID) -> str:
+    """Encode a (timestamp, id) keyset position as an opaque cursor."""
+    raw = f"{ts.isoformat() if ts else ''}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[Optional[datetime], uuid.UUID]:
+    try:
+        ts_str, id_str = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return (datetime.fromisoformat(ts_str) if ts_str else None), uuid.UUID(id_str)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _encode_seq_cursor(seq: int) -> str:
+    """Encode a message sequence position as an opaque cursor."""
+    return base64.urlsafe_b64encode(f"m{seq}".encode()).decode()
+
+
+def _decode_seq_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        if not raw.startswith("m"):
+            raise ValueError(raw)
+        return int(raw[1:])
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def _chat_response(chat: Chat, user_email: str) -> ChatResponse:
+    return ChatResponse(
+        id=chat.id,
+        user_id=chat.user_id,
+        user_email=user_email,
+        agent_id=chat.agent_id,
+        agent_namespace=chat.agent_namespace,
+        agent_name=chat.agent_name,
+        title=chat.title,
+        archived=chat.archived,
+        expires_at=chat.expires_at,
+        created_at=chat.created_at,
+        updated_at=chat.updated_at,
+        last_message_at=chat.last_message_at,
+        message_count=chat.message_count,
+        last_message_preview=chat.last_message_preview,
+    )
+
 
 @router.get("/agents/default", response_model=AgentResponse)
 async def get_default_agent(
@@ -145,25 +198,14 @@ async def create_chat_with_agent(
             message = Message(chat_id=chat.id, role=msg_data["role"], content=content)
             db.add(message)
         await db.commit()
+        # Pick up activity counters maintained by the message insert hook
+        await db.refresh(chat)
 
     # Get user email
     user_result = await db.execute(select(User).where(User.id == user_id))
     user = user_result.scalar_one()
 
-    return ChatResponse(
-        id=chat.id,
-        user_id=chat.user_id,
-        user_email=user.email,
-        agent_id=chat.agent_id,
-        agent_namespace=chat.agent_namespace,
-        agent_name=chat.agent_name,
-        title=chat.title,
-        archived=chat.archived,
-        expires_at=chat.expires_at,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        last_message_at=None,  # New chat has no messages yet
-    )
+    return _chat_response(chat, user.email)
 
 
 @router.post("/chats/{chat_id}/messages", response_model=MessageResponse)
@@ -503,66 +545,92 @@ async def approve_tool_call(
 @router.get("/chats", response_model=list[ChatResponse])
 async def list_chats(
     request: Request,
+    response: Response,
     include_archived: bool = Query(False, description="Include archived chats"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=200, description="Max chats to return (all when neither limit nor cursor is set)"
+    ),
+    cursor: Optional[str] = Query(
+        None, description="Keyset cursor from the X-Next-Cursor header of the previous page"
+    ),
     current_user_data: tuple = Depends(get_current_user_with_permissions),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all chats for the current user. Always filtered by user ownership."""
+    """
+    List chats for the current user, most recently active first. Always filtered by user ownership.
+
+    Paginated by keyset on (last_message_at, id) when limit or cursor is given
+    (limit defaults to 50 then). When more chats are available, the
+    X-Next-Cursor response header carries the cursor for the next page.
+    Without either, all chats are returned.
+    """
     user_id, permissions = current_user_data
     # No permission check needed - always filtered by user_id below
 
-    # Subquery for last message timestamp
-    last_message_subq = (
-        select(Message.chat_id, func.max(Message.created_at).label("last_message_at"))
-        .group_by(Message.chat_id)
-        .subquery()
-    )
-
-    # Join with User and last message subquery
     query = (
-        select(Chat, User.email, last_message_subq.c.last_message_at)
+        select(Chat, User.email)
         .join(User, Chat.user_id == User.id)
-        .outerjoin(last_message_subq, Chat.id == last_message_subq.c.chat_id)
         .where(Chat.user_id == user_id)
     )
 
     if not include_archived:
         query = query.where(Chat.archived == False)
 
-    result = await db.execute(query.order_by(Chat.updated_at.desc()))
+    if cursor:
+        cursor_ts, cursor_id = _decode_cursor(cursor)
+        if cursor_ts is not None:
+            # Chats without messages sort last (NULLS LAST)
+            query = query.where(
+                or_(
+                    Chat.last_message_at < cursor_ts,
+                    and_(Chat.last_message_at == cursor_ts, Chat.id < cursor_id),
+                    Chat.last_message_at.is_(None),
+                )
+            )
+        else:
+            query = query.where(Chat.last_message_at.is_(None), Chat.id < cursor_id)
+
+    query = query.order_by(Chat.last_message_at.desc().nulls_last(), Chat.id.desc())
+    if limit is None and cursor is None:
+        result = await db.execute(query)
+        return [_chat_response(chat, email) for chat, email in result.all()]
+
+    limit = limit or CHAT_PAGE_SIZE
+    result = await db.execute(query.limit(limit + 1))
     rows = result.all()
 
-    # Build response with user_email and last_message_at
-    chats_response = []
-    for chat, email, last_message_at in rows:
-        chats_response.append(
-            ChatResponse(
-                id=chat.id,
-                user_id=chat.user_id,
-                user_email=email,
-                agent_id=chat.agent_id,
-                agent_namespace=chat.agent_namespace,
-                agent_name=chat.agent_name,
-                title=chat.title,
-                archived=chat.archived,
-                expires_at=chat.expires_at,
-                created_at=chat.created_at,
-                updated_at=chat.updated_at,
-                last_message_at=last_message_at,
-            )
-        )
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_chat = rows[-1][0]
+        response.headers["X-Next-Cursor"] = _encode_cursor(last_chat.last_message_at, last_chat.id)
 
-    return chats_response
+    return [_chat_response(chat, email) for chat, email in rows]
 
 
 @router.get("/chats/{chat_id}", response_model=ChatWithMessages)
 async def get_chat(
     request: Request,
     chat_id: str,
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=1000,
+        description="Max messages to return, most recent first (all when neither limit nor before is set)",
+    ),
+    before: Optional[str] = Query(
+        None, description="Message cursor (messages_cursor) to load older messages"
+    ),
     current_user_data: tuple = Depends(get_current_user_with_permissions),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a chat with all messages."""
+    """
+    Get a chat with its messages.
+
+    Returns the most recent `limit` messages in chronological order (limit
+    defaults to 100 when only `before` is given; without either, all messages).
+    If older messages exist, `messages_cursor` can be passed as `before` to
+    fetch the previous page.
+    """
     user_id, permissions = current_user_data
 
     # Get chat with user email (filtered by user_id for data privacy)
@@ -590,29 +658,27 @@ async def get_chat(
 
     set_permission_used(request, agent_chat_perm)
 
-    # Get messages
-    result = await db.execute(
-        select(Message).where(Message.chat_id == chat_id).order_by(Message.created_at)
-    )
-    messages = result.scalars().all()
-
-    # Calculate last message timestamp
-    last_message_at = messages[-1].created_at if messages else None
+    # Get a page of messages, newest first, using (chat_id, seq) index
+    query = select(Message).where(Message.chat_id == chat_id)
+    if before:
+        query = query.where(Message.seq < _decode_seq_cursor(before))
+    query = query.order_by(Message.seq.desc())
+    if limit is None and before is None:
+        messages = list((await db.execute(query)).scalars().all())
+    else:
+        limit = limit or MESSAGE_PAGE_SIZE
+        messages = list((await db.execute(query.limit(limit + 1))).scalars().all())
+
+    messages_cursor = None
+    if limit is not None and len(messages) > limit:
+        messages = messages[:limit]
+        messages_cursor = _encode_seq_cursor(messages[-1].seq)
+    messages.reverse()
 
     return ChatWithMessages(
-        id=chat.id,
-        user_id=chat.user_id,
-        user_email=user_email,
-        agent_id=chat.agent_id,
-        agent_namespace=chat.agent_namespace,
-        agent_name=chat.agent_name,
-        title=chat.title,
-        archived=chat.archived,
-        expires_at=chat.expires_at,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        last_message_at=last_message_at,
+        **_chat_response(chat, user_email).model_dump(),
         messages=[MessageResponse.model_validate(msg) for msg in messages],
+        messages_cursor=messages_cursor,
     )
 
 
@@ -654,30 +720,11 @@ async def update_chat(
     await db.commit()
     await db.refresh(chat)
 
-    # Get user email and last message timestamp
+    # Get user email
     user_result = await db.execute(select(User).where(User.id == chat.user_id))
     user = user_result.scalar_one()
 
-    # Get last message timestamp
-    last_msg_result = await db.execute(
-        select(func.max(Message.created_at)).where(Message.chat_id == chat_id)
-    )
-    last_message_at = last_msg_result.scalar()
-
-    return ChatResponse(
-        id=chat.id,
-        user_id=chat.user_id,
-        user_email=user.email,
-        agent_id=chat.agent_id,
-        agent_namespace=chat.agent_namespace,
-        agent_name=chat.agent_name,
-        title=chat.title,
-        archived=chat.archived,
-        expires_at=chat.expires_at,
-        created_at=chat.created_at,
-        updated_at=chat.updated_at,
-        last_message_at=last_message_at,
-    )
+    return _chat_response(chat, user.email)
 
 
 @router.delete("/chats/{chat_id}", status_code=status.HTTP_204_NO_CONTENT)
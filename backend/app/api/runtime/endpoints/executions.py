@@ -1,9 +1,12 @@
 """Executions API endpoints."""
+import asyncio
+import json
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sse_starlette.sse import EventSourceResponse
 
 from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
@@ -17,6 +20,7 @@ from app.schemas import (
 )
 
 from app.services.queue_service import queue_service
+from app.services.stream_relay import execution_channel, stream_relay
 
 router = APIRouter(prefix="/executions")
 
@@ -131,6 +135,80 @@ async def get_execution_steps(
     return steps
 
 
+@router.get("/{execution_id}/stream")
+async def stream_execution_progress(
+    request: Request,
+    execution_id: str,
+    last_id: str = Query(default="0", description="Last received Redis stream entry ID"),
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """
+    Stream the progress events of an execution via SSE.
+
+    Functions written as generators publish each yielded value as a progress
+    event. Reading starts at last_id ("0" replays everything published so
+    far), so callers can reconnect without losing events.
+    """
+    user_id, permissions = current_user_data
+
+    result = await db.execute(select(Execution).where(Execution.execution_id == execution_id))
+    execution = result.scalar_one_or_none()
+
+    if execution:
+        if check_permission(permissions, "sinas.executions.read:all"):
+            set_permission_used(request, "sinas.executions.read:all")
+        else:
+            if execution.user_id != user_id:
+                set_permission_used(request, "sinas.executions.read:own", has_perm=False)
+                raise HTTPException(status_code=403, detail="Not authorized to view this execution")
+            set_permission_used(request, "sinas.executions.read:own")
+    elif await queue_service.get_job_status(execution_id):
+        set_permission_used(request, "sinas.executions.read:own")
+    else:
+        raise HTTPException(status_code=404, detail="Execution not found")
+
+    channel = execution_channel(execution_id)
+
+    # Finished without publishing progress: nothing will ever arrive
+    finished = execution is not None and execution.status in (
+        ExecutionStatus.COMPLETED,
+        ExecutionStatus.FAILED,
+    )
+    if finished and not await stream_relay.exists(channel):
+        terminal = (
+            {"event": "done", "data": json.dumps({"status": "completed"})}
+            if execution.status == ExecutionStatus.COMPLETED
+            else {"event": "error", "data": json.dumps({"error": execution.error})}
+        )
+
+        async def finished_generator():
+            yield terminal
+
+        return EventSourceResponse(finished_generator())
+
+    async def event_generator():
+        try:
+            async for event in stream_relay.subscribe(channel, last_id=last_id):
+                event_type = event.get("type", "progress")
+
+                if event_type == "done":
+                    yield {"event": "done", "data": json.dumps({"status": "completed"})}
+                    return
+                elif event_type == "error":
+                    yield {
+                        "event": "error",
+                        "data": json.dumps({"error": event.get("error", "An error occurred")}),
+                    }
+                    return
+                else:
+                    yield {"event": "progress", "data": json.dumps(event.get("data"))}
+        except asyncio.CancelledError:
+            return
+
+    return EventSourceResponse(event_generator())
+
+
 @router.post("/{execution_id}/continue", response_model=ContinueExecutionResponse)
 async def continue_execution(
     http_request: Request,
@@ -36,6 +36,7 @@ from app.schemas.file import (
 
 from app.services.file_storage import FileStorage, get_storage, generate_file_data_url, generate_file_url
 from app.services.queue_service import queue_service
+from app.utils.schema import coerce_types
 
 
 logger = logging.getLogger(__name__)
@@ -403,6 +404,7 @@ async def upload_file(
                     trigger_type=TriggerType.MANUAL.value,
                     trigger_id=f"post_upload:{namespace}/{collection}",
                     user_id=user_id,
+                    lane="batch",
                 )
             except Exception:
                 # Don't fail upload if post-upload trigger fails
@@ -687,10 +689,11 @@ async def search_files(
             )
         )
 
-    # Apply metadata filters using PostgreSQL JSON containment
+    # Apply metadata filters as one JSONB containment (@>), served by the GIN index.
+    # Containment is type-strict, so coerce values to the collection's schema types first.
     if search_request.metadata_filter:
-        for key, value in search_request.metadata_filter.items():
-            query = query.where(File.file_metadata[key].as_string() == str(value))
+        metadata_filter = coerce_types(search_request.metadata_filter, coll.metadata_schema)
+        query = query.where(File.file_metadata.contains(metadata_filter))
 
     query = query.order_by(File.name).limit(search_request.limit)
 
@@ -1,7 +1,7 @@
 """Runtime function execution endpoints."""
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Any, Optional
@@ -11,6 +11,7 @@ from app.core.database import get_db
 from app.core.permissions import check_permission
 from app.models.execution import TriggerType
 from app.models.function import Function
+from app.services.idempotency import IdempotencyConflictError, idempotency_store
 from app.services.queue_service import queue_service
 
 router = APIRouter()
@@ -42,6 +43,7 @@ async def execute_function(
     namespace: str,
     name: str,
     body: FunctionExecuteRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user_data: tuple = Depends(get_current_user_with_permissions),
     db: AsyncSession = Depends(get_db),
 ):
@@ -49,7 +51,10 @@ async def execute_function(
     Execute a function and wait for the result.
 
     Enqueues the function on the worker queue and blocks until the result
-    is available or the timeout is reached.
+    is available or the timeout is reached. With an Idempotency-Key header,
+    repeated requests return the first request's execution_id and result,
+    and duplicates that arrive while it runs wait for it instead of
+    running the function again.
     """
     user_id, permissions = current_user_data
 
@@ -66,23 +71,39 @@ async def execute_function(
 
     execution_id = str(uuid.uuid4())
 
-    try:
-        result = await queue_service.enqueue_and_wait(
+    async def run(run_execution_id: str, idempotency_redis_key: Optional[str] = None) -> Any:
+        return await queue_service.enqueue_and_wait(
             function_namespace=namespace,
             function_name=name,
             input_data=body.input,
-            execution_id=execution_id,
+            execution_id=run_execution_id,
             trigger_type=TriggerType.API.value,
             trigger_id="runtime-api",
             user_id=user_id,
             timeout=body.timeout,
+            idempotency_redis_key=idempotency_redis_key,
         )
 
+    try:
+        if idempotency_key:
+            execution_id, result = await idempotency_store.run(
+                scope=f"function:{namespace}/{name}:{user_id}",
+                key=idempotency_key,
+                execution_id=execution_id,
+                input_data=body.input,
+                execute=run,
+                timeout=body.timeout,
+            )
+        else:
+            result = await run(execution_id)
+
         return FunctionExecuteResponse(
             status="success",
             execution_id=execution_id,
             result=result,
         )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except TimeoutError:
         return FunctionExecuteResponse(
             status="timeout",
@@ -107,6 +128,7 @@ async def execute_function_async(
     namespace: str,
     name: str,
     body: FunctionExecuteRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
     current_user_data: tuple = Depends(get_current_user_with_permissions),
     db: AsyncSession = Depends(get_db),
 ):
@@ -114,7 +136,9 @@ async def execute_function_async(
     Execute a function asynchronously (fire-and-forget).
 
     Enqueues the function and returns immediately with an execution_id.
-    Poll GET /executions/{execution_id} for status and result.
+    Poll GET /executions/{execution_id} for status and result. With an
+    Idempotency-Key header, repeated requests return the first request's
+    execution_id without enqueueing again.
     """
     user_id, permissions = current_user_data
 
@@ -131,15 +155,39 @@ async def execute_function_async(
 
     execution_id = str(uuid.uuid4())
 
-    await queue_service.enqueue_function(
-        function_namespace=namespace,
-        function_name=name,
-        input_data=body.input,
-        execution_id=execution_id,
-        trigger_type=TriggerType.API.value,
-        trigger_id="runtime-api",
-        user_id=user_id,
-    )
+    # The worker completes the claimed key when the job finishes
+    idempotency_redis_key = None
+    if idempotency_key:
+        scope = f"function-async:{namespace}/{name}:{user_id}"
+        try:
+            existing = await idempotency_store.claim(
+                scope=scope,
+                key=idempotency_key,
+                execution_id=execution_id,
+                input_data=body.input,
+            )
+        except IdempotencyConflictError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if existing is not None:
+            return FunctionExecuteAsyncResponse(execution_id=existing["execution_id"])
+        idempotency_redis_key = idempotency_store.redis_key(scope, idempotency_key)
+
+    try:
+        await queue_service.enqueue_function(
+            function_namespace=namespace,
+            function_name=name,
+            input_data=body.input,
+            execution_id=execution_id,
+            trigger_type=TriggerType.API.value,
+            trigger_id="runtime-api",
+            user_id=user_id,
+            idempotency_redis_key=idempotency_redis_key,
+        )
+    except Exception:
+        # Nothing was queued: free the key so a retry can run
+        if idempotency_redis_key:
+            await idempotency_store.release(idempotency_redis_key, execution_id)
+        raise
 
     return FunctionExecuteAsyncResponse(
         execution_id=execution_id,
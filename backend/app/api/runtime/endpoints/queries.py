@@ -1,8 +1,10 @@
 """Runtime query execution endpoint."""
 import time
+from typing import Optional
 
 import jsonschema
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,8 +13,14 @@ from app.core.database import get_db
 from app.core.permissions import check_permission
 from app.models.query import Query
 from app.models.user import User
-from app.schemas.query import QueryExecuteRequest, QueryExecuteResponse
-from app.services.database_pool import DatabasePoolManager
+from app.schemas.query import (
+    QueryBatchExecuteRequest,
+    QueryBatchExecuteResponse,
+    QueryBatchItemResult,
+    QueryExecuteRequest,
+    QueryExecuteResponse,
+)
+from app.services.query_cache import query_result_cache
 
 router = APIRouter()
 
@@ -29,7 +37,12 @@ async def execute_query(
     db: AsyncSession = Depends(get_db),
     current_user_data=Depends(get_current_user_with_permissions),
 ):
-    """Execute a query with the given input parameters."""
+    """
+    Execute a query with the given input parameters.
+
+    With format "ndjson" or "columnar", read results are streamed in chunks
+    of chunk_size rows (application/x-ndjson).
+    """
     user_id, permissions = current_user_data
 
     query = await Query.get_with_permissions(
@@ -59,18 +72,20 @@ async def execute_query(
     if user:
         params["user_email"] = user.email
 
+    if execute_request.format != "json":
+        if query.operation != "read":
+            raise HTTPException(status_code=400, detail="Only read queries can be streamed")
+        try:
+            chunks = await query_result_cache.stream(
+                db, query, params, execute_request.format, execute_request.chunk_size
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Query execution failed: {str(e)}")
+        return StreamingResponse(chunks, media_type="application/x-ndjson")
+
     start_time = time.time()
     try:
-        pool_manager = DatabasePoolManager.get_instance()
-        result = await pool_manager.execute_query(
-            db=db,
-            connection_id=str(query.database_connection_id),
-            sql=query.sql,
-            params=params,
-            operation=query.operation,
-            timeout_ms=query.timeout_ms,
-            max_rows=query.max_rows,
-        )
+        result = await query_result_cache.execute(db, query, params)
         duration_ms = int((time.time() - start_time) * 1000)
 
         if query.operation == "read":
@@ -79,7 +94,9 @@ async def execute_query(
                 operation=query.operation,
                 data=result.get("rows", []),
                 row_count=result.get("row_count", 0),
+                truncated=result.get("truncated"),
                 duration_ms=duration_ms,
+                cached=result.get("cached", False),
             )
         else:
             return QueryExecuteResponse(
@@ -94,3 +111,107 @@ async def execute_query(
             status_code=500,
             detail=f"Query execution failed: {str(e)}",
         )
+
+
+@router.post("/queries/execute-batch", response_model=QueryBatchExecuteResponse)
+async def execute_query_batch(
+    batch_request: QueryBatchExecuteRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """
+    Execute several queries in one request.
+
+    Queries against the same database connection run on one pooled
+    connection, in order. With snapshot=true, each connection's reads run in
+    one read-only REPEATABLE READ transaction (batches containing a write run
+    without a snapshot). Results are returned per query; one failing query
+    does not fail the others.
+    """
+    user_id, permissions = current_user_data
+
+    user_result = await db.execute(select(User).where(User.id == user_id))
+    user = user_result.scalar_one_or_none()
+
+    results: list[Optional[QueryBatchItemResult]] = [None] * len(batch_request.queries)
+    batch: list[tuple[Query, dict]] = []
+    batch_indexes: list[int] = []
+
+    for i, item in enumerate(batch_request.queries):
+        try:
+            query = await Query.get_with_permissions(
+                db=db,
+                user_id=user_id,
+                permissions=permissions,
+                action="execute",
+                namespace=item.namespace,
+                name=item.name,
+            )
+        except HTTPException as e:
+            results[i] = QueryBatchItemResult(
+                namespace=item.namespace, name=item.name, success=False, error=str(e.detail)
+            )
+            continue
+
+        set_permission_used(request, f"sinas.queries/{item.namespace}/{item.name}.execute")
+
+        if query.input_schema and query.input_schema.get("properties"):
+            try:
+                jsonschema.validate(instance=item.input, schema=query.input_schema)
+            except jsonschema.ValidationError as e:
+                results[i] = QueryBatchItemResult(
+                    namespace=item.namespace,
+                    name=item.name,
+                    success=False,
+                    operation=query.operation,
+                    error=f"Input validation error: {e.message}",
+                )
+                continue
+
+        params = {**item.input, "user_id": str(user_id)}
+        if user:
+            params["user_email"] = user.email
+
+        batch.append((query, params))
+        batch_indexes.append(i)
+
+    start_time = time.time()
+    batch_results = (
+        await query_result_cache.execute_batch(db, batch, snapshot=batch_request.snapshot)
+        if batch
+        else []
+    )
+
+    for i, (query, _), result in zip(batch_indexes, batch, batch_results):
+        if "error" in result:
+            results[i] = QueryBatchItemResult(
+                namespace=query.namespace,
+                name=query.name,
+                success=False,
+                operation=query.operation,
+                error=f"Query execution failed: {result['error']}",
+            )
+        elif query.operation == "read":
+            results[i] = QueryBatchItemResult(
+                namespace=query.namespace,
+                name=query.name,
+                success=True,
+                operation=query.operation,
+                data=result.get("rows", []),
+                row_count=result.get("row_count", 0),
+                truncated=result.get("truncated"),
+                cached=result.get("cached", False),
+            )
+        else:
+            results[i] = QueryBatchItemResult(
+                namespace=query.namespace,
+                name=query.name,
+                success=True,
+                operation=query.operation,
+                affected_rows=result.get("affected_rows", 0),
+            )
+
+    return QueryBatchExecuteResponse(
+        results=results, duration_ms=int((time.time() - start_time) * 1000)
+    )
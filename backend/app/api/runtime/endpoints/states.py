@@ -1,4 +1,5 @@
 """State Store API endpoints."""
+import json
 import uuid
 from datetime import datetime
 from typing import Optional
@@ -11,7 +12,18 @@ from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
 from app.core.permissions import check_permission
 from app.models.state import State
-from app.schemas import StateCreate, StateResponse, StateUpdate
+from app.schemas import (
+    StateBulkDeleteRequest,
+    StateBulkDeleteResponse,
+    StateBulkGetRequest,
+    StateBulkGetResponse,
+    StateBulkSetRequest,
+    StateCreate,
+    StateResponse,
+    StateUpdate,
+)
+from app.services.state_cache import state_cache
+from app.services.state_tools import StateTools
 
 router = APIRouter(prefix="/states")
 
@@ -78,6 +90,9 @@ async def create_state(
     db.add(state)
     await db.commit()
     await db.refresh(state)
+    await state_cache.invalidate(
+        str(state.user_id), [state.namespace], shared=state.visibility == "shared"
+    )
 
     return state
 
@@ -88,6 +103,9 @@ async def list_states(
     namespace: Optional[str] = None,
     visibility: Optional[str] = Query(None, pattern=r"^(private|shared)$"),
     tags: Optional[str] = Query(None, description="Comma-separated list of tags"),
+    value: Optional[str] = Query(
+        None, description='JSON object the value must contain, e.g. {"status": "active"}'
+    ),
     search: Optional[str] = Query(None, description="Search in keys and descriptions"),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
@@ -100,10 +118,22 @@ async def list_states(
     Returns:
     - Own states (always)
     - Shared states in namespaces where user has read:all permission
+
+    tags (all must be present) and value (JSON containment) are evaluated in
+    Postgres using the GIN indexes on states.tags and states.value.
     """
     user_id, permissions = current_user_data
     user_uuid = uuid.UUID(user_id)
 
+    value_filter = None
+    if value:
+        try:
+            value_filter = json.loads(value)
+        except json.JSONDecodeError:
+            raise HTTPException(status_code=400, detail="value must be a JSON object")
+        if not isinstance(value_filter, dict):
+            raise HTTPException(status_code=400, detail="value must be a JSON object")
+
     # Build base query: own states OR (shared + has namespace permission)
     # We'll filter by namespace permission in Python since we can't do dynamic permission checks in SQL
     query = select(State).where(
@@ -118,6 +148,8 @@ async def list_states(
     if tags:
         tag_list = [t.strip() for t in tags.split(",")]
         query = query.where(State.tags.contains(tag_list))
+    if value_filter:
+        query = query.where(State.value.contains(value_filter))
     if search:
         query = query.where(
             or_(State.key.ilike(f"%{search}%"), State.description.ilike(f"%{search}%"))
@@ -151,6 +183,98 @@ async def list_states(
     return accessible_states
 
 
+def _require_namespace_permission(
+    request: Request, permissions: dict[str, bool], namespace: str, actions: list[str]
+) -> None:
+    """Require action:own (or :all) on a state namespace for every action."""
+    for action in actions:
+        namespace_perm = f"sinas.states/{namespace}.{action}:own"
+        namespace_perm_all = f"sinas.states/{namespace}.{action}:all"
+
+        if check_permission(permissions, namespace_perm_all):
+            set_permission_used(request, namespace_perm_all)
+        elif check_permission(permissions, namespace_perm):
+            set_permission_used(request, namespace_perm)
+        else:
+            set_permission_used(request, namespace_perm, has_perm=False)
+            raise HTTPException(
+                status_code=403,
+                detail=f"Not authorized to {action} states in namespace '{namespace}'",
+            )
+
+
+@router.post("/bulk-get", response_model=StateBulkGetResponse)
+async def bulk_get_states(
+    request: Request,
+    bulk_request: StateBulkGetRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """
+    Get several of your own states in one namespace by key.
+
+    Served from the state cache; keys that do not exist (or have expired)
+    are listed in "missing".
+    """
+    user_id, permissions = current_user_data
+    _require_namespace_permission(request, permissions, bulk_request.namespace, ["read"])
+
+    found = await StateTools.get_states(db, user_id, bulk_request.namespace, bulk_request.keys)
+    keys = list(dict.fromkeys(bulk_request.keys))
+    return StateBulkGetResponse(
+        states=[StateResponse.model_validate(found[key]) for key in keys if key in found],
+        missing=[key for key in keys if key not in found],
+    )
+
+
+@router.put("/bulk", response_model=list[StateResponse])
+async def bulk_set_states(
+    request: Request,
+    bulk_request: StateBulkSetRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """
+    Create or update several of your own states in one namespace.
+
+    Existing keys are updated (omitted optional fields keep their value),
+    new keys are created. All items are saved in one transaction.
+    Requires create and update permission on the namespace.
+    """
+    user_id, permissions = current_user_data
+    _require_namespace_permission(
+        request, permissions, bulk_request.namespace, ["create", "update"]
+    )
+
+    return await StateTools.set_states(
+        db,
+        user_id,
+        bulk_request.namespace,
+        [item.model_dump() for item in bulk_request.items],
+    )
+
+
+@router.post("/bulk-delete", response_model=StateBulkDeleteResponse)
+async def bulk_delete_states(
+    request: Request,
+    bulk_request: StateBulkDeleteRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """Delete several of your own states in one namespace by key."""
+    user_id, permissions = current_user_data
+    _require_namespace_permission(request, permissions, bulk_request.namespace, ["delete"])
+
+    deleted = await StateTools.delete_states(
+        db, user_id, bulk_request.namespace, bulk_request.keys
+    )
+    keys = list(dict.fromkeys(bulk_request.keys))
+    return StateBulkDeleteResponse(
+        deleted=[key for key in keys if key in deleted],
+        missing=[key for key in keys if key not in deleted],
+    )
+
+
 @router.get("/{state_id}", response_model=StateResponse)
 async def get_state(
     request: Request,
@@ -224,6 +348,8 @@ async def update_state(
     else:
         set_permission_used(request, namespace_perm)
 
+    was_shared = state.visibility == "shared"
+
     # Update fields
     if state_data.value is not None:
         state.value = state_data.value
@@ -240,6 +366,11 @@ async def update_state(
 
     await db.commit()
     await db.refresh(state)
+    await state_cache.invalidate(
+        str(state.user_id),
+        [state.namespace],
+        shared=was_shared or state.visibility == "shared",
+    )
 
     return state
 
@@ -277,5 +408,8 @@ async def delete_state(
 
     await db.delete(state)
     await db.commit()
+    await state_cache.invalidate(
+        str(state.user_id), [state.namespace], shared=state.visibility == "shared"
+    )
 
     return {"message": f"State '{state.namespace}/{state.key}' deleted successfully"}
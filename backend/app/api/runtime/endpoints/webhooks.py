@@ -1,21 +1,50 @@
 """Runtime webhook endpoints - execute functions via HTTP."""
+import logging
 import uuid
-from typing import Optional
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request
-from sqlalchemy import and_, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 
 from app.core.auth import set_permission_used, verify_jwt_or_api_key
-from app.core.database import get_db
+from app.core.database import AsyncSessionLocal
 from app.core.permissions import check_permission
 from app.models.execution import TriggerType
-from app.models.webhook import Webhook
+from app.services.idempotency import IdempotencyConflictError, idempotency_store
+from app.services.webhook_router import WebhookRoute, webhook_router
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _idempotency_key(
+    webhook: WebhookRoute, request: Request, input_data: Any, path_params: dict[str, str]
+) -> Optional[str]:
+    """Idempotency-Key header, else the webhook's key expression rendered against the request."""
+    header = request.headers.get("idempotency-key")
+    if header:
+        return header
+    if not webhook.idempotency_key:
+        return None
+
+    from app.services.template_renderer import render_template
+
+    try:
+        key = render_template(
+            webhook.idempotency_key,
+            {
+                "body": input_data,
+                "headers": dict(request.headers),
+                "query": dict(request.query_params),
+                "path": path_params,
+            },
+        ).strip()
+    except Exception as e:
+        logger.warning(f"Idempotency key expression failed for webhook '{webhook.path}': {e}")
+        return None
+    return key or None
+
 
 @router.api_route(
     "/{path:path}",
@@ -24,27 +53,33 @@ router = APIRouter()
 async def execute_webhook(
     path: str,
     request: Request,
-    db: AsyncSession = Depends(get_db),
 ):
-    """Execute webhook by triggering associated function."""
+    """
+    Execute webhook by triggering associated function.
+
+    Webhooks are resolved from the in-memory routing table. Templated paths
+    (e.g. ``orders/{id}``) pass their path parameters into the function input.
+
+    In "sync" response mode the request waits for the function result. In
+    "async" mode it returns 202 with the execution_id right away; poll
+    GET /executions/{execution_id} or receive the result on the webhook's
+    callback_url. No database session is held while the function runs.
+
+    Requests with the same idempotency key (Idempotency-Key header, or the
+    webhook's idempotency_key expression) run the function once: duplicates
+    get the first request's execution_id (and result, in sync mode).
+    """
     # Look up webhook configuration
-    result = await db.execute(
-        select(Webhook).where(
-            and_(
-                Webhook.path == path,
-                Webhook.http_method == request.method,
-                Webhook.is_active == True,
-            )
-        )
-    )
-    webhook = result.scalar_one_or_none()
+    match = await webhook_router.match(request.method, path)
 
-    if not webhook:
+    if not match:
         raise HTTPException(
             status_code=404,
             detail=f"No active webhook found for path '{path}' and method '{request.method}'",
         )
 
+    webhook, path_params = match
+
     # Authenticate if required
     user_id: Optional[str] = None
     if webhook.requires_auth:
@@ -53,7 +88,9 @@ async def execute_webhook(
             raise HTTPException(status_code=401, detail="Authorization required")
 
         try:
-            user_id, email, permissions = await verify_jwt_or_api_key(auth_header, db)
+            # Short-lived session, released before the function is enqueued
+            async with AsyncSessionLocal() as db:
+                user_id, email, permissions = await verify_jwt_or_api_key(auth_header, db)
 
             # Check function execute permission
             function_perm = f"sinas.functions/{webhook.function_namespace}/{webhook.function_name}.execute:own"
@@ -93,29 +130,96 @@ async def execute_webhook(
         else:
             input_data = {}
 
-        # Merge default values (body overrides defaults)
-        if webhook.default_values:
-            final_input = {**webhook.default_values, **(input_data if isinstance(input_data, dict) else {"input": input_data})}
+        # Merge default values (body overrides defaults, path parameters override both)
+        if webhook.default_values or path_params:
+            final_input = {
+                **(webhook.default_values or {}),
+                **(input_data if isinstance(input_data, dict) else {"input": input_data}),
+                **path_params,
+            }
         else:
             final_input = input_data
 
         execution_id = str(uuid.uuid4())
         chat_id = request.headers.get("x-chat-id")
+        idempotency_key = _idempotency_key(webhook, request, input_data, path_params)
+        scope = f"webhook:{webhook.id}:{user_id}"
+
+        if webhook.response_mode == "async":
+            from app.services.execution_engine import executor
+
+            # The worker completes the claimed key when the job finishes
+            idempotency_redis_key = None
+            if idempotency_key:
+                existing = await idempotency_store.claim(
+                    scope=f"{scope}:async",
+                    key=idempotency_key,
+                    execution_id=execution_id,
+                    input_data=final_input,
+                )
+                if existing is not None:
+                    return JSONResponse(
+                        status_code=202,
+                        content={
+                            "success": True,
+                            "execution_id": existing["execution_id"],
+                            "status": existing.get("status", "queued"),
+                        },
+                    )
+                idempotency_redis_key = idempotency_store.redis_key(f"{scope}:async", idempotency_key)
+
+            try:
+                await executor.enqueue_function(
+                    function_namespace=webhook.function_namespace,
+                    function_name=webhook.function_name,
+                    input_data=final_input,
+                    execution_id=execution_id,
+                    trigger_type=TriggerType.WEBHOOK.value,
+                    trigger_id=str(webhook.id),
+                    user_id=user_id,
+                    chat_id=chat_id,
+                    callback_url=webhook.callback_url,
+                    idempotency_redis_key=idempotency_redis_key,
+                )
+            except Exception:
+                # Nothing was queued: free the key so a retry can run
+                if idempotency_redis_key:
+                    await idempotency_store.release(idempotency_redis_key, execution_id)
+                raise
+            return JSONResponse(
+                status_code=202,
+                content={"success": True, "execution_id": execution_id, "status": "queued"},
+            )
 
         from app.services.queue_service import queue_service
 
-        result = await queue_service.enqueue_and_wait(
-            function_namespace=webhook.function_namespace,
-            function_name=webhook.function_name,
-            input_data=final_input,
-            execution_id=execution_id,
-            trigger_type=TriggerType.WEBHOOK.value,
-            trigger_id=str(webhook.id),
-            user_id=user_id,
-            chat_id=chat_id,
-        )
+        async def run(run_execution_id: str, idempotency_redis_key: Optional[str] = None) -> Any:
+            return await queue_service.enqueue_and_wait(
+                function_namespace=webhook.function_namespace,
+                function_name=webhook.function_name,
+                input_data=final_input,
+                execution_id=run_execution_id,
+                trigger_type=TriggerType.WEBHOOK.value,
+                trigger_id=str(webhook.id),
+                user_id=user_id,
+                chat_id=chat_id,
+                idempotency_redis_key=idempotency_redis_key,
+            )
+
+        if idempotency_key:
+            execution_id, result = await idempotency_store.run(
+                scope=scope,
+                key=idempotency_key,
+                execution_id=execution_id,
+                input_data=final_input,
+                execute=run,
+            )
+        else:
+            result = await run(execution_id)
 
         return {"success": True, "execution_id": execution_id, "result": result}
 
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Function execution failed: {str(e)}")
@@ -9,6 +9,7 @@ from app.core.auth import (
     set_permission_used,
 )
 from app.core.database import get_db
+from app.core.invalidation import publish_change
 from app.core.permissions import check_permission
 from app.models import Agent
 from app.schemas.agent import (
@@ -86,6 +87,7 @@ async def create_agent(
     db.add(agent)
     await db.commit()
     await db.refresh(agent)
+    await publish_change("agents", str(agent.id))
 
     response = AgentResponse.model_validate(agent)
 
@@ -225,6 +227,7 @@ async def update_agent(
         agent.is_default = agent_data.is_default
     await db.commit()
     await db.refresh(agent)
+    await publish_change("agents", str(agent.id))
 
     response = AgentResponse.model_validate(agent)
 
@@ -265,5 +268,6 @@ async def delete_agent(
 
     agent.is_active = False
     await db.commit()
+    await publish_change("agents", str(agent.id))
 
     return None
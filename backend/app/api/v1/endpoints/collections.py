@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
+from app.core.invalidation import publish_change
 from app.core.permissions import check_permission
 from app.models.file import Collection
 from app.schemas.file import CollectionCreate, CollectionResponse, CollectionUpdate
@@ -64,6 +65,7 @@ async def create_collection(
     db.add(collection)
     await db.commit()
     await db.refresh(collection)
+    await publish_change("collections", str(collection.id))
 
     return CollectionResponse.model_validate(collection)
 
@@ -164,6 +166,7 @@ async def update_collection(
 
     await db.commit()
     await db.refresh(collection)
+    await publish_change("collections", str(collection.id))
 
     return CollectionResponse.model_validate(collection)
 
@@ -193,5 +196,6 @@ async def delete_collection(
 
     await db.delete(collection)
     await db.commit()
+    await publish_change("collections", str(collection.id))
 
     return None
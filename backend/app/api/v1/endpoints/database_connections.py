@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import require_permission
 from app.core.database import get_db
 from app.core.encryption import EncryptionService
+from app.core.invalidation import publish_change
 from app.models.database_connection import DatabaseConnection
 from app.schemas.database_connection import (
     DatabaseConnectionCreate,
@@ -77,6 +78,21 @@ async def list_database_connections(
     return [DatabaseConnectionResponse.model_validate(c) for c in connections]
 
 
+@router.get("/pools/metrics")
+async def get_pool_metrics(
+    user_id: str = Depends(require_permission("sinas.database_connections.read:all")),
+):
+    """
+    Connection pool metrics of the serving process. Admin only.
+
+    Reports pool size, active/idle connections, acquire wait and query latency
+    per open pool. Each replica keeps its own pools.
+    """
+    from app.services.database_pool import DatabasePoolManager
+
+    return DatabasePoolManager.get_instance().get_metrics()
+
+
 @router.get("/{name}", response_model=DatabaseConnectionResponse)
 async def get_database_connection(
     name: str,
@@ -152,6 +168,7 @@ async def update_database_connection(
     from app.services.database_pool import DatabasePoolManager
 
     await DatabasePoolManager.get_instance().invalidate(str(connection_id))
+    await publish_change("database_connections", str(connection_id))
 
     return DatabaseConnectionResponse.model_validate(connection)
 
@@ -180,6 +197,7 @@ async def delete_database_connection(
     from app.services.database_pool import DatabasePoolManager
 
     await DatabasePoolManager.get_instance().invalidate(str(connection_id))
+    await publish_change("database_connections", str(connection_id))
 
 
 @router.post("/test", response_model=DatabaseConnectionTestResponse)
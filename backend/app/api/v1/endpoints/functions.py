@@ -5,11 +5,19 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
+from app.core.invalidation import publish_change
 from app.core.permissions import check_permission
 from app.models.function import Function, FunctionVersion
 from app.models.package import InstalledPackage
-from app.schemas import FunctionCreate, FunctionResponse, FunctionUpdate, FunctionVersionResponse
-from app.services.execution_engine import executor
+from app.schemas import (
+    FunctionCacheStatsResponse,
+    FunctionCreate,
+    FunctionResponse,
+    FunctionUpdate,
+    FunctionVersionResponse,
+)
+from app.services.function_cache import function_cache
+from app.services.function_result_cache import function_result_cache
 
 router = APIRouter(prefix="/functions", tags=["functions"])
 
@@ -100,6 +108,12 @@ async def create_function(
         requirements=function_data.requirements,
         shared_pool=function_data.shared_pool,
         requires_approval=function_data.requires_approval,
+        reuse_module_state=function_data.reuse_module_state,
+        cache_ttl=function_data.cache_ttl,
+        cache_key_fields=function_data.cache_key_fields,
+        cache_shared=function_data.cache_shared,
+        cache_max_bytes=function_data.cache_max_bytes,
+        queue_lane=function_data.queue_lane,
     )
 
     db.add(function)
@@ -117,6 +131,7 @@ async def create_function(
     )
     db.add(version)
     await db.commit()
+    await publish_change("functions", str(function.id))
 
     return FunctionResponse.model_validate(function)
 
@@ -272,6 +287,18 @@ async def update_function(
         function.shared_pool = function_data.shared_pool
     if function_data.requires_approval is not None:
         function.requires_approval = function_data.requires_approval
+    if function_data.reuse_module_state is not None:
+        function.reuse_module_state = function_data.reuse_module_state
+    if function_data.cache_ttl is not None:
+        function.cache_ttl = function_data.cache_ttl or None
+    if function_data.cache_key_fields is not None:
+        function.cache_key_fields = function_data.cache_key_fields or None
+    if function_data.cache_shared is not None:
+        function.cache_shared = function_data.cache_shared
+    if function_data.cache_max_bytes is not None:
+        function.cache_max_bytes = function_data.cache_max_bytes
+    if function_data.queue_lane is not None:
+        function.queue_lane = function_data.queue_lane or None
     if function_data.is_active is not None:
         function.is_active = function_data.is_active
     if function_data.enabled_namespaces is not None:
@@ -279,9 +306,10 @@ async def update_function(
 
     await db.commit()
     await db.refresh(function)
+    await publish_change("functions", str(function.id))
 
-    # Clear execution engine cache to ensure updated code is used
-    executor.clear_cache()
+    # Other processes drop it on the invalidation event; do it here right away
+    function_cache.invalidate(str(function.id))
 
     return FunctionResponse.model_validate(function)
 
@@ -311,9 +339,9 @@ async def delete_function(
 
     await db.delete(function)
     await db.commit()
+    await publish_change("functions", str(function.id))
 
-    # Clear execution engine cache
-    executor.clear_cache()
+    function_cache.invalidate(str(function.id))
 
     return {"message": f"Function '{namespace}/{name}' deleted successfully"}
 
@@ -353,3 +381,26 @@ async def list_function_versions(
     return versions
 
 
+@router.get("/{namespace}/{name}/cache-stats", response_model=FunctionCacheStatsResponse)
+async def get_function_cache_stats(
+    request: Request,
+    namespace: str,
+    name: str,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """Get result cache hit/miss statistics for a function."""
+    user_id, permissions = current_user_data
+
+    function = await Function.get_with_permissions(
+        db=db,
+        user_id=user_id,
+        permissions=permissions,
+        action="read",
+        namespace=namespace,
+        name=name,
+    )
+
+    set_permission_used(request, f"sinas.functions/{namespace}/{name}.read")
+
+    return FunctionCacheStatsResponse(**await function_result_cache.get_stats(function))
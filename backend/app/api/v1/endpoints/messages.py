@@ -69,7 +69,7 @@ async def list_messages(
         query = query.where(Message.content.ilike(f"%{search}%"))
 
     # Order by newest first
-    query = query.order_by(Message.created_at.desc())
+    query = query.order_by(Message.seq.desc())
 
     # Get total count
     count_query = select(func.count()).select_from(Message).join(Chat, Message.chat_id == Chat.id)
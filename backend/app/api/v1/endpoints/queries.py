@@ -3,6 +3,7 @@ import time
 
 import jsonschema
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,13 +12,14 @@ from app.core.database import get_db
 from app.core.permissions import check_permission
 from app.models.query import Query
 from app.schemas.query import (
+    QueryCacheStatsResponse,
     QueryCreate,
     QueryExecuteRequest,
     QueryExecuteResponse,
     QueryResponse,
     QueryUpdate,
 )
-from app.services.database_pool import DatabasePoolManager
+from app.services.query_cache import query_result_cache
 
 router = APIRouter(prefix="/queries", tags=["queries"])
 
@@ -62,6 +64,9 @@ async def create_query(
         output_schema=query_data.output_schema or {},
         timeout_ms=query_data.timeout_ms,
         max_rows=query_data.max_rows,
+        cache_ttl=query_data.cache_ttl,
+        cache_max_bytes=query_data.cache_max_bytes,
+        cache_tags=query_data.cache_tags,
     )
 
     db.add(query)
@@ -181,6 +186,12 @@ async def update_query(
         query.timeout_ms = query_data.timeout_ms
     if query_data.max_rows is not None:
         query.max_rows = query_data.max_rows
+    if query_data.cache_ttl is not None:
+        query.cache_ttl = query_data.cache_ttl or None
+    if query_data.cache_max_bytes is not None:
+        query.cache_max_bytes = query_data.cache_max_bytes
+    if query_data.cache_tags is not None:
+        query.cache_tags = query_data.cache_tags
     if query_data.is_active is not None:
         query.is_active = query_data.is_active
 
@@ -218,6 +229,31 @@ async def delete_query(
     return None
 
 
+@router.get("/{namespace}/{name}/cache-stats", response_model=QueryCacheStatsResponse)
+async def get_query_cache_stats(
+    namespace: str,
+    name: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user_data=Depends(get_current_user_with_permissions),
+):
+    """Get result cache hit/miss statistics for a query."""
+    user_id, permissions = current_user_data
+
+    query = await Query.get_with_permissions(
+        db=db,
+        user_id=user_id,
+        permissions=permissions,
+        action="read",
+        namespace=namespace,
+        name=name,
+    )
+
+    set_permission_used(request, f"sinas.queries/{namespace}/{name}.read")
+
+    return QueryCacheStatsResponse(**await query_result_cache.get_stats(query))
+
+
 @router.post("/{namespace}/{name}/execute", response_model=QueryExecuteResponse)
 async def execute_query(
     namespace: str,
@@ -227,7 +263,12 @@ async def execute_query(
     db: AsyncSession = Depends(get_db),
     current_user_data=Depends(get_current_user_with_permissions),
 ):
-    """Execute a query with the given input parameters."""
+    """
+    Execute a query with the given input parameters.
+
+    With format "ndjson" or "columnar", read results are streamed in chunks
+    of chunk_size rows (application/x-ndjson).
+    """
     user_id, permissions = current_user_data
 
     query = await Query.get_with_permissions(
@@ -260,18 +301,20 @@ async def execute_query(
     if user:
         params["user_email"] = user.email
 
+    if execute_request.format != "json":
+        if query.operation != "read":
+            raise HTTPException(status_code=400, detail="Only read queries can be streamed")
+        try:
+            chunks = await query_result_cache.stream(
+                db, query, params, execute_request.format, execute_request.chunk_size
+            )
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Query execution failed: {str(e)}")
+        return StreamingResponse(chunks, media_type="application/x-ndjson")
+
     start_time = time.time()
     try:
-        pool_manager = DatabasePoolManager.get_instance()
-        result = await pool_manager.execute_query(
-            db=db,
-            connection_id=str(query.database_connection_id),
-            sql=query.sql,
-            params=params,
-            operation=query.operation,
-            timeout_ms=query.timeout_ms,
-            max_rows=query.max_rows,
-        )
+        result = await query_result_cache.execute(db, query, params)
         duration_ms = int((time.time() - start_time) * 1000)
 
         if query.operation == "read":
@@ -280,7 +323,9 @@ async def execute_query(
                 operation=query.operation,
                 data=result.get("rows", []),
                 row_count=result.get("row_count", 0),
+                truncated=result.get("truncated"),
                 duration_ms=duration_ms,
+                cached=result.get("cached", False),
             )
         else:
             return QueryExecuteResponse(
@@ -1,7 +1,7 @@
 """Queue introspection endpoints for admin monitoring."""
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 
 from app.core.auth import require_permission
 from app.services.queue_service import queue_service
@@ -41,22 +41,73 @@ async def get_queue_stats(
     return stats
 
 
+@router.get("/autoscaler")
+async def get_autoscaler_status(
+    limit: int = Query(50, ge=1, le=500),
+    user_id: str = Depends(require_permission("sinas.system.read:all")),
+) -> dict[str, Any]:
+    """Last autoscaler evaluation (signals, draining containers) and recent scaling decisions."""
+    from app.services.autoscaler import autoscaler
+
+    return await autoscaler.get_status(limit=limit)
+
+
 @router.get("/jobs")
 async def list_jobs(
+    response: Response,
     status: Optional[str] = Query(None, description="Filter by status"),
+    queue: Optional[str] = Query(None, description="Filter by queue (functions/agents)"),
+    function: Optional[str] = Query(None, description="Filter by function (namespace/name)"),
+    agent: Optional[str] = Query(None, description="Filter by agent (namespace/name)"),
     limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
     user_id: str = Depends(require_permission("sinas.system.read:all")),
 ) -> list[dict[str, Any]]:
-    """List jobs with optional status filter."""
-    return await queue_service.get_jobs_list(status=status, limit=limit)
+    """List jobs newest first with optional filters. Paginated via X-Next-Cursor."""
+    try:
+        jobs, next_cursor = await queue_service.get_jobs_list(
+            status=status,
+            queue=queue,
+            function=function,
+            agent=agent,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return jobs
 
 
 @router.get("/dlq")
 async def get_dlq(
+    response: Response,
+    function: Optional[str] = Query(None, description="Filter by function (namespace/name)"),
+    signature: Optional[str] = Query(None, description="Filter by error signature"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[float] = Query(
+        None, description="Cursor from the X-Next-Cursor header of the previous page"
+    ),
+    user_id: str = Depends(require_permission("sinas.system.read:all")),
+) -> list[dict[str, Any]]:
+    """List dead-letter queue entries, newest failure first. Paginated via X-Next-Cursor."""
+    entries, next_cursor = await queue_service.get_dlq_entries(
+        function=function, signature=signature, limit=limit, cursor=cursor
+    )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = repr(next_cursor)
+    return entries
+
+
+@router.get("/dlq/signatures")
+async def get_dlq_signatures(
     user_id: str = Depends(require_permission("sinas.system.read:all")),
 ) -> list[dict[str, Any]]:
-    """List dead-letter queue entries."""
-    return await queue_service.get_dlq_entries()
+    """Group dead-letter queue entries by normalized error signature."""
+    return await queue_service.get_dlq_signatures()
 
 
 @router.get("/workers")
@@ -77,3 +128,36 @@ async def retry_dlq_job(
         return await queue_service.retry_dlq_job(job_id)
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/dlq/retry", status_code=202)
+async def retry_dlq_jobs(
+    function: Optional[str] = Query(None, description="Retry entries of this function"),
+    signature: Optional[str] = Query(None, description="Retry entries with this error signature"),
+    limit: int = Query(100, ge=1, le=1000, description="Max entries to retry"),
+    rate: float = Query(10.0, gt=0, le=1000, description="Max re-enqueues per second"),
+    user_id: str = Depends(require_permission("sinas.system.update:all")),
+) -> dict[str, Any]:
+    """
+    Bulk-retry DLQ entries by function and/or error signature, rate limited.
+
+    Runs in a function worker; poll GET /queue/dlq/retry/{retry_id} for progress.
+    """
+    try:
+        return await queue_service.start_dlq_bulk_retry(
+            function=function, signature=signature, limit=limit, rate=rate
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/dlq/retry/{retry_id}")
+async def get_dlq_bulk_retry(
+    retry_id: str,
+    user_id: str = Depends(require_permission("sinas.system.read:all")),
+) -> dict[str, Any]:
+    """Progress of a bulk DLQ retry (retried/skipped counts, and the entries once finished)."""
+    run = await queue_service.get_dlq_bulk_retry(retry_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Bulk retry not found")
+    return run
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
+from app.core.invalidation import publish_change
 from app.core.permissions import check_permission
 from app.models import Template
 from app.schemas.template import (
@@ -68,6 +69,7 @@ async def create_template(
     db.add(template)
     await db.commit()
     await db.refresh(template)
+    await publish_change("templates", str(template.id))
 
     return TemplateResponse.model_validate(template)
 
@@ -197,6 +199,7 @@ async def update_template(
 
     await db.commit()
     await db.refresh(template)
+    await publish_change("templates", str(template.id))
 
     return TemplateResponse.model_validate(template)
 
@@ -227,6 +230,7 @@ async def delete_template(
 
     await db.delete(template)
     await db.commit()
+    await publish_change("templates", str(template.id))
 
 
 @router.post("/{template_id}/render", response_model=TemplateRenderResponse)
@@ -6,6 +6,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user_with_permissions, set_permission_used
 from app.core.database import get_db
+from app.core.invalidation import publish_change
 from app.core.permissions import check_permission
 from app.models.webhook import Webhook
 from app.schemas import WebhookCreate, WebhookResponse, WebhookUpdate
@@ -60,11 +61,15 @@ async def create_webhook(
         description=webhook_data.description,
         default_values=webhook_data.default_values or {},
         requires_auth=webhook_data.requires_auth,
+        response_mode=webhook_data.response_mode,
+        callback_url=webhook_data.callback_url,
+        idempotency_key=webhook_data.idempotency_key or None,
     )
 
     db.add(webhook)
     await db.commit()
     await db.refresh(webhook)
+    await publish_change("webhooks", str(webhook.id))
 
     response = WebhookResponse.model_validate(webhook)
 
@@ -195,8 +200,15 @@ async def update_webhook(
         webhook.is_active = webhook_data.is_active
     if webhook_data.requires_auth is not None:
         webhook.requires_auth = webhook_data.requires_auth
+    if webhook_data.response_mode is not None:
+        webhook.response_mode = webhook_data.response_mode
+    if webhook_data.callback_url is not None:
+        webhook.callback_url = webhook_data.callback_url or None
+    if webhook_data.idempotency_key is not None:
+        webhook.idempotency_key = webhook_data.idempotency_key or None
     await db.commit()
     await db.refresh(webhook)
+    await publish_change("webhooks", str(webhook.id))
 
     response = WebhookResponse.model_validate(webhook)
 
@@ -229,5 +241,6 @@ async def delete_webhook(
 
     await db.delete(webhook)
     await db.commit()
+    await publish_change("webhooks", str(webhook.id))
 
     return {"message": f"Webhook '{webhook.path}' deleted successfully"}
@@ -83,6 +83,7 @@ class Settings(BaseSettings):
     # Database pool
     db_pool_size: int = 20  # Connection pool size
     db_max_overflow: int = 30  # Max overflow connections beyond pool_size
+    external_db_pool_warmup: bool = True  # Open pools for active database connections on startup
 
     # Docker configuration
     docker_network: str = "auto"  # Docker network for containers (auto-detect or specify)
@@ -91,13 +92,41 @@ class Settings(BaseSettings):
     # Message history
     max_history_messages: int = 100  # Max messages to load for conversation history
 
+    # State store
+    state_cache_ttl: int = 300  # Seconds a cached state namespace lives in Redis
+
+    # Blob store (large function payloads passed by reference)
+    blob_storage_path: str = "/var/sinas/blobs"
+    blob_inline_threshold: int = 256 * 1024  # Bytes; larger inputs/results are passed by reference
+    blob_ttl: int = 86400  # Seconds an unused blob is kept
+
     # Redis & Queue
     redis_url: str = "redis://redis:6379/0"
     queue_function_concurrency: int = 10
     queue_agent_concurrency: int = 5
+    agent_dispatch_window: int = 10  # Agent jobs admitted to workers at once (total agent worker slots)
+    agent_max_concurrent_per_user: int = 3  # 0 = unlimited
+    agent_max_concurrent_per_agent: int = 0  # 0 = unlimited
     queue_default_timeout: int = 300
     queue_max_retries: int = 3
     queue_retry_delay: int = 10
+    webhook_callback_timeout: int = 10  # Seconds per result callback POST (async webhooks)
+    webhook_callback_retries: int = 3
+    idempotency_window: int = 86400  # Seconds a result is replayed for a repeated Idempotency-Key
+
+    # Autoscaling of pool containers and shared workers (runs in the scheduler service)
+    autoscale_enabled: bool = False
+    autoscale_interval: int = 15  # Seconds between evaluations
+    autoscale_up_utilization: float = 0.75  # Busy fraction at which to add containers
+    autoscale_down_utilization: float = 0.3  # Busy fraction at which to remove one
+    autoscale_wait_target_ms: int = 2000  # Interactive p95 queue wait that counts as backlog
+    autoscale_up_after: int = 2  # Consecutive evaluations above threshold before scaling up
+    autoscale_down_after: int = 8  # Consecutive evaluations below threshold before scaling down
+    autoscale_up_cooldown: int = 60  # Seconds after any change before scaling up again
+    autoscale_down_cooldown: int = 300  # Seconds after any change before scaling down again
+    autoscale_shared_min: int = 1
+    autoscale_shared_max: int = 10
+    autoscale_shared_worker_slots: int = 4  # Concurrent executions one shared worker handles well
 
     # Encryption
     encryption_key: Optional[str] = None  # Fernet key for encrypting sensitive data
@@ -1,6 +1,8 @@
+import logging
+import time
 from collections.abc import AsyncGenerator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -21,6 +23,40 @@ async_engine = create_async_engine(
 )
 AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
+logger = logging.getLogger(__name__)
+
+LONG_CONNECTION_HOLD_SECONDS = 10.0  # Log connections checked out longer than this
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _record_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.monotonic()
+
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _record_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop("checked_out_at", None)
+    if checked_out_at is None:
+        return
+    held = time.monotonic() - checked_out_at
+    if held >= LONG_CONNECTION_HOLD_SECONDS:
+        logger.warning(f"Database connection held for {held:.1f}s")
+    else:
+        logger.debug(f"Database connection held for {held * 1000:.1f}ms")
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """
+    End the session's transaction so its connection goes back to the pool.
+
+    Call before awaiting anything slow (an LLM stream, a queued function) with
+    a session that only has reads outstanding. Loaded objects stay usable
+    (expire_on_commit=False); the next query checks out a connection again.
+    """
+    if session.in_transaction():
+        await session.commit()
+
+
 # Sync engine for Alembic migrations
 sync_engine = create_engine(database_url, echo=settings.debug)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
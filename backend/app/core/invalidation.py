@@ -0,0 +1,131 @@
+"""Cross-process cache invalidation via Redis pub/sub.
+
+Writers call publish_change() after committing a change to a resource type
+(webhooks, functions, database_connections, ...). This bumps a per-resource
+version counter and broadcasts the change on a shared channel. Every process
+that keeps an in-memory cache runs the invalidation_listener and registers a
+handler per resource type.
+
+The version counter lets caches detect changes they missed while the
+listener was disconnected (see get_resource_version).
+"""
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "sinas:invalidate"
+RESOURCE_VERSION_PREFIX = "sinas:resource_version:"
+
+InvalidationHandler = Callable[[Optional[str], int], Any]
+
+
+async def publish_change(resource: str, resource_id: Optional[str] = None) -> int:
+    """
+    Announce that a resource changed. resource_id None means "any/all of this type".
+
+    Returns:
+        The new version of the resource type
+    """
+    try:
+        redis = await get_redis()
+        version = await redis.incr(f"{RESOURCE_VERSION_PREFIX}{resource}")
+        await redis.publish(
+            INVALIDATION_CHANNEL,
+            json.dumps({"resource": resource, "id": resource_id, "version": version}),
+        )
+        return version
+    except Exception as e:
+        # Caches fall back to their version check; never fail the write path
+        logger.warning(f"Failed to publish invalidation for {resource}/{resource_id}: {e}")
+        return 0
+
+
+async def get_resource_version(resource: str) -> int:
+    """Current version counter of a resource type (0 if never changed)."""
+    redis = await get_redis()
+    value = await redis.get(f"{RESOURCE_VERSION_PREFIX}{resource}")
+    return int(value) if value else 0
+
+
+async def get_resource_versions(resources: list[str]) -> dict[str, int]:
+    """Current version counters of several resource types in one round trip."""
+    redis = await get_redis()
+    values = await redis.mget([f"{RESOURCE_VERSION_PREFIX}{r}" for r in resources])
+    return {r: int(v) if v else 0 for r, v in zip(resources, values)}
+
+
+class InvalidationListener:
+    """Per-process subscriber dispatching invalidation events to registered handlers."""
+
+    def __init__(self):
+        self.handlers: dict[str, list[InvalidationHandler]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, resource: str, handler: InvalidationHandler) -> None:
+        """Register handler(resource_id, version). May be sync or async."""
+        self.handlers.setdefault(resource, []).append(handler)
+
+    def start(self) -> None:
+        """Start listening in the background (idempotent)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _dispatch(self, payload: dict[str, Any]) -> None:
+        for handler in self.handlers.get(payload.get("resource"), []):
+            try:
+                result = handler(payload.get("id"), payload.get("version", 0))
+                if isinstance(result, Awaitable):
+                    await result
+            except Exception as e:
+                logger.error(f"Invalidation handler failed for {payload}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                redis = await get_redis()
+                pubsub = redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                logger.info(f"Listening for cache invalidations on {INVALIDATION_CHANNEL}")
+
+                while True:
+                    msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if msg is None:
+                        continue
+                    try:
+                        payload = json.loads(msg["data"])
+                    except (json.JSONDecodeError, TypeError) as e:
+                        logger.warning(f"Invalid invalidation message: {e}")
+                        continue
+                    await self._dispatch(payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Invalidation listener error, reconnecting: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+# Global instance
+invalidation_listener = InvalidationListener()
@@ -1,20 +1,18 @@
 import logging
 from contextlib import asynccontextmanager
 
-from fastapi import Depends, FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.docs import get_swagger_ui_html
-from fastapi.responses import JSONResponse
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.runtime import runtime_router
 from app.api.v1 import router as api_v1_router
 from app.core.auth import initialize_default_roles, initialize_superadmin
-from app.core.database import AsyncSessionLocal, get_db
+from app.core.database import AsyncSessionLocal
 from app.core.templates import initialize_default_templates
 from app.middleware.request_logger import RequestLoggerMiddleware
 from app.services.clickhouse_logger import clickhouse_logger
-from app.services.openapi_generator import generate_runtime_openapi
+from app.services.openapi_generator import runtime_openapi_cache
 
 logger = logging.getLogger(__name__)
 
@@ -73,11 +71,27 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"⚠️  ClickHouse storage migration skipped: {e}")
 
-    yield
+    # Subscribe in-memory caches (webhook routes, ...) to invalidation events
+    from app.core.invalidation import invalidation_listener
+    from app.services.webhook_router import webhook_router  # noqa: F401 - registers handler
 
-    # Shutdown
+    invalidation_listener.start()
+
+    # Open pools for external database connections
+    from app.core.config import settings
     from app.services.database_pool import DatabasePoolManager
 
+    if settings.external_db_pool_warmup:
+        try:
+            opened = await DatabasePoolManager.get_instance().warm_up()
+            print(f"✅ Warmed up {opened} database connection pools")
+        except Exception as e:
+            print(f"⚠️  Database pool warm-up skipped: {e}")
+
+    yield
+
+    # Shutdown
+    await invalidation_listener.stop()
     await DatabasePoolManager.get_instance().close_all()
     clickhouse_logger.close()
     await close_redis()
@@ -99,6 +113,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add request logging middleware
@@ -142,6 +157,7 @@ adapters_openai_app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 from app.adapters.openai.endpoints import router as openai_adapter_router
@@ -157,10 +173,23 @@ app.include_router(runtime_router)
 
 # Dynamic OpenAPI endpoint for runtime API
 @app.get("/openapi.json", include_in_schema=False)
-async def get_runtime_openapi(db: AsyncSession = Depends(get_db)):
-    """Generate dynamic OpenAPI spec showing all active webhooks and agents."""
-    spec = await generate_runtime_openapi(db)
-    return JSONResponse(content=spec)
+async def get_runtime_openapi(request: Request):
+    """
+    Dynamic OpenAPI spec showing all active webhooks and agents.
+
+    Served from the per-process spec cache with an ETag; a matching
+    If-None-Match gets 304 Not Modified.
+    """
+    body, etag = await runtime_openapi_cache.get()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in tags or etag in tags:
+            return Response(status_code=304, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # Custom docs endpoint that uses dynamic OpenAPI
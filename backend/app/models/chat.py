@@ -1,15 +1,43 @@
+import json
 import uuid
 from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy import JSON, Boolean, DateTime, ForeignKey, String, Text
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    DateTime,
+    ForeignKey,
+    Identity,
+    Index,
+    Integer,
+    String,
+    Text,
+    event,
+    func,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, created_at, updated_at, uuid_pk
 
+MESSAGE_PREVIEW_LENGTH = 200
+
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (
+        # Matches the chat list order (last_message_at DESC NULLS LAST, id DESC)
+        Index(
+            "ix_chats_user_archived_last_message",
+            "user_id",
+            "archived",
+            text("last_message_at DESC NULLS LAST"),
+            text("id DESC"),
+        ),
+    )
 
     id: Mapped[uuid_pk]
     user_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
@@ -25,9 +53,14 @@ class Chat(Base):
     expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
 
     # Chat metadata for creation context (agent input, resolved function params, etc.)
-    chat_metadata: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, default=None)
+    chat_metadata: Mapped[Optional[dict[str, Any]]] = mapped_column(JSONB, default=None)
     # Example: {"agent_input": {"my_city": "London"}, "resolved_function_params": {"check_weather": {"city": "London"}}}
 
+    # Denormalized activity, maintained on every message insert (see _update_chat_activity)
+    last_message_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    last_message_preview: Mapped[Optional[str]] = mapped_column(String(MESSAGE_PREVIEW_LENGTH))
+
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
@@ -38,21 +71,72 @@ class Chat(Base):
         "Message",
         back_populates="chat",
         cascade="all, delete-orphan",
-        order_by="Message.created_at",
+        order_by="Message.seq",
     )
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_chat_seq", "chat_id", "seq"),
+    )
 
     id: Mapped[uuid_pk]
+    # Insertion order. created_at is the transaction start time, so messages
+    # saved together (tool results) tie on it; seq never does.
+    seq: Mapped[int] = mapped_column(BigInteger, Identity(), nullable=False)
     chat_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("chats.id"), nullable=False, index=True)
     role: Mapped[str] = mapped_column(String(20), nullable=False)  # user, assistant, system, tool
     content: Mapped[Optional[str]] = mapped_column(Text)
-    tool_calls: Mapped[Optional[list[dict[str, Any]]]] = mapped_column(JSON)
+    tool_calls: Mapped[Optional[list[dict[str, Any]]]] = mapped_column(JSONB)
     tool_call_id: Mapped[Optional[str]] = mapped_column(String(255))
     name: Mapped[Optional[str]] = mapped_column(String(255))  # For tool response messages
     created_at: Mapped[created_at]
 
     # Relationships
     chat: Mapped["Chat"] = relationship("Chat", back_populates="messages")
+
+
+def _message_preview(content: Optional[str]) -> Optional[str]:
+    """Short plain-text preview of message content (text parts only for multimodal JSON)."""
+    if not content:
+        return None
+
+    text = content
+    try:
+        parsed = json.loads(content)
+        if isinstance(parsed, list):
+            text = " ".join(
+                part.get("text", "")
+                for part in parsed
+                if isinstance(part, dict) and part.get("type") == "text"
+            )
+    except (json.JSONDecodeError, TypeError):
+        pass
+
+    text = " ".join(text.split())
+    return text[:MESSAGE_PREVIEW_LENGTH] or None
+
+
+@event.listens_for(Message, "after_insert")
+def _update_chat_activity(mapper, connection, target: Message) -> None:
+    """
+    Keep Chat.last_message_at / message_count / last_message_preview in sync.
+
+    Runs inside the flush that inserts the message, so the counters are updated
+    atomically in the same transaction regardless of which code path wrote it.
+    now() is the transaction timestamp, identical to the message's created_at default.
+    """
+    chats = Chat.__table__
+    values: dict[str, Any] = {
+        "message_count": chats.c.message_count + 1,
+        "last_message_at": func.now(),
+        # Message activity is not a chat edit - don't bump updated_at
+        "updated_at": chats.c.updated_at,
+    }
+    if target.role in ("user", "assistant"):
+        preview = _message_preview(target.content)
+        if preview:
+            values["last_message_preview"] = preview
+
+    connection.execute(update(chats).where(chats.c.id == target.chat_id).values(**values))
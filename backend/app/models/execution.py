@@ -3,7 +3,7 @@ import uuid as uuid_lib
 from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy import JSON, DateTime, Enum, ForeignKey, Integer, LargeBinary, String, Text
+from sqlalchemy import JSON, Boolean, DateTime, Enum, ForeignKey, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, uuid_pk
@@ -47,6 +47,9 @@ class Execution(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
     duration_ms: Mapped[Optional[int]] = mapped_column(Integer)
+    cached: Mapped[bool] = mapped_column(
+        Boolean, default=False, nullable=False
+    )  # Served from the function result cache (nothing ran)
 
     # Stateful execution fields
     generator_state: Mapped[Optional[bytes]] = mapped_column(LargeBinary)
@@ -3,6 +3,7 @@ import uuid as uuid_lib
 from typing import Any, Optional
 
 from sqlalchemy import JSON, BigInteger, ForeignKey, Index, Integer, String, Text, UniqueConstraint, select
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -84,7 +85,7 @@ class File(Base):
     current_version: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
 
     # File metadata validated against collection.metadata_schema
-    file_metadata: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict, nullable=False)
+    file_metadata: Mapped[dict[str, Any]] = mapped_column(JSONB, default=dict, nullable=False)
 
     # Visibility control
     visibility: Mapped[str] = mapped_column(
@@ -104,6 +105,13 @@ class File(Base):
         # Performance indexes
         Index("ix_files_collection_visibility", "collection_id", "visibility"),
         Index("ix_files_user_collection", "user_id", "collection_id"),
+        # Containment (@>) metadata filters
+        Index(
+            "ix_files_file_metadata_gin",
+            "file_metadata",
+            postgresql_using="gin",
+            postgresql_ops={"file_metadata": "jsonb_path_ops"},
+        ),
     )
 
 
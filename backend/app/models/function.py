@@ -34,6 +34,18 @@ class Function(Base, PermissionMixin):
     requires_approval: Mapped[bool] = mapped_column(
         Boolean, default=False
     )  # If True, LLM must ask user before calling
+    reuse_module_state: Mapped[bool] = mapped_column(
+        Boolean, default=False
+    )  # If True, containers keep module-level state (imports, clients) between calls
+    # Result cache for deterministic functions (None disables). Keyed by code hash,
+    # the input fields in cache_key_fields (None = the whole input) and the caller
+    # unless cache_shared.
+    cache_ttl: Mapped[Optional[int]] = mapped_column(Integer)  # seconds
+    cache_key_fields: Mapped[Optional[list[str]]] = mapped_column(JSON)
+    cache_shared: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
+    cache_max_bytes: Mapped[int] = mapped_column(Integer, default=1_000_000, nullable=False)
+    # Function queue priority lane (interactive/default/batch); None = by trigger type
+    queue_lane: Mapped[Optional[str]] = mapped_column(String(20))
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
 
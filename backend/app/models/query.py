@@ -44,6 +44,12 @@ class Query(Base, PermissionMixin):
     timeout_ms: Mapped[int] = mapped_column(Integer, default=5000)
     max_rows: Mapped[int] = mapped_column(Integer, default=1000)
 
+    # Result cache (reads only; None disables). Reads depend on cache_tags,
+    # writes bump the versions of their cache_tags (scoped per database connection).
+    cache_ttl: Mapped[Optional[int]] = mapped_column(Integer)  # seconds
+    cache_max_bytes: Mapped[int] = mapped_column(Integer, default=1_000_000, nullable=False)
+    cache_tags: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
+
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
 
     created_at: Mapped[created_at]
@@ -3,7 +3,8 @@ import uuid as uuid_lib
 from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy import JSON, Float, ForeignKey, Index, String, Text
+from sqlalchemy import Float, ForeignKey, Index, String, Text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import Base, created_at, updated_at, uuid_pk
@@ -22,7 +23,7 @@ class State(Base):
     # Core key-value structure
     namespace: Mapped[str] = mapped_column(String(100), nullable=False, index=True)
     key: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
-    value: Mapped[dict[str, Any]] = mapped_column(JSON, nullable=False)
+    value: Mapped[dict[str, Any]] = mapped_column(JSONB, nullable=False)
 
     # Sharing control
     visibility: Mapped[str] = mapped_column(
@@ -32,7 +33,7 @@ class State(Base):
 
     # Metadata
     description: Mapped[Optional[str]] = mapped_column(Text)
-    tags: Mapped[list[str]] = mapped_column(JSON, default=list, nullable=False)
+    tags: Mapped[list[str]] = mapped_column(JSONB, default=list, nullable=False)
 
     # Ranking and lifecycle
     relevance_score: Mapped[float] = mapped_column(Float, default=1.0, nullable=False)
@@ -50,4 +51,17 @@ class State(Base):
         # Performance indexes
         Index("ix_states_namespace_visibility", "namespace", "visibility"),
         Index("ix_states_expires_at", "expires_at"),
+        # Containment (@>) filters on value and tags
+        Index(
+            "ix_states_value_gin",
+            "value",
+            postgresql_using="gin",
+            postgresql_ops={"value": "jsonb_path_ops"},
+        ),
+        Index(
+            "ix_states_tags_gin",
+            "tags",
+            postgresql_using="gin",
+            postgresql_ops={"tags": "jsonb_path_ops"},
+        ),
     )
@@ -33,6 +33,11 @@ class Webhook(Base):
     default_values: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON)
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     requires_auth: Mapped[bool] = mapped_column(Boolean, default=True)
+    # "sync" waits for the function result, "async" returns 202 with the execution_id
+    response_mode: Mapped[str] = mapped_column(String(20), nullable=False, default="sync")
+    callback_url: Mapped[Optional[str]] = mapped_column(Text)  # POSTed the result in async mode
+    # Jinja expression over body/headers/query/path deriving an idempotency key
+    idempotency_key: Mapped[Optional[str]] = mapped_column(Text)
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at]
     # Config tracking
@@ -1,15 +1,28 @@
 """arq job handlers for agent message processing."""
-import json
 import logging
 import traceback
 from typing import Any
 
 from app.core.config import settings
-from app.services.queue_service import JOB_STATUS_PREFIX, JOB_TTL
+from app.services.agent_dispatcher import agent_dispatcher, current_agent_job
+from app.services.job_registry import job_registry
 
 logger = logging.getLogger(__name__)
 
 
+async def _release(job_id: str) -> None:
+    """Free the job's fair-queue slots so the next waiting jobs are admitted."""
+    try:
+        await agent_dispatcher.release(job_id)
+    except Exception as e:
+        logger.warning(f"Failed to release agent job {job_id}: {e}")
+
+
+async def dispatch_agent_jobs_job(ctx: dict) -> None:
+    """Admit waiting agent jobs whose slots were freed by expired leases."""
+    await agent_dispatcher.dispatch()
+
+
 async def execute_agent_message_job(ctx: dict, **kwargs: Any) -> None:
     """
     Process an agent message in a worker.
@@ -34,32 +47,11 @@ async def execute_agent_message_job(ctx: dict, **kwargs: Any) -> None:
 
     logger.info(f"Agent worker processing message for chat {chat_id} (job={job_id})")
 
-    # Read existing status to preserve fields set at enqueue time (agent, enqueued_at)
-    existing = {}
-    raw = await redis.get(f"{JOB_STATUS_PREFIX}{job_id}")
-    if raw:
-        try:
-            existing = json.loads(raw)
-        except (json.JSONDecodeError, TypeError):
-            pass
-
-    # Common fields preserved across status updates
-    base_fields = {
-        "channel_id": channel_id,
-        "queue": "agents",
-        "type": "message",
-        "chat_id": chat_id,
-        "agent": existing.get("agent"),
-        "enqueued_at": existing.get("enqueued_at"),
-    }
-
-    # Update status to running
-    await redis.set(
-        f"{JOB_STATUS_PREFIX}{job_id}",
-        json.dumps({**base_fields, "status": "running"}),
-        ex=JOB_TTL,
-    )
+    # Update status to running (fields set at enqueue time are kept in the job hash)
+    await job_registry.set_status(job_id, "running", redis=redis)
 
+    # Sub-agent jobs enqueued from here run under this job's admission
+    token = current_agent_job.set(job_id)
     try:
         async with AsyncSessionLocal() as db:
             message_service = MessageService(db)
@@ -80,11 +72,7 @@ async def execute_agent_message_job(ctx: dict, **kwargs: Any) -> None:
         await stream_relay.publish_done(channel_id)
 
         # Update status
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "completed"}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "completed", redis=redis)
 
         logger.info(f"Agent message job {job_id} completed")
 
@@ -96,13 +84,12 @@ async def execute_agent_message_job(ctx: dict, **kwargs: Any) -> None:
         await stream_relay.publish_error(channel_id, str(e))
 
         # Update status
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "failed", "error": str(e)}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "failed", redis=redis, error=str(e))
 
         raise
+    finally:
+        current_agent_job.reset(token)
+        await _release(job_id)
 
 
 async def execute_agent_resume_job(ctx: dict, **kwargs: Any) -> None:
@@ -134,31 +121,11 @@ async def execute_agent_resume_job(ctx: dict, **kwargs: Any) -> None:
 
     logger.info(f"Agent worker resuming chat {chat_id} (job={job_id}, approved={approved})")
 
-    # Read existing status to preserve fields set at enqueue time (agent, enqueued_at)
-    existing = {}
-    raw = await redis.get(f"{JOB_STATUS_PREFIX}{job_id}")
-    if raw:
-        try:
-            existing = json.loads(raw)
-        except (json.JSONDecodeError, TypeError):
-            pass
-
-    # Common fields preserved across status updates
-    base_fields = {
-        "channel_id": channel_id,
-        "queue": "agents",
-        "type": "resume",
-        "chat_id": chat_id,
-        "agent": existing.get("agent"),
-        "enqueued_at": existing.get("enqueued_at"),
-    }
-
-    await redis.set(
-        f"{JOB_STATUS_PREFIX}{job_id}",
-        json.dumps({**base_fields, "status": "running"}),
-        ex=JOB_TTL,
-    )
+    # Update status to running (fields set at enqueue time are kept in the job hash)
+    await job_registry.set_status(job_id, "running", redis=redis)
 
+    # Sub-agent jobs enqueued from here run under this job's admission
+    token = current_agent_job.set(job_id)
     try:
         async with AsyncSessionLocal() as db:
             # Load pending approval
@@ -202,11 +169,7 @@ async def execute_agent_resume_job(ctx: dict, **kwargs: Any) -> None:
 
         await stream_relay.publish_done(channel_id)
 
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "completed"}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "completed", redis=redis)
 
         logger.info(f"Agent resume job {job_id} completed")
 
@@ -216,10 +179,9 @@ async def execute_agent_resume_job(ctx: dict, **kwargs: Any) -> None:
 
         await stream_relay.publish_error(channel_id, str(e))
 
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "failed", "error": str(e)}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "failed", redis=redis, error=str(e))
 
         raise
+    finally:
+        current_agent_job.reset(token)
+        await _release(job_id)
@@ -4,16 +4,22 @@ import json
 import logging
 import time
 import uuid
-from typing import Any
+from collections.abc import Callable
+from typing import Any, Optional
+
+from arq import cron, func
 
 from app.core.config import settings
 from app.core.redis import get_redis_settings
+from app.services.job_registry import job_registry
 from app.services.queue_service import (
-    DLQ_KEY,
+    DLQ_BULK_RETRY_MAX_SECONDS,
+    FUNCTION_QUEUE,
     JOB_RESULT_PREFIX,
-    JOB_STATUS_PREFIX,
     JOB_TTL,
     JOB_DONE_CHANNEL_PREFIX,
+    MAINTENANCE_QUEUE,
+    queue_service,
 )
 
 logger = logging.getLogger(__name__)
@@ -21,20 +27,79 @@ logger = logging.getLogger(__name__)
 WORKER_HEARTBEAT_PREFIX = "sinas:worker:active:"
 WORKER_HEARTBEAT_TTL = 30  # seconds — key auto-expires if worker dies
 WORKER_HEARTBEAT_INTERVAL = 10  # seconds — refresh frequency
+MAINTENANCE_MAX_JOBS = 4  # concurrent bulk jobs in the scheduler service
+CALLBACK_DRAIN_TIMEOUT = 30  # seconds — shutdown waits this long for pending callbacks
 
 
-async def _heartbeat_loop(redis, worker_id: str, data: dict) -> None:
-    """Background task that refreshes the worker heartbeat key."""
+async def _heartbeat_loop(
+    redis, worker_id: str, data: dict, stats: Optional[Callable[[], dict]] = None
+) -> None:
+    """Background task that refreshes the worker heartbeat key (with live stats, if given)."""
     key = f"{WORKER_HEARTBEAT_PREFIX}{worker_id}"
     while True:
         try:
             data["last_heartbeat"] = time.time()
+            if stats is not None:
+                data.update(stats())
             await redis.set(key, json.dumps(data), ex=WORKER_HEARTBEAT_TTL)
         except Exception:
             pass
         await asyncio.sleep(WORKER_HEARTBEAT_INTERVAL)
 
 
+async def _deliver_callback(callback_url: str, payload: dict[str, Any]) -> None:
+    """POST a job's final outcome to its callback URL (best effort, with retries)."""
+    import httpx
+
+    body = json.dumps(payload, default=str)
+    headers = {"Content-Type": "application/json"}
+
+    for attempt in range(1, settings.webhook_callback_retries + 1):
+        try:
+            async with httpx.AsyncClient(timeout=settings.webhook_callback_timeout) as client:
+                response = await client.post(callback_url, content=body, headers=headers)
+            if response.status_code < 500:
+                if response.status_code >= 400:
+                    logger.warning(
+                        f"Callback for {payload.get('execution_id')} rejected by "
+                        f"{callback_url}: HTTP {response.status_code}"
+                    )
+                return
+            error = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = str(e)
+
+        logger.warning(
+            f"Callback for {payload.get('execution_id')} to {callback_url} failed "
+            f"(attempt {attempt}/{settings.webhook_callback_retries}): {error}"
+        )
+        if attempt < settings.webhook_callback_retries:
+            await asyncio.sleep(2 ** (attempt - 1))
+
+
+def _spawn_callback(ctx: dict, callback_url: str, payload: dict[str, Any]) -> None:
+    """Deliver a callback as a background task, so its retries don't hold the job's slot."""
+    tasks: set[asyncio.Task] = ctx.setdefault("_callback_tasks", set())
+    task = asyncio.create_task(_deliver_callback(callback_url, payload))
+    tasks.add(task)
+    task.add_done_callback(tasks.discard)
+
+
+async def _finish_idempotency(
+    redis_key: str, execution_id: str, result_ref: Any = None, failed: bool = False
+) -> None:
+    """Complete (or, for a failed job, release) the idempotency record a job claimed."""
+    from app.services.idempotency import idempotency_store
+
+    try:
+        if failed:
+            await idempotency_store.release(redis_key, execution_id)
+        else:
+            await idempotency_store.complete(redis_key, execution_id, result_ref)
+    except Exception as e:
+        logger.warning(f"Failed to finish idempotency record for {execution_id}: {e}")
+
+
 async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
     """
     Execute a function in the worker process.
@@ -54,6 +119,9 @@ async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
     user_id = kwargs["user_id"]
     chat_id = kwargs.get("chat_id")
     resume_data = kwargs.get("resume_data")
+    callback_url = kwargs.get("callback_url")
+    lane = kwargs.get("lane") or "default"
+    idempotency_redis_key = kwargs.get("idempotency_redis_key")
 
     redis: Redis = ctx.get("redis") or Redis.from_url(settings.redis_url, decode_responses=True)
 
@@ -62,34 +130,12 @@ async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
         f"(job={job_id}, execution={execution_id})"
     )
 
-    # Read fields from initial status to preserve across updates
-    enqueued_at = None
-    trigger_type_val = None
-    raw = await redis.get(f"{JOB_STATUS_PREFIX}{job_id}")
-    if raw:
-        try:
-            initial = json.loads(raw)
-            enqueued_at = initial.get("enqueued_at")
-            trigger_type_val = initial.get("trigger_type")
-        except (json.JSONDecodeError, TypeError):
-            pass
-
-    # Common fields preserved across status updates
-    fn_label = f"{function_namespace}/{function_name}"
-    base_fields = {
-        "execution_id": execution_id,
-        "queue": "functions",
-        "function": fn_label,
-        "trigger_type": trigger_type_val,
-        "enqueued_at": enqueued_at,
-    }
-
-    # Update status to running
-    await redis.set(
-        f"{JOB_STATUS_PREFIX}{job_id}",
-        json.dumps({**base_fields, "status": "running"}),
-        ex=JOB_TTL,
-    )
+    # Update status to running (fields set at enqueue time are kept in the job hash)
+    await job_registry.set_status(job_id, "running", redis=redis)
+    try:
+        await queue_service.record_dequeue(job_id, lane, redis=redis)
+    except Exception as e:
+        logger.debug(f"Failed to record queue wait for job {job_id}: {e}")
 
     try:
         from app.services.execution_engine import executor
@@ -106,38 +152,45 @@ async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
             resume_data=resume_data,
         )
 
+        # Large results are stored once and passed on by reference
+        from app.services.blob_store import blob_store
+
+        result_ref = await blob_store.offload(result)
+
         # Store result
         await redis.set(
             f"{JOB_RESULT_PREFIX}{job_id}",
-            json.dumps(result, default=str),
+            json.dumps(result_ref, default=str),
             ex=JOB_TTL,
         )
 
         # Update status to completed
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "completed"}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "completed", redis=redis)
 
         # Notify waiters via pub/sub
         await redis.publish(
             f"{JOB_DONE_CHANNEL_PREFIX}{execution_id}",
-            json.dumps({"status": "completed", "result": result}, default=str),
+            json.dumps({"status": "completed", "result": result_ref}, default=str),
         )
 
+        if idempotency_redis_key:
+            await _finish_idempotency(idempotency_redis_key, execution_id, result_ref)
+
+        if callback_url:
+            _spawn_callback(
+                ctx,
+                callback_url,
+                {"execution_id": execution_id, "status": "completed", "result": result},
+            )
+
         logger.info(f"Function job {job_id} completed successfully")
-        return result
+        return result_ref
 
     except Exception as e:
         logger.error(f"Function job {job_id} failed: {e}")
 
         # Update status to failed
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({**base_fields, "status": "failed", "error": str(e)}),
-            ex=JOB_TTL,
-        )
+        await job_registry.set_status(job_id, "failed", redis=redis, error=str(e))
 
         # Notify waiters of failure
         await redis.publish(
@@ -149,9 +202,8 @@ async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
         job_try = ctx.get("job_try", 1)
         if job_try >= settings.queue_max_retries:
             # Push to dead letter queue (include full kwargs for retry)
-            await redis.lpush(
-                DLQ_KEY,
-                json.dumps({
+            await queue_service.push_dlq_entry(
+                {
                     "job_id": job_id,
                     "function": f"{function_namespace}/{function_name}",
                     "function_namespace": function_namespace,
@@ -162,15 +214,57 @@ async def execute_function_job(ctx: dict, **kwargs: Any) -> Any:
                     "trigger_id": trigger_id,
                     "user_id": user_id,
                     "chat_id": chat_id,
+                    "callback_url": callback_url,
+                    "lane": lane,
                     "error": str(e),
                     "attempts": job_try,
-                }, default=str),
+                },
+                redis=redis,
             )
             logger.warning(f"Job {job_id} moved to DLQ after {job_try} attempts")
 
+            # Free the idempotency key so the client can retry
+            if idempotency_redis_key:
+                await _finish_idempotency(idempotency_redis_key, execution_id, failed=True)
+
+            # Only report failure once retries are exhausted
+            if callback_url:
+                _spawn_callback(
+                    ctx,
+                    callback_url,
+                    {"execution_id": execution_id, "status": "failed", "error": str(e)},
+                )
+
         raise  # Re-raise for arq retry
 
 
+async def cleanup_blobs_job(ctx: dict) -> None:
+    """Remove payload blobs that have not been used within settings.blob_ttl."""
+    from app.services.blob_store import blob_store
+
+    await blob_store.cleanup()
+
+
+async def retry_dlq_jobs_job(
+    ctx: dict,
+    retry_id: str,
+    function: Optional[str],
+    signature: Optional[str],
+    limit: int,
+    rate: float,
+) -> None:
+    """Run a rate-limited bulk DLQ retry started from the API."""
+    try:
+        await queue_service.retry_dlq_jobs(
+            function=function, signature=signature, limit=limit, rate=rate, retry_id=retry_id
+        )
+    except Exception as e:
+        logger.error(f"Bulk DLQ retry {retry_id} failed: {e}")
+        await queue_service._set_bulk_retry(
+            retry_id, status="failed", error=str(e), finished_at=time.time()
+        )
+
+
 async def function_worker_startup(ctx: dict) -> None:
     """arq startup hook for function workers.
 
@@ -213,10 +307,26 @@ async def function_worker_startup(ctx: dict) -> None:
         "started_at": time.time(),
         "last_heartbeat": time.time(),
     }
+
+    def container_stats() -> dict:
+        # Read by the autoscaler
+        return {
+            "busy_containers": list(container_pool.in_use)
+            + shared_worker_manager.busy_containers(),
+            "shared_in_flight": sum(shared_worker_manager.in_flight.values()),
+        }
+
     ctx["_heartbeat_task"] = asyncio.create_task(
-        _heartbeat_loop(ctx["redis"], worker_id, heartbeat_data)
+        _heartbeat_loop(ctx["redis"], worker_id, heartbeat_data, container_stats)
     )
 
+    # Keep in-process caches (database connection descriptors, ...) fresh
+    from app.core.invalidation import invalidation_listener
+    from app.services.autoscaler import CONTAINERS_RESOURCE, sync_containers
+
+    invalidation_listener.register(CONTAINERS_RESOURCE, sync_containers)
+    invalidation_listener.start()
+
     logger.info(f"Function worker started (id={worker_id})")
 
 
@@ -248,6 +358,11 @@ async def agent_worker_startup(ctx: dict) -> None:
         _heartbeat_loop(ctx["redis"], worker_id, heartbeat_data)
     )
 
+    # Keep in-process caches (database connection descriptors, ...) fresh
+    from app.core.invalidation import invalidation_listener
+
+    invalidation_listener.start()
+
     logger.info(f"Agent worker started (id={worker_id})")
 
 
@@ -258,6 +373,21 @@ async def shutdown(ctx: dict) -> None:
     if task:
         task.cancel()
 
+    # Give in-flight callbacks a chance to finish
+    callbacks = ctx.get("_callback_tasks")
+    if callbacks:
+        _, pending = await asyncio.wait(callbacks, timeout=CALLBACK_DRAIN_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"Dropped {len(pending)} undelivered callbacks on shutdown")
+
+    from app.core.invalidation import invalidation_listener
+    from app.services.database_pool import DatabasePoolManager
+
+    await invalidation_listener.stop()
+    await DatabasePoolManager.get_instance().close_all()
+
     # Remove heartbeat key
     redis = ctx.get("redis")
     worker_id = ctx.get("worker_id")
@@ -275,31 +405,44 @@ class WorkerSettings:
     """arq worker settings for function execution."""
 
     functions = [execute_function_job]
+    cron_jobs = [cron(cleanup_blobs_job, minute=15)]
     on_startup = function_worker_startup
     on_shutdown = shutdown
     redis_settings = get_redis_settings()
-    queue_name = "sinas:queue:functions"
+    queue_name = FUNCTION_QUEUE  # shared by all priority lanes (see QUEUE_LANES)
     max_jobs = settings.queue_function_concurrency
     job_timeout = settings.queue_default_timeout
     max_tries = settings.queue_max_retries
     retry_delay = settings.queue_retry_delay
 
 
+class MaintenanceWorkerSettings:
+    """arq worker settings for bulk jobs; run inside the scheduler service, not as a process."""
+
+    functions = [func(retry_dlq_jobs_job, timeout=DLQ_BULK_RETRY_MAX_SECONDS + 60, max_tries=1)]
+    redis_settings = get_redis_settings()
+    queue_name = MAINTENANCE_QUEUE  # kept off FUNCTION_QUEUE so bulk jobs never hold a function slot
+    max_jobs = MAINTENANCE_MAX_JOBS
+
+
 # Import agent jobs for combined worker
 from app.queue.agent_jobs import (
+    dispatch_agent_jobs_job,
     execute_agent_message_job,
     execute_agent_resume_job,
 )
+from app.services.agent_dispatcher import AGENT_JOB_TIMEOUT, AGENT_QUEUE
 
 
 class AgentWorkerSettings:
     """arq worker settings for agent message processing."""
 
     functions = [execute_agent_message_job, execute_agent_resume_job]
+    cron_jobs = [cron(dispatch_agent_jobs_job, second={0, 15, 30, 45}, unique=True)]
     on_startup = agent_worker_startup
     on_shutdown = shutdown
     redis_settings = get_redis_settings()
-    queue_name = "sinas:queue:agents"
+    queue_name = AGENT_QUEUE  # fed by agent_dispatcher
     max_jobs = settings.queue_agent_concurrency
-    job_timeout = 600  # 10 minutes for long conversations
+    job_timeout = AGENT_JOB_TIMEOUT  # 10 minutes for long conversations
     max_tries = 1  # No retry for agent conversations (side effects)
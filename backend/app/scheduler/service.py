@@ -6,6 +6,7 @@ can be a pure stateless API server.  Handles:
   - Container pool initialization
   - Shared worker management
   - APScheduler cron jobs
+  - The maintenance queue (bulk DLQ retries)
 """
 
 import asyncio
@@ -168,6 +169,21 @@ async def main() -> None:
     stop_event = asyncio.Event()
     listener_task = asyncio.create_task(_listen_for_job_changes(stop_event))
 
+    # --- Maintenance queue (bulk jobs kept off the function workers) ---
+    from arq.worker import create_worker
+
+    from app.queue.worker import MaintenanceWorkerSettings
+
+    maintenance_worker = create_worker(MaintenanceWorkerSettings, handle_signals=False)
+    maintenance_task = asyncio.create_task(maintenance_worker.async_run())
+
+    # --- Autoscaler ---
+    autoscaler_task = None
+    if settings.autoscale_enabled:
+        from app.services.autoscaler import autoscaler
+
+        autoscaler_task = asyncio.create_task(autoscaler.run(stop_event))
+
     print("🚀 Scheduler service running — press Ctrl+C or send SIGTERM to stop")
 
     # Block until shutdown signal
@@ -183,6 +199,18 @@ async def main() -> None:
         await listener_task
     except asyncio.CancelledError:
         pass
+    if autoscaler_task is not None:
+        autoscaler_task.cancel()
+        try:
+            await autoscaler_task
+        except asyncio.CancelledError:
+            pass
+    maintenance_task.cancel()
+    try:
+        await maintenance_task
+    except asyncio.CancelledError:
+        pass
+    await maintenance_worker.close()
     await scheduler.stop()
     await container_pool.shutdown()
     await close_redis()
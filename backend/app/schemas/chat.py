@@ -29,6 +29,8 @@ class ChatResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     last_message_at: Optional[datetime] = None  # Timestamp of last message
+    message_count: int = 0
+    last_message_preview: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -137,6 +139,8 @@ class MessageSendRequest(BaseModel):
 
 class ChatWithMessages(ChatResponse):
     messages: list[MessageResponse]
+    # Cursor for loading the previous page of messages (pass as `before`), None if complete
+    messages_cursor: Optional[str] = None
 
 
 class ToolApprovalRequest(BaseModel):
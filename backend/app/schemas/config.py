@@ -1,7 +1,7 @@
 """
 Pydantic schemas for declarative configuration
 """
-from typing import Any, Optional, Union
+from typing import Any, Literal, Optional, Union
 
 from pydantic import BaseModel, Field, validator
 
@@ -85,6 +85,9 @@ class QueryConfig(BaseModel):
     outputSchema: Optional[dict[str, Any]] = None
     timeoutMs: int = 5000
     maxRows: int = 1000
+    cacheTtl: Optional[int] = None  # Seconds; enables the result cache for reads
+    cacheMaxBytes: int = 1_000_000
+    cacheTags: list[str] = Field(default_factory=list)
 
 
 class FunctionConfig(BaseModel):
@@ -99,6 +102,11 @@ class FunctionConfig(BaseModel):
     requirements: list[str] = Field(default_factory=list)
     enabledNamespaces: list[str] = Field(default_factory=list)
     tags: list[str] = Field(default_factory=list)
+    cacheTtl: Optional[int] = None  # Seconds; enables the result cache
+    cacheKeyFields: Optional[list[str]] = None  # Default: the whole input
+    cacheShared: bool = False  # Share cached results across users
+    cacheMaxBytes: int = 1_000_000
+    queueLane: Optional[Literal["interactive", "default", "batch"]] = None  # Default: by trigger
 
 
 class SkillConfig(BaseModel):
@@ -22,6 +22,7 @@ class ExecutionResponse(BaseModel):
     started_at: datetime
     completed_at: Optional[datetime]
     duration_ms: Optional[int]
+    cached: bool = False
 
     class Config:
         from_attributes = True
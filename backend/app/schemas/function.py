@@ -3,7 +3,7 @@ import ast
 import json
 import uuid
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field, validator
 
@@ -28,6 +28,23 @@ class FunctionCreate(BaseModel):
     requires_approval: bool = Field(
         default=False, description="Require user approval before execution"
     )
+    reuse_module_state: bool = Field(
+        default=False,
+        description="Keep module-level state between calls in the same container",
+    )
+    cache_ttl: Optional[int] = Field(
+        None, ge=1, description="Cache results for this many seconds (deterministic functions only)"
+    )
+    cache_key_fields: Optional[list[str]] = Field(
+        None, description="Input fields the cached result depends on (default: the whole input)"
+    )
+    cache_shared: bool = Field(
+        default=False, description="Share cached results across users (default: per user)"
+    )
+    cache_max_bytes: int = Field(1_000_000, ge=1)
+    queue_lane: Optional[Literal["interactive", "default", "batch"]] = Field(
+        None, description="Function queue priority lane (default: chosen by trigger type)"
+    )
 
     @validator("code")
     def validate_code(cls, v):
@@ -67,6 +84,13 @@ class FunctionUpdate(BaseModel):
     enabled_namespaces: Optional[list[str]] = None
     shared_pool: Optional[bool] = None
     requires_approval: Optional[bool] = None
+    reuse_module_state: Optional[bool] = None
+    cache_ttl: Optional[int] = Field(None, ge=0)  # 0 disables caching
+    cache_key_fields: Optional[list[str]] = None  # [] resets to the whole input
+    cache_shared: Optional[bool] = None
+    cache_max_bytes: Optional[int] = Field(None, ge=1)
+    # "" resets to choosing the lane by trigger type
+    queue_lane: Optional[Literal["interactive", "default", "batch", ""]] = None
     is_active: Optional[bool] = None
 
     @validator("code")
@@ -104,6 +128,12 @@ class FunctionResponse(BaseModel):
     enabled_namespaces: list[str]
     shared_pool: bool
     requires_approval: bool
+    reuse_module_state: bool
+    cache_ttl: Optional[int]
+    cache_key_fields: Optional[list[str]]
+    cache_shared: bool = False
+    cache_max_bytes: int
+    queue_lane: Optional[str] = None
     is_active: bool
     created_at: datetime
     updated_at: datetime
@@ -124,3 +154,14 @@ class FunctionVersionResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class FunctionCacheStatsResponse(BaseModel):
+    enabled: bool
+    ttl: Optional[int]
+    key_fields: Optional[list[str]]
+    shared: bool
+    hits: int
+    misses: int
+    oversize: int
+    hit_rate: float
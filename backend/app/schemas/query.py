@@ -1,7 +1,7 @@
 """Query schemas."""
 import uuid
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -19,6 +19,9 @@ class QueryCreate(BaseModel):
     output_schema: Optional[dict[str, Any]] = None
     timeout_ms: int = 5000
     max_rows: int = 1000
+    cache_ttl: Optional[int] = Field(None, ge=1)  # seconds, read queries only
+    cache_max_bytes: int = Field(1_000_000, ge=1)
+    cache_tags: list[str] = Field(default_factory=list)
 
 
 class QueryUpdate(BaseModel):
@@ -36,6 +39,9 @@ class QueryUpdate(BaseModel):
     output_schema: Optional[dict[str, Any]] = None
     timeout_ms: Optional[int] = None
     max_rows: Optional[int] = None
+    cache_ttl: Optional[int] = Field(None, ge=0)  # 0 disables caching
+    cache_max_bytes: Optional[int] = Field(None, ge=1)
+    cache_tags: Optional[list[str]] = None
     is_active: Optional[bool] = None
 
 
@@ -52,6 +58,9 @@ class QueryResponse(BaseModel):
     output_schema: dict[str, Any]
     timeout_ms: int
     max_rows: int
+    cache_ttl: Optional[int]
+    cache_max_bytes: int
+    cache_tags: list[str]
     is_active: bool
     created_at: datetime
     updated_at: Optional[datetime]
@@ -62,6 +71,9 @@ class QueryResponse(BaseModel):
 
 class QueryExecuteRequest(BaseModel):
     input: dict[str, Any] = Field(default_factory=dict)
+    # "ndjson" / "columnar" stream a read query in chunks instead of one JSON body
+    format: Literal["json", "ndjson", "columnar"] = "json"
+    chunk_size: int = Field(500, ge=1, le=10000)
 
 
 class QueryExecuteResponse(BaseModel):
@@ -69,5 +81,49 @@ class QueryExecuteResponse(BaseModel):
     operation: str
     data: Optional[list[dict[str, Any]]] = None  # rows for reads
     row_count: Optional[int] = None
+    truncated: Optional[bool] = None  # more rows than max_rows
     affected_rows: Optional[int] = None  # for writes
     duration_ms: int
+    cached: bool = False
+
+
+class QueryBatchItem(BaseModel):
+    namespace: str
+    name: str
+    input: dict[str, Any] = Field(default_factory=dict)
+
+
+class QueryBatchExecuteRequest(BaseModel):
+    queries: list[QueryBatchItem] = Field(..., min_length=1, max_length=50)
+    # Run the reads of each database connection in one read-only snapshot
+    snapshot: bool = False
+
+
+class QueryBatchItemResult(BaseModel):
+    namespace: str
+    name: str
+    success: bool
+    operation: Optional[str] = None
+    data: Optional[list[dict[str, Any]]] = None
+    row_count: Optional[int] = None
+    truncated: Optional[bool] = None
+    affected_rows: Optional[int] = None
+    cached: bool = False
+    error: Optional[str] = None
+
+
+class QueryBatchExecuteResponse(BaseModel):
+    results: list[QueryBatchItemResult]
+    duration_ms: int
+
+
+class QueryCacheStatsResponse(BaseModel):
+    enabled: bool
+    ttl: Optional[int]
+    tags: list[str]
+    memory_hits: int
+    redis_hits: int
+    misses: int
+    oversize: int
+    invalidations: int
+    hit_rate: float
@@ -42,3 +42,38 @@ class StateResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class StateBulkGetRequest(BaseModel):
+    namespace: str = Field(..., min_length=1, max_length=100)
+    keys: list[str] = Field(..., min_length=1, max_length=500)
+
+
+class StateBulkGetResponse(BaseModel):
+    states: list[StateResponse]
+    missing: list[str]
+
+
+class StateBulkItem(BaseModel):
+    key: str = Field(..., min_length=1, max_length=255)
+    value: dict[str, Any] = Field(...)
+    visibility: Optional[str] = Field(None, pattern=r"^(private|shared)$")
+    description: Optional[str] = None
+    tags: Optional[list[str]] = None
+    relevance_score: Optional[float] = Field(None, ge=0.0, le=1.0)
+    expires_at: Optional[datetime] = None
+
+
+class StateBulkSetRequest(BaseModel):
+    namespace: str = Field(..., min_length=1, max_length=100)
+    items: list[StateBulkItem] = Field(..., min_length=1, max_length=500)
+
+
+class StateBulkDeleteRequest(BaseModel):
+    namespace: str = Field(..., min_length=1, max_length=100)
+    keys: list[str] = Field(..., min_length=1, max_length=500)
+
+
+class StateBulkDeleteResponse(BaseModel):
+    deleted: list[str]
+    missing: list[str]
@@ -1,7 +1,7 @@
 """Webhook schemas."""
 import uuid
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -9,7 +9,8 @@ from app.models.webhook import HTTPMethod
 
 
 class WebhookCreate(BaseModel):
-    path: str = Field(..., min_length=1, max_length=255, pattern=r"^[a-zA-Z0-9_/-]+$")
+    # Segments may be templated as {param}; matched values are added to the function input
+    path: str = Field(..., min_length=1, max_length=255, pattern=r"^[a-zA-Z0-9_/{}-]+$")
     function_namespace: str = Field(
         default="default", min_length=1, max_length=255, pattern=r"^[a-zA-Z_][a-zA-Z0-9_]*$"
     )
@@ -18,6 +19,10 @@ class WebhookCreate(BaseModel):
     description: Optional[str] = None
     default_values: Optional[dict[str, Any]] = None
     requires_auth: bool = True
+    response_mode: Literal["sync", "async"] = "sync"
+    callback_url: Optional[str] = Field(None, max_length=2048, pattern=r"^https?://")
+    # Jinja expression deriving an idempotency key, e.g. "{{ body.order_id }}"
+    idempotency_key: Optional[str] = Field(None, max_length=1024)
 
 
 class WebhookUpdate(BaseModel):
@@ -28,6 +33,11 @@ class WebhookUpdate(BaseModel):
     default_values: Optional[dict[str, Any]] = None
     is_active: Optional[bool] = None
     requires_auth: Optional[bool] = None
+    response_mode: Optional[Literal["sync", "async"]] = None
+    # Empty string removes the callback
+    callback_url: Optional[str] = Field(None, max_length=2048, pattern=r"^(https?://.*)?$")
+    # Empty string removes the idempotency key expression
+    idempotency_key: Optional[str] = Field(None, max_length=1024)
 
 
 class WebhookResponse(BaseModel):
@@ -40,6 +50,9 @@ class WebhookResponse(BaseModel):
     default_values: Optional[dict[str, Any]]
     is_active: bool
     requires_auth: bool
+    response_mode: str
+    callback_url: Optional[str]
+    idempotency_key: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,292 @@
+"""Fair dispatching of agent jobs across users.
+
+Agent jobs are not put on the arq queue (sinas:queue:agents) directly. Each
+user (tenant) gets a FIFO sub-queue, and a dispatcher admits jobs into arq
+round-robin across the users that have work waiting:
+
+- sinas:agentq:pending:{tenant}       list of job_ids waiting for admission
+- sinas:agentq:tenants                ring of tenants with pending jobs
+- sinas:agentq:job:{job_id}           hash: tenant, agent, arq function, kwargs
+- sinas:agentq:dispatched             zset of admitted, unfinished jobs
+- sinas:agentq:running:user:{tenant}  zset of a tenant's admitted jobs
+- sinas:agentq:running:agent:{agent}  zset of an agent's admitted jobs
+
+The admitted sets are scored by a lease expiry, so a job lost with a crashed
+worker frees its slots once the lease runs out. A job is admitted while
+fewer than settings.agent_dispatch_window jobs are in flight and its user
+and agent are below their concurrency caps; a tenant whose head job is
+capped is skipped for that round. Dispatch runs on enqueue, when a job
+finishes, and periodically from the agent worker.
+
+Sub-agent jobs enqueued by a job that is already running were admitted
+through their parent, and go straight to arq: queuing them behind their
+parent's caps would deadlock.
+"""
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis import get_arq_pool, get_redis
+from app.services.job_registry import JOB_TTL
+
+logger = logging.getLogger(__name__)
+
+AGENT_QUEUE = "sinas:queue:agents"
+AGENT_JOB_TIMEOUT = 600  # seconds; arq job_timeout of the agent worker
+DISPATCH_PREFIX = "sinas:agentq:"
+TENANT_RING_KEY = f"{DISPATCH_PREFIX}tenants"
+DISPATCHED_KEY = f"{DISPATCH_PREFIX}dispatched"
+AVG_DURATION_KEY = f"{DISPATCH_PREFIX}avg_duration"
+LEASE_GRACE = 60  # seconds an admission outlives the job timeout
+DURATION_EWMA_ALPHA = 0.2
+DEFAULT_JOB_DURATION = 30.0  # seconds, until durations have been observed
+
+# Agent job currently running in this task (set by the agent worker)
+current_agent_job: ContextVar[Optional[str]] = ContextVar("current_agent_job", default=None)
+
+# Append a job to its tenant's sub-queue, adding the tenant to the ring if it was idle.
+# KEYS: [tenant queue, tenant ring]   ARGV: [job_id, tenant]
+_SUBMIT_SCRIPT = """
+if redis.call('RPUSH', KEYS[1], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+end
+return 1
+"""
+
+# Admit jobs round-robin across tenants until the window is full or a whole
+# round admits nothing. Returns the admitted job ids.
+# KEYS: [tenant ring, dispatched set]
+# ARGV: [key prefix, now, lease expiry, window, per-user cap, per-agent cap]
+_DISPATCH_SCRIPT = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local lease = tonumber(ARGV[3])
+local window = tonumber(ARGV[4])
+local user_cap = tonumber(ARGV[5])
+local agent_cap = tonumber(ARGV[6])
+
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local inflight = redis.call('ZCARD', KEYS[2])
+local admitted = {}
+local tenants = redis.call('LLEN', KEYS[1])
+local skipped = 0
+
+while inflight < window and tenants > 0 and skipped < tenants do
+    local tenant = redis.call('LPOP', KEYS[1])
+    local queue = prefix .. 'pending:' .. tenant
+    local job_id = redis.call('LINDEX', queue, 0)
+    if job_id then
+        local user_key = prefix .. 'running:user:' .. tenant
+        redis.call('ZREMRANGEBYSCORE', user_key, '-inf', now)
+        local ok = user_cap <= 0 or redis.call('ZCARD', user_key) < user_cap
+
+        local agent = redis.call('HGET', prefix .. 'job:' .. job_id, 'agent') or ''
+        local agent_key = prefix .. 'running:agent:' .. agent
+        if ok and agent_cap > 0 and agent ~= '' then
+            redis.call('ZREMRANGEBYSCORE', agent_key, '-inf', now)
+            ok = redis.call('ZCARD', agent_key) < agent_cap
+        end
+
+        if ok then
+            redis.call('LPOP', queue)
+            redis.call('ZADD', user_key, lease, job_id)
+            redis.call('EXPIRE', user_key, math.ceil(lease - now))
+            if agent ~= '' then
+                redis.call('ZADD', agent_key, lease, job_id)
+                redis.call('EXPIRE', agent_key, math.ceil(lease - now))
+            end
+            redis.call('ZADD', KEYS[2], lease, job_id)
+            redis.call('HSET', prefix .. 'job:' .. job_id, 'dispatched_at', ARGV[2])
+            table.insert(admitted, job_id)
+            inflight = inflight + 1
+            skipped = 0
+        else
+            skipped = skipped + 1
+        end
+    end
+
+    if redis.call('LLEN', queue) > 0 then
+        redis.call('RPUSH', KEYS[1], tenant)
+    else
+        tenants = tenants - 1
+    end
+end
+return admitted
+"""
+
+
+class AgentDispatcher:
+    """Per-tenant sub-queues with round-robin admission into the agent arq queue."""
+
+    def __init__(self):
+        self._submit_script = None
+        self._dispatch_script = None
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{DISPATCH_PREFIX}job:{job_id}"
+
+    def _pending_key(self, tenant: str) -> str:
+        return f"{DISPATCH_PREFIX}pending:{tenant}"
+
+    async def submit(
+        self,
+        job_id: str,
+        tenant: str,
+        agent: Optional[str],
+        function: str,
+        kwargs: dict[str, Any],
+    ) -> None:
+        """Queue an agent job for fair admission (or run it now if nested in a running job)."""
+        if current_agent_job.get() is not None:
+            pool = await get_arq_pool()
+            await pool.enqueue_job(function, **kwargs, _job_id=job_id, _queue_name=AGENT_QUEUE)
+            return
+
+        redis = await get_redis()
+        if self._submit_script is None:
+            self._submit_script = redis.register_script(_SUBMIT_SCRIPT)
+
+        job_key = self._job_key(job_id)
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                job_key,
+                mapping={
+                    "tenant": tenant,
+                    "agent": agent or "",
+                    "function": function,
+                    "kwargs": json.dumps(kwargs, default=str),
+                },
+            )
+            pipe.expire(job_key, JOB_TTL)
+            await pipe.execute()
+        await self._submit_script(
+            keys=[self._pending_key(tenant), TENANT_RING_KEY], args=[job_id, tenant], client=redis
+        )
+
+        await self.dispatch()
+
+    async def dispatch(self) -> int:
+        """Admit waiting jobs into the arq queue. Returns the number admitted."""
+        redis = await get_redis()
+        if self._dispatch_script is None:
+            self._dispatch_script = redis.register_script(_DISPATCH_SCRIPT)
+
+        now = time.time()
+        admitted = await self._dispatch_script(
+            keys=[TENANT_RING_KEY, DISPATCHED_KEY],
+            args=[
+                DISPATCH_PREFIX,
+                now,
+                now + AGENT_JOB_TIMEOUT + LEASE_GRACE,
+                settings.agent_dispatch_window,
+                settings.agent_max_concurrent_per_user,
+                settings.agent_max_concurrent_per_agent,
+            ],
+            client=redis,
+        )
+        if not admitted:
+            return 0
+
+        pool = await get_arq_pool()
+        for job_id in admitted:
+            job = await redis.hgetall(self._job_key(job_id))
+            try:
+                await pool.enqueue_job(
+                    job["function"],
+                    **json.loads(job["kwargs"]),
+                    _job_id=job_id,
+                    _queue_name=AGENT_QUEUE,
+                )
+            except Exception as e:
+                logger.error(f"Failed to enqueue admitted agent job {job_id}: {e}")
+                from app.services.job_registry import job_registry
+
+                await job_registry.set_status(job_id, "failed", redis=redis, error=str(e))
+                await self.release(job_id, dispatch=False)
+        logger.debug(f"Admitted {len(admitted)} agent jobs")
+        return len(admitted)
+
+    async def release(self, job_id: str, dispatch: bool = True) -> None:
+        """Free a finished job's slots, record its duration and admit the next jobs."""
+        redis = await get_redis()
+        job = await redis.hgetall(self._job_key(job_id))
+        if not job:
+            return
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zrem(DISPATCHED_KEY, job_id)
+            pipe.zrem(f"{DISPATCH_PREFIX}running:user:{job['tenant']}", job_id)
+            if job.get("agent"):
+                pipe.zrem(f"{DISPATCH_PREFIX}running:agent:{job['agent']}", job_id)
+            pipe.delete(self._job_key(job_id))
+            await pipe.execute()
+
+        if job.get("dispatched_at"):
+            duration = time.time() - float(job["dispatched_at"])
+            previous = await redis.get(AVG_DURATION_KEY)
+            average = (
+                duration
+                if previous is None
+                else DURATION_EWMA_ALPHA * duration
+                + (1 - DURATION_EWMA_ALPHA) * float(previous)
+            )
+            await redis.set(AVG_DURATION_KEY, round(average, 3))
+
+        if dispatch:
+            await self.dispatch()
+
+    async def position(self, job_id: str) -> Optional[dict[str, Any]]:
+        """
+        Queue position and estimated wait of a job waiting for admission.
+
+        The position counts the jobs admitted before it under round-robin
+        (earlier jobs of its own tenant, up to as many of every other
+        tenant's, and admitted jobs no worker has picked up yet). Returns
+        None once the job has been admitted.
+        """
+        redis = await get_redis()
+        tenant = await redis.hget(self._job_key(job_id), "tenant")
+        if tenant is None:
+            return None
+        own = await redis.lpos(self._pending_key(tenant), job_id)
+        if own is None:
+            return None
+
+        others = [t for t in await redis.lrange(TENANT_RING_KEY, 0, -1) if t != tenant]
+        async with redis.pipeline(transaction=False) as pipe:
+            for other in others:
+                pipe.llen(self._pending_key(other))
+            pipe.zcard(AGENT_QUEUE)
+            pipe.get(AVG_DURATION_KEY)
+            *lengths, backlog, average = await pipe.execute()
+
+        ahead = own + sum(min(length, own + 1) for length in lengths) + backlog
+        average = float(average) if average is not None else DEFAULT_JOB_DURATION
+        window = max(1, settings.agent_dispatch_window)
+        return {
+            "queue_position": ahead + 1,
+            "estimated_wait_seconds": round((ahead + 1) / window * average, 1),
+        }
+
+    async def get_stats(self) -> dict[str, Any]:
+        """Tenants waiting, jobs waiting for admission and jobs in flight."""
+        redis = await get_redis()
+        tenants = await redis.lrange(TENANT_RING_KEY, 0, -1)
+        async with redis.pipeline(transaction=False) as pipe:
+            for tenant in tenants:
+                pipe.llen(self._pending_key(tenant))
+            pipe.zcount(DISPATCHED_KEY, time.time(), "+inf")
+            *lengths, inflight = await pipe.execute()
+        return {
+            "tenants_waiting": len(tenants),
+            "waiting": sum(lengths),
+            "in_flight": inflight,
+            "window": settings.agent_dispatch_window,
+        }
+
+
+# Global instance
+agent_dispatcher = AgentDispatcher()
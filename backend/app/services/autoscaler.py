@@ -0,0 +1,366 @@
+"""Queue-driven autoscaling of pool containers and shared workers.
+
+Runs in the scheduler service, which owns both container sets. Every
+settings.autoscale_interval seconds it reads from Redis:
+
+- the function queue backlog (ready jobs) and the interactive lane's p95 wait
+- queue worker heartbeats, which report the pool containers and shared
+  workers each worker is using and its in-flight shared executions
+
+and decides per target (ContainerPool, SharedWorkerManager):
+
+- scale up by up to 50% when utilization is at or above
+  autoscale_up_utilization, or when jobs are backing up (p95 wait above
+  autoscale_wait_target_ms) while the target is in use, for
+  autoscale_up_after consecutive evaluations;
+- scale down by one when utilization is at or below
+  autoscale_down_utilization with no backlog, for autoscale_down_after
+  consecutive evaluations;
+- never within a cooldown of the previous change, never outside its bounds.
+
+Scale-down drains first: retired containers are added to a Redis set and
+announced through the "containers" invalidation event, queue workers stop
+handing them out (sync_containers), and they are removed once no heartbeat
+reports them busy (or after the execution timeout). Queue workers pick up new
+containers through the same event.
+
+arq worker replicas are managed by Docker Compose; when jobs back up while
+containers sit idle the autoscaler records a recommendation instead.
+
+Every decision is logged and kept in sinas:autoscaler:decisions.
+"""
+import asyncio
+import json
+import logging
+import math
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.invalidation import publish_change
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CONTAINERS_RESOURCE = "containers"
+DRAINING_KEY = "sinas:autoscaler:draining"  # hash container name -> drain start
+DECISIONS_KEY = "sinas:autoscaler:decisions"  # list of decision JSON, newest first
+STATUS_KEY = "sinas:autoscaler:status"  # last evaluation (signals and sizes)
+MAX_DECISIONS = 500
+DRAIN_MIN_SECONDS = 30  # lets every queue worker sync before a container goes
+UP_STEP_FRACTION = 0.5
+
+
+@dataclass
+class ScalingState:
+    """Hysteresis counters and cooldown clock of one target."""
+
+    above: int = 0
+    below: int = 0
+    last_scaled_at: float = 0.0
+
+
+@dataclass(frozen=True)
+class Signals:
+    """Inputs of one evaluation."""
+
+    backlog: int
+    wait_p95_ms: float
+    pool_size: int
+    pool_busy: int
+    shared_size: int
+    shared_in_flight: int
+    function_worker_slots: int
+    busy_containers: frozenset[str] = field(default_factory=frozenset)
+
+
+async def get_draining() -> set[str]:
+    """Names of containers being retired."""
+    redis = await get_redis()
+    return set(await redis.hkeys(DRAINING_KEY))
+
+
+async def sync_containers(resource_id: Optional[str], version: int) -> None:
+    """Invalidation handler for queue workers: refresh both container views."""
+    from app.services.container_pool import container_pool
+    from app.services.shared_worker_manager import shared_worker_manager
+
+    draining = await get_draining()
+    await container_pool.sync(draining)
+    await shared_worker_manager.sync(draining)
+
+
+class Autoscaler:
+    """Periodically resizes the container pool and shared workers from queue signals."""
+
+    def __init__(self):
+        self.states = {"pool": ScalingState(), "shared": ScalingState()}
+
+    async def _collect(self) -> Signals:
+        from app.queue.worker import WORKER_HEARTBEAT_PREFIX
+        from app.services.container_pool import container_pool
+        from app.services.queue_service import FUNCTION_QUEUE, queue_service
+        from app.services.shared_worker_manager import shared_worker_manager
+
+        redis = await get_redis()
+        backlog = await redis.zcount(FUNCTION_QUEUE, "-inf", time.time() * 1000)
+        lanes = await queue_service.get_lane_stats(redis)
+
+        busy: set[str] = set()
+        shared_in_flight = 0
+        slots = 0
+        async for key in redis.scan_iter(match=f"{WORKER_HEARTBEAT_PREFIX}*", count=100):
+            raw = await redis.get(key)
+            if not raw:
+                continue
+            heartbeat = json.loads(raw)
+            if heartbeat.get("queue") != "functions":
+                continue
+            slots += heartbeat.get("max_jobs", 0)
+            busy.update(heartbeat.get("busy_containers", []))
+            shared_in_flight += heartbeat.get("shared_in_flight", 0)
+
+        pool_names = {pc.name for pc in container_pool.idle} | set(container_pool.in_use)
+        return Signals(
+            backlog=backlog,
+            wait_p95_ms=lanes["interactive"]["wait_ms"]["p95"],
+            pool_size=len(pool_names),
+            pool_busy=len(busy & pool_names),
+            shared_size=len(shared_worker_manager.workers),
+            shared_in_flight=shared_in_flight,
+            function_worker_slots=slots,
+            busy_containers=frozenset(busy),
+        )
+
+    def _decide(
+        self,
+        target: str,
+        utilization: float,
+        pressure: bool,
+        current: int,
+        minimum: int,
+        maximum: int,
+        now: float,
+    ) -> tuple[int, str]:
+        """Desired size of a target and the reason, applying hysteresis and cooldowns."""
+        state = self.states[target]
+
+        if current < minimum:
+            return minimum, "below minimum size"
+
+        if utilization >= settings.autoscale_up_utilization or pressure:
+            state.above += 1
+            state.below = 0
+        elif utilization <= settings.autoscale_down_utilization:
+            state.below += 1
+            state.above = 0
+        else:
+            state.above = state.below = 0
+
+        since = now - state.last_scaled_at
+        if state.above >= settings.autoscale_up_after and current < maximum:
+            if since < settings.autoscale_up_cooldown:
+                return current, "scale up deferred by cooldown"
+            step = max(1, math.ceil(current * UP_STEP_FRACTION))
+            reason = "queue backlog" if pressure else f"utilization {utilization:.0%}"
+            return min(maximum, current + step), reason
+        if state.below >= settings.autoscale_down_after and current > minimum:
+            if since < settings.autoscale_down_cooldown:
+                return current, "scale down deferred by cooldown"
+            return current - 1, f"utilization {utilization:.0%}"
+        return current, ""
+
+    async def _record(self, decision: dict[str, Any]) -> None:
+        logger.info(
+            f"Autoscaler {decision['target']}: {decision['action']} "
+            f"{decision['previous']} -> {decision['current']} ({decision['reason']})"
+        )
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(DECISIONS_KEY, json.dumps(decision, default=str))
+            pipe.ltrim(DECISIONS_KEY, 0, MAX_DECISIONS - 1)
+            await pipe.execute()
+
+    async def _finish_draining(self, signals: Signals, now: float) -> None:
+        """Remove retired containers that are no longer busy (or have timed out)."""
+        from app.services.container_pool import container_pool
+        from app.services.shared_worker_manager import shared_worker_manager
+
+        redis = await get_redis()
+        draining = await redis.hgetall(DRAINING_KEY)
+        done = [
+            name
+            for name, started in draining.items()
+            if now - float(started) >= DRAIN_MIN_SECONDS
+            and (
+                name not in signals.busy_containers
+                or now - float(started) >= settings.queue_default_timeout + DRAIN_MIN_SECONDS
+            )
+        ]
+        if not done:
+            return
+        await container_pool.retire([n for n in done if n.startswith("sinas-pool-")])
+        await shared_worker_manager.retire([n for n in done if n.startswith("sinas-worker-")])
+        await redis.hdel(DRAINING_KEY, *done)
+
+    async def _drain(self, names: list[str], now: float) -> None:
+        redis = await get_redis()
+        await redis.hset(DRAINING_KEY, mapping={name: now for name in names})
+        await publish_change(CONTAINERS_RESOURCE)
+
+    async def evaluate(self) -> list[dict[str, Any]]:
+        """Run one evaluation. Returns the decisions taken."""
+        from app.core.database import AsyncSessionLocal
+        from app.services.container_pool import container_pool
+        from app.services.shared_worker_manager import shared_worker_manager
+
+        now = time.time()
+        # Queue workers destroy and replace containers (tainted, max executions)
+        # on their own; refresh this process's view before sizing from it.
+        # Draining containers stay in the view so _finish_draining can retire them.
+        await container_pool.sync(set())
+        await shared_worker_manager.sync(set())
+        signals = await self._collect()
+        await self._finish_draining(signals, now)
+        draining = await get_draining()
+
+        pressure = signals.backlog > 0 and signals.wait_p95_ms > settings.autoscale_wait_target_ms
+        pool_utilization = signals.pool_busy / signals.pool_size if signals.pool_size else 1.0
+        shared_capacity = signals.shared_size * settings.autoscale_shared_worker_slots
+        shared_utilization = (
+            signals.shared_in_flight / shared_capacity if shared_capacity else 0.0
+        )
+
+        # Backlog only counts against a target that is actually being used
+        targets = {
+            "pool": (
+                pool_utilization,
+                pressure and pool_utilization > settings.autoscale_down_utilization,
+                signals.pool_size,
+                settings.pool_min_size,
+                settings.pool_max_size,
+            ),
+            "shared": (
+                shared_utilization,
+                pressure and shared_utilization > settings.autoscale_down_utilization,
+                signals.shared_size,
+                settings.autoscale_shared_min,
+                settings.autoscale_shared_max,
+            ),
+        }
+
+        decisions: list[dict[str, Any]] = []
+        for target, (utilization, target_pressure, current, minimum, maximum) in targets.items():
+            desired, reason = self._decide(
+                target, utilization, target_pressure, current, minimum, maximum, now
+            )
+            if desired == current:
+                if reason:
+                    decisions.append(
+                        {"target": target, "action": "hold", "previous": current,
+                         "current": current, "reason": reason}
+                    )
+                continue
+
+            if desired > current:
+                async with AsyncSessionLocal() as db:
+                    if target == "pool":
+                        result = await container_pool.scale(desired, db)
+                        size = result.get("current", current)
+                    else:
+                        result = await shared_worker_manager.scale_workers(desired, db)
+                        size = result.get("current_count", current)
+                await publish_change(CONTAINERS_RESOURCE)
+                action = "scale_up"
+            else:
+                if target == "pool":
+                    candidates = [
+                        pc.name
+                        for pc in reversed(container_pool.idle)
+                        if pc.name not in signals.busy_containers and pc.name not in draining
+                    ]
+                else:
+                    candidates = sorted(
+                        (
+                            info["container_name"]
+                            for info in shared_worker_manager.workers.values()
+                            if info["container_name"] not in draining
+                        ),
+                        key=lambda name: int(name.rsplit("-", 1)[-1]),
+                        reverse=True,
+                    )
+                victims = candidates[: current - desired]
+                if not victims:
+                    continue
+                await self._drain(victims, now)
+                size = current - len(victims)
+                action = "scale_down"
+                reason = f"{reason}; draining {', '.join(victims)}"
+
+            self.states[target] = ScalingState(last_scaled_at=now)
+            decisions.append(
+                {"target": target, "action": action, "previous": current,
+                 "current": size, "reason": reason}
+            )
+
+        # Jobs waiting for arq worker slots while containers sit idle
+        if (
+            pressure
+            and pool_utilization <= settings.autoscale_down_utilization
+            and shared_utilization <= settings.autoscale_down_utilization
+        ):
+            decisions.append(
+                {"target": "function_workers", "action": "recommend_scale_up",
+                 "previous": signals.function_worker_slots,
+                 "current": signals.function_worker_slots,
+                 "reason": "jobs are queuing while containers are idle; "
+                 "add queue-worker replicas or raise QUEUE_FUNCTION_CONCURRENCY"}
+            )
+
+        signal_data = {
+            **asdict(signals),
+            "busy_containers": sorted(signals.busy_containers),
+            "pool_utilization": round(pool_utilization, 3),
+            "shared_utilization": round(shared_utilization, 3),
+        }
+        for decision in decisions:
+            decision.update({"timestamp": now, "signals": signal_data})
+            if decision["action"] != "hold":
+                await self._record(decision)
+
+        redis = await get_redis()
+        await redis.set(
+            STATUS_KEY,
+            json.dumps({"evaluated_at": now, "signals": signal_data, "draining": sorted(draining)}),
+            ex=max(60, settings.autoscale_interval * 4),
+        )
+        return decisions
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        """Evaluate every autoscale_interval seconds until stop_event is set."""
+        logger.info(f"Autoscaler running every {settings.autoscale_interval}s")
+        while not stop_event.is_set():
+            try:
+                await self.evaluate()
+            except Exception as e:
+                logger.error(f"Autoscaler evaluation failed: {e}", exc_info=True)
+            try:
+                await asyncio.wait_for(stop_event.wait(), timeout=settings.autoscale_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def get_status(self, limit: int = 50) -> dict[str, Any]:
+        """Latest evaluation and recent scaling decisions."""
+        redis = await get_redis()
+        status = await redis.get(STATUS_KEY)
+        decisions = await redis.lrange(DECISIONS_KEY, 0, limit - 1)
+        return {
+            "enabled": settings.autoscale_enabled,
+            "last_evaluation": json.loads(status) if status else None,
+            "decisions": [json.loads(d) for d in decisions],
+        }
+
+
+# Global instance
+autoscaler = Autoscaler()
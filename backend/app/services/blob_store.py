@@ -0,0 +1,120 @@
+"""Content-addressed store for large function payloads.
+
+Function inputs and results above settings.blob_inline_threshold are written
+once to a shared directory (settings.blob_storage_path, a Docker volume
+shared by the backend and the queue workers) and replaced by a small
+reference:
+
+    {"$blob": "<sha256 of the JSON encoding>", "size": <bytes>}
+
+arq jobs, Redis job results and completion notifications then carry only
+the reference. Executor containers never see the store: their requests carry
+the resolved input. Blobs are immutable, so writing the
+same payload twice is a no-op; unused blobs are removed after
+settings.blob_ttl by cleanup() (run periodically by the function worker).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BLOB_REF_KEY = "$blob"
+_DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+def is_blob_ref(value: Any) -> bool:
+    return (
+        isinstance(value, dict)
+        and isinstance(value.get(BLOB_REF_KEY), str)
+        and _DIGEST_RE.match(value[BLOB_REF_KEY]) is not None
+    )
+
+
+class BlobStore:
+    """Stores large JSON payloads on a shared volume and passes references."""
+
+    def __init__(self, base_path: str, threshold: int):
+        self.base_path = Path(base_path)
+        self.threshold = threshold
+
+    def _path(self, digest: str) -> Path:
+        return self.base_path / digest[:2] / digest
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if path.exists():
+            # Refresh mtime so cleanup() measures age from the last use
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{digest}.{os.getpid()}.tmp")
+        try:
+            temp_path.write_bytes(data)
+            temp_path.rename(path)
+        except Exception:
+            if temp_path.exists():
+                temp_path.unlink()
+            raise
+
+    async def offload(self, value: Any) -> Any:
+        """
+        Replace a large JSON value by a blob reference.
+
+        Values below the threshold, references and values that cannot be
+        stored are returned unchanged.
+        """
+        if value is None or is_blob_ref(value):
+            return value
+
+        data = json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+        if len(data) < self.threshold:
+            return value
+
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            await asyncio.to_thread(self._write, digest, data)
+        except Exception as e:
+            logger.warning(f"Failed to store blob {digest}, passing payload inline: {e}")
+            return value
+        return {BLOB_REF_KEY: digest, "size": len(data)}
+
+    async def resolve(self, value: Any) -> Any:
+        """Load the value behind a blob reference (other values pass through)."""
+        if not is_blob_ref(value):
+            return value
+        data = await asyncio.to_thread(self._path(value[BLOB_REF_KEY]).read_bytes)
+        return json.loads(data)
+
+    def _cleanup(self, max_age: int) -> int:
+        cutoff = time.time() - max_age
+        removed = 0
+        if not self.base_path.exists():
+            return 0
+        for path in self.base_path.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def cleanup(self, max_age: Optional[int] = None) -> int:
+        """Delete blobs not written or reused within max_age seconds."""
+        removed = await asyncio.to_thread(self._cleanup, max_age or settings.blob_ttl)
+        if removed:
+            logger.info(f"Removed {removed} expired blobs")
+        return removed
+
+
+# Global instance
+blob_store = BlobStore(settings.blob_storage_path, settings.blob_inline_threshold)
@@ -396,6 +396,67 @@ class ClickHouseLogger:
             if settings.debug:
                 print(f"Failed to log function result: {e}")
 
+    async def log_function_steps(self, execution_id: str, steps: list[dict[str, Any]]):
+        """Log the call and result events of several completed steps in one insert."""
+        if not self.client or not steps:
+            return
+
+        rows = []
+        for step in steps:
+            step_id = str(step["id"])
+            rows.append(
+                [
+                    str(uuid.uuid4()),
+                    step["started_at"],
+                    execution_id,
+                    "function_called",
+                    step["function_name"],
+                    step_id,
+                    json.dumps(step["input_data"], default=str) if step["input_data"] else "",
+                    "",  # output_data
+                    "",  # error
+                    0,  # duration_ms
+                    "",  # status
+                ]
+            )
+            rows.append(
+                [
+                    str(uuid.uuid4()),
+                    step["completed_at"],
+                    execution_id,
+                    "function_completed",
+                    step["function_name"],
+                    step_id,
+                    "",  # input_data
+                    json.dumps(step["output_data"], default=str) if step["output_data"] else "",
+                    step["error"] or "",
+                    step["duration_ms"] or 0,
+                    "",  # status
+                ]
+            )
+
+        try:
+            self.client.insert(
+                "execution_logs",
+                rows,
+                column_names=[
+                    "log_id",
+                    "timestamp",
+                    "execution_id",
+                    "event",
+                    "function_name",
+                    "step_id",
+                    "input_data",
+                    "output_data",
+                    "error",
+                    "duration_ms",
+                    "status",
+                ],
+            )
+        except Exception as e:
+            if settings.debug:
+                print(f"Failed to log function steps: {e}")
+
     async def get_execution_logs(self, execution_id: str, limit: int = 1000) -> list:
         """Get logs for a specific execution."""
         if not self.client:
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.file import Collection, File, FileVersion
 from app.services.file_storage import generate_file_data_url, generate_file_url, get_storage
+from app.utils.schema import coerce_types
 
 logger = logging.getLogger(__name__)
 
@@ -203,11 +204,12 @@ class CollectionToolConverter:
             )
         )
 
-        # Apply metadata filters
+        # Apply metadata filters as one JSONB containment (@>), served by the GIN index.
+        # Containment is type-strict, so coerce values to the collection's schema types first.
         metadata_filter = arguments.get("metadata_filter")
-        if metadata_filter:
-            for key, value in metadata_filter.items():
-                query = query.where(File.file_metadata[key].as_string() == str(value))
+        if isinstance(metadata_filter, dict) and metadata_filter:
+            metadata_filter = coerce_types(metadata_filter, collection.metadata_schema)
+            query = query.where(File.file_metadata.contains(metadata_filter))
 
         query = query.order_by(File.name).limit(50)
         result = await db.execute(query)
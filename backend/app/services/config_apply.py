@@ -12,6 +12,7 @@ from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.encryption import EncryptionService
+from app.core.invalidation import publish_change
 from app.models.agent import Agent
 from app.models.app import App
 from app.models.file import Collection
@@ -32,6 +33,16 @@ from app.schemas.config import (
 
 logger = logging.getLogger(__name__)
 
+# Config resource types whose changes are broadcast to in-process caches
+# (config resource type -> invalidation resource name)
+INVALIDATED_RESOURCES = {
+    "webhooks": "webhooks",
+    "databaseConnections": "database_connections",
+    "agents": "agents",
+    "functions": "functions",
+    "collections": "collections",
+}
+
 
 class ConfigApplyService:
     """Service for applying declarative configuration"""
@@ -92,6 +103,18 @@ class ConfigApplyService:
         summary_dict = getattr(self.summary, summary_field)
         summary_dict[resource_type] = summary_dict.get(resource_type, 0) + 1
 
+    async def _publish_invalidations(self):
+        """Notify in-process caches about resource types changed by this apply."""
+        changed = {
+            change.resourceType
+            for change in self.changes
+            if change.action in ("create", "update", "delete")
+        }
+        for resource_type in sorted(changed):
+            resource = INVALIDATED_RESOURCES.get(resource_type)
+            if resource:
+                await publish_change(resource)
+
     async def apply_config(self, config: SinasConfig, dry_run: bool = False) -> ConfigApplyResponse:
         """
         Apply configuration idempotently
@@ -121,6 +144,7 @@ class ConfigApplyService:
 
             if not dry_run:
                 await self.db.commit()
+                await self._publish_invalidations()
 
             return ConfigApplyResponse(
                 success=True,
@@ -511,20 +535,26 @@ class ConfigApplyService:
                 result = await self.db.execute(stmt)
                 existing = result.scalar_one_or_none()
 
-                config_hash = self._calculate_hash(
-                    {
-                        "namespace": query_config.namespace,
-                        "name": query_config.name,
-                        "description": query_config.description,
-                        "connection_name": query_config.connectionName,
-                        "operation": query_config.operation,
-                        "sql": query_config.sql,
-                        "input_schema": query_config.inputSchema,
-                        "output_schema": query_config.outputSchema,
-                        "timeout_ms": query_config.timeoutMs,
-                        "max_rows": query_config.maxRows,
+                hash_data = {
+                    "namespace": query_config.namespace,
+                    "name": query_config.name,
+                    "description": query_config.description,
+                    "connection_name": query_config.connectionName,
+                    "operation": query_config.operation,
+                    "sql": query_config.sql,
+                    "input_schema": query_config.inputSchema,
+                    "output_schema": query_config.outputSchema,
+                    "timeout_ms": query_config.timeoutMs,
+                    "max_rows": query_config.maxRows,
+                }
+                # Only hash cache settings when used, so existing checksums stay valid
+                if query_config.cacheTtl or query_config.cacheTags:
+                    hash_data["cache"] = {
+                        "ttl": query_config.cacheTtl,
+                        "max_bytes": query_config.cacheMaxBytes,
+                        "tags": query_config.cacheTags,
                     }
-                )
+                config_hash = self._calculate_hash(hash_data)
 
                 # Resolve database connection name to ID
                 db_conn_id = self.database_connection_ids.get(query_config.connectionName)
@@ -562,6 +592,9 @@ class ConfigApplyService:
                         existing.output_schema = query_config.outputSchema or {}
                         existing.timeout_ms = query_config.timeoutMs
                         existing.max_rows = query_config.maxRows
+                        existing.cache_ttl = query_config.cacheTtl
+                        existing.cache_max_bytes = query_config.cacheMaxBytes
+                        existing.cache_tags = query_config.cacheTags
                         existing.config_checksum = config_hash
                         existing.updated_at = datetime.utcnow()
 
@@ -606,6 +639,9 @@ class ConfigApplyService:
                             output_schema=query_config.outputSchema or {},
                             timeout_ms=query_config.timeoutMs,
                             max_rows=query_config.maxRows,
+                            cache_ttl=query_config.cacheTtl,
+                            cache_max_bytes=query_config.cacheMaxBytes,
+                            cache_tags=query_config.cacheTags,
                             user_id=member.user_id,
                             is_active=True,
                             managed_by="config",
@@ -629,19 +665,29 @@ class ConfigApplyService:
                 result = await self.db.execute(stmt)
                 existing = result.scalar_one_or_none()
 
-                config_hash = self._calculate_hash(
-                    {
-                        "name": func_config.name,
-                        "description": func_config.description,
-                        "code": func_config.code,
-                        "input_schema": func_config.inputSchema,
-                        "output_schema": func_config.outputSchema,
-                        "requirements": sorted(func_config.requirements)
-                        if func_config.requirements
-                        else [],
-                        "tags": sorted(func_config.tags) if func_config.tags else [],
+                hash_data = {
+                    "name": func_config.name,
+                    "description": func_config.description,
+                    "code": func_config.code,
+                    "input_schema": func_config.inputSchema,
+                    "output_schema": func_config.outputSchema,
+                    "requirements": sorted(func_config.requirements)
+                    if func_config.requirements
+                    else [],
+                    "tags": sorted(func_config.tags) if func_config.tags else [],
+                }
+                # Only hash cache settings when used, so existing checksums stay valid
+                if func_config.cacheTtl:
+                    hash_data["cache"] = {
+                        "ttl": func_config.cacheTtl,
+                        "key_fields": func_config.cacheKeyFields,
+                        "max_bytes": func_config.cacheMaxBytes,
                     }
-                )
+                    if func_config.cacheShared:
+                        hash_data["cache"]["shared"] = True
+                if func_config.queueLane:
+                    hash_data["queue_lane"] = func_config.queueLane
+                config_hash = self._calculate_hash(hash_data)
 
                 if existing:
                     if existing.managed_by != "config":
@@ -665,6 +711,11 @@ class ConfigApplyService:
                         existing.output_schema = func_config.outputSchema
                         existing.requirements = func_config.requirements
                         existing.tags = func_config.tags
+                        existing.cache_ttl = func_config.cacheTtl
+                        existing.cache_key_fields = func_config.cacheKeyFields
+                        existing.cache_shared = func_config.cacheShared
+                        existing.cache_max_bytes = func_config.cacheMaxBytes
+                        existing.queue_lane = func_config.queueLane
                         existing.config_checksum = config_hash
                         existing.updated_at = datetime.utcnow()
 
@@ -712,6 +763,11 @@ class ConfigApplyService:
                             requirements=func_config.requirements,
                             enabled_namespaces=func_config.enabledNamespaces,
                             tags=func_config.tags,
+                            cache_ttl=func_config.cacheTtl,
+                            cache_key_fields=func_config.cacheKeyFields,
+                            cache_shared=func_config.cacheShared,
+                            cache_max_bytes=func_config.cacheMaxBytes,
+                            queue_lane=func_config.queueLane,
                             created_by=member.user_id,
                             group_id=group_id,
                             current_version=1,
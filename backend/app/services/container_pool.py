@@ -10,7 +10,8 @@ import logging
 import re
 import tarfile
 import time
-from collections import deque
+from collections import OrderedDict, deque
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
@@ -20,9 +21,133 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.services.function_cache import FunctionBundle, function_cache
 
 logger = logging.getLogger(__name__)
 
+# Code hashes / bundle versions remembered per container; match
+# CODE_CACHE_MAX_ENTRIES / BUNDLE_CACHE_MAX_ENTRIES in container_executor.py
+# (a stale entry only costs one resend)
+CONTAINER_CODE_CACHE_ENTRIES = 128
+CONTAINER_BUNDLE_CACHE_ENTRIES = 16
+BUNDLE_LOAD_TIMEOUT = 30  # seconds for a bundle's module-level code to load
+
+
+def remember(entries: OrderedDict, key: str, max_entries: int) -> None:
+    """Record key as most recently sent to a container, bounded LRU."""
+    entries[key] = None
+    entries.move_to_end(key)
+    while len(entries) > max_entries:
+        entries.popitem(last=False)
+
+
+# Receives each progress event a (generator) function yields while it runs
+ProgressCallback = Callable[[Any], Awaitable[None]]
+
+
+def _result_wait_script() -> str:
+    """
+    Script run in a container to trigger the pending request.
+
+    It prints one JSON line per progress event the executor appends to
+    /tmp/exec_progress.jsonl while the function runs, then the result line.
+    """
+    return f"""
+import sys, json, time, os
+# Trigger execution (request already written)
+with open("/tmp/exec_trigger", "w") as f:
+    f.write("1")
+offset = 0
+def relay_progress():
+    global offset
+    try:
+        with open("/tmp/exec_progress.jsonl", "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return
+    end = data.rfind(b"\\n") + 1
+    if end:
+        sys.stdout.buffer.write(data[:end])
+        sys.stdout.flush()
+        offset += end
+# Wait for result
+max_wait = {settings.function_timeout}
+start = time.time()
+while time.time() - start < max_wait:
+    relay_progress()
+    try:
+        with open("/tmp/exec_result.json", "r") as f:
+            result = json.load(f)
+    except FileNotFoundError:
+        time.sleep(0.1)
+        continue
+    relay_progress()
+    os.remove("/tmp/exec_result.json")
+    os.remove("/tmp/exec_trigger")
+    print(json.dumps({{"type": "result", "data": result}}))
+    sys.exit(0)
+print(json.dumps({{"type": "error", "error": "Execution timeout"}}))
+sys.exit(1)
+"""
+
+
+async def wait_for_result(
+    container, on_progress: Optional[ProgressCallback] = None
+) -> dict[str, Any]:
+    """
+    Trigger the request written to a container and wait for its result.
+
+    Output is streamed, so progress events reach on_progress while the
+    function is still running.
+    """
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+
+    def pump() -> None:
+        try:
+            output = container.exec_run(
+                cmd=["python3", "-c", _result_wait_script()], stream=True, demux=True
+            ).output
+            for chunk in output:
+                loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+        finally:
+            loop.call_soon_threadsafe(chunks.put_nowait, None)
+
+    pump_task = asyncio.ensure_future(asyncio.to_thread(pump))
+
+    result: Optional[dict[str, Any]] = None
+    error: Optional[str] = None
+    buffer = b""
+    stderr = b""
+    while (chunk := await chunks.get()) is not None:
+        stdout_chunk, stderr_chunk = chunk
+        if stderr_chunk:
+            stderr += stderr_chunk
+        if not stdout_chunk:
+            continue
+        buffer += stdout_chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            message = json.loads(line)
+            if message.get("type") == "progress":
+                if on_progress is not None:
+                    try:
+                        await on_progress(message.get("data"))
+                    except Exception as e:
+                        logger.warning(f"Failed to relay function progress: {e}")
+            elif message.get("type") == "result":
+                result = message.get("data")
+            else:
+                error = message.get("error")
+    await pump_task
+
+    if result is None:
+        raise Exception(f"Execution failed: {stderr.decode() or error or 'Unknown error'}")
+    return result
+
 
 @dataclass
 class PooledContainer:
@@ -32,6 +157,9 @@ class PooledContainer:
     container_id: str
     executions: int = 0
     created_at: float = field(default_factory=time.time)
+    # Function code hashes / namespace bundles this container has loaded
+    code_hashes: OrderedDict[str, None] = field(default_factory=OrderedDict)
+    bundles: OrderedDict[str, None] = field(default_factory=OrderedDict)
 
 
 class ContainerPool:
@@ -46,6 +174,8 @@ class ContainerPool:
         self.client = docker.from_env()
         self.idle: deque[PooledContainer] = deque()
         self.in_use: dict[str, PooledContainer] = {}
+        # Containers the autoscaler is retiring: never handed out again
+        self._draining: set[str] = set()
         self._next_id: int = 1
         self._condition = asyncio.Condition()
         self._initialized = False
@@ -222,6 +352,10 @@ class ContainerPool:
                 return
 
             pc.executions += 1
+            if pc.name in self._draining:
+                # The autoscaler removes it once no worker reports it busy
+                self._condition.notify_all()
+                return
             should_destroy = tainted or pc.executions >= settings.pool_max_executions
 
             if should_destroy:
@@ -267,24 +401,17 @@ class ContainerPool:
         trigger_type: str,
         chat_id: Optional[str],
         db: AsyncSession,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> dict[str, Any]:
         """
         Execute a function in a pooled container.
 
         Same signature as UserContainerManager.execute_function() for
-        drop-in replacement.
+        drop-in replacement. Progress events of generator functions are
+        passed to on_progress as they arrive.
         """
         # Fetch function code
-        from app.models.function import Function
-
-        result = await db.execute(
-            select(Function).where(
-                Function.namespace == function_namespace,
-                Function.name == function_name,
-                Function.is_active == True,
-            )
-        )
-        function = result.scalar_one_or_none()
+        function = await function_cache.get(db, function_namespace, function_name)
 
         if not function:
             return {
@@ -301,18 +428,27 @@ class ContainerPool:
             f"for {function_namespace}/{function_name}"
         )
 
+        # Namespaces this function references, preloaded into the container
+        # (None when its code makes no nested calls)
+        bundle = await function_cache.get_call_bundle(db, user_id, function, enabled_namespaces)
+
         tainted = False
         try:
             container = await asyncio.to_thread(self.client.containers.get, pc.name)
 
-            # Same IPC protocol as the old per-user containers
+            # Same IPC protocol as the old per-user containers. The code is
+            # only sent when this container has not been given it before.
             payload = {
                 "action": "execute_inline",
-                "function_code": function.code,
+                "code_hash": function.code_hash,
+                "function_code": None if function.code_hash in pc.code_hashes else function.code,
+                "reuse_module_state": function.reuse_module_state,
+                "bundle_version": bundle.version if bundle else None,
                 "execution_id": execution_id,
                 "function_namespace": function_namespace,
                 "function_name": function_name,
                 "enabled_namespaces": enabled_namespaces,
+                # Inline: the request file is private to this call, the blob volume is not
                 "input_data": input_data,
                 "context": {
                     "user_id": user_id,
@@ -324,64 +460,28 @@ class ContainerPool:
                 },
             }
 
-            # Write payload to container via tar archive (avoids ARG_MAX limit
-            # that occurs when large payloads like base64 images are embedded
-            # in command-line arguments).
-            payload_bytes = json.dumps(payload).encode("utf-8")
-            tar_buf = io.BytesIO()
-            with tarfile.open(fileobj=tar_buf, mode="w") as tar:
-                info = tarfile.TarInfo(name="exec_request.json")
-                info.size = len(payload_bytes)
-                tar.addfile(info, io.BytesIO(payload_bytes))
-            tar_buf.seek(0)
-            await asyncio.to_thread(container.put_archive, "/tmp", tar_buf)
-
-            exec_start = time.time()
-            exec_result = await asyncio.to_thread(
-                container.exec_run,
-                cmd=[
-                    "python3",
-                    "-c",
-                    f"""
-import sys, json, time, os
-# Trigger execution (request already written via put_archive)
-with open("/tmp/exec_trigger", "w") as f:
-    f.write("1")
-# Wait for result
-max_wait = {settings.function_timeout}
-start = time.time()
-while time.time() - start < max_wait:
-    try:
-        with open("/tmp/exec_result.json", "r") as f:
-            result = json.load(f)
-            os.remove("/tmp/exec_result.json")
-            os.remove("/tmp/exec_trigger")
-            print(json.dumps(result))
-            sys.exit(0)
-    except FileNotFoundError:
-        time.sleep(0.1)
-        continue
-print(json.dumps({{"error": "Execution timeout"}}))
-sys.exit(1)
-""",
-                ],
-                demux=True,
-            )
-            exec_elapsed = time.time() - exec_start
-            logger.info(f"Pool container {pc.name} exec completed in {exec_elapsed:.3f}s")
-
-            stdout, stderr = exec_result.output
-
-            if exec_result.exit_code != 0:
-                error_msg = stderr.decode() if stderr else "Unknown error"
-                raise Exception(f"Execution failed: {error_msg}")
-
-            stdout_str = stdout.decode() if stdout else ""
-            result = json.loads(stdout_str)
+            # A bundle that fails to load only costs the nested calls, the
+            # function itself still runs
+            if bundle and bundle.version not in pc.bundles:
+                if not await self._load_bundle(container, pc, bundle):
+                    payload["bundle_version"] = None
+
+            # The container may have evicted the bundle or the code; resend
+            # whichever it reports missing
+            for _ in range(3):
+                result = await self._run_request(container, pc, payload, on_progress)
+                if result.get("bundle_not_loaded") and payload["bundle_version"]:
+                    if not await self._load_bundle(container, pc, bundle):
+                        payload["bundle_version"] = None
+                elif result.get("code_not_cached"):
+                    payload["function_code"] = function.code
+                else:
+                    break
 
             if "error" in result:
                 raise Exception(result["error"])
 
+            remember(pc.code_hashes, function.code_hash, CONTAINER_CODE_CACHE_ENTRIES)
             return result
 
         except Exception as e:
@@ -391,6 +491,55 @@ sys.exit(1)
         finally:
             await self.release(pc.name, tainted=tainted)
 
+    async def _load_bundle(
+        self, container, pc: PooledContainer, bundle: FunctionBundle
+    ) -> bool:
+        """Precompile a namespace bundle in the container (load_functions action)."""
+        result = await self._run_request(
+            container,
+            pc,
+            {
+                "action": "load_functions",
+                "bundle_version": bundle.version,
+                "functions": bundle.functions,
+                "timeout": BUNDLE_LOAD_TIMEOUT,
+            },
+        )
+        if result.get("status") != "loaded":
+            logger.warning(
+                f"Failed to load function bundle {bundle.version[:12]} in {pc.name}: "
+                f"{result.get('error', result)}"
+            )
+            return False
+        remember(pc.bundles, bundle.version, CONTAINER_BUNDLE_CACHE_ENTRIES)
+        return True
+
+    async def _run_request(
+        self,
+        container,
+        pc: PooledContainer,
+        payload: dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> dict[str, Any]:
+        """Write an execution request to a container and wait for its result."""
+        # Write payload to container via tar archive (avoids ARG_MAX limit
+        # that occurs when large payloads like base64 images are embedded
+        # in command-line arguments).
+        payload_bytes = json.dumps(payload).encode("utf-8")
+        tar_buf = io.BytesIO()
+        with tarfile.open(fileobj=tar_buf, mode="w") as tar:
+            info = tarfile.TarInfo(name="exec_request.json")
+            info.size = len(payload_bytes)
+            tar.addfile(info, io.BytesIO(payload_bytes))
+        tar_buf.seek(0)
+        await asyncio.to_thread(container.put_archive, "/tmp", tar_buf)
+
+        exec_start = time.time()
+        result = await wait_for_result(container, on_progress)
+        exec_elapsed = time.time() - exec_start
+        logger.info(f"Pool container {pc.name} exec completed in {exec_elapsed:.3f}s")
+        return result
+
     # ------------------------------------------------------------------
     # Container lifecycle
     # ------------------------------------------------------------------
@@ -640,6 +789,41 @@ sys.exit(1)
 
         return {"action": "no_change", "current": current}
 
+    async def sync(self, draining: set[str]) -> None:
+        """
+        Refresh this process's view of the pool (queue workers).
+
+        Adds running pool containers created since startup (e.g. by the
+        autoscaler) and drops idle ones that are gone or being retired.
+        """
+        containers = await asyncio.to_thread(
+            self.client.containers.list, filters={"name": "sinas-pool-", "status": "running"}
+        )
+        running = {
+            c.name: c.id for c in containers if re.match(r"^sinas-pool-\d+$", c.name)
+        }
+
+        async with self._condition:
+            self._draining = set(draining)
+            known = {pc.name for pc in self.idle} | set(self.in_use)
+            self.idle = deque(
+                pc for pc in self.idle if pc.name in running and pc.name not in draining
+            )
+            for name, container_id in running.items():
+                if name not in known and name not in draining:
+                    self.idle.append(PooledContainer(name=name, container_id=container_id))
+            self._condition.notify_all()
+
+    async def retire(self, names: list[str]) -> int:
+        """Destroy the given idle containers (autoscaler scale-down). Returns the number removed."""
+        removed = 0
+        async with self._condition:
+            for pc in [pc for pc in self.idle if pc.name in names]:
+                self.idle.remove(pc)
+                await self._destroy_container(pc)
+                removed += 1
+        return removed
+
     async def reload_packages(self, db: AsyncSession) -> dict[str, Any]:
         """Reinstall all approved packages in every idle container."""
         if not self.idle:
@@ -1,30 +1,249 @@
 """Database connection pool manager for external database queries."""
+import asyncio
 import datetime
+import functools
 import hashlib
 import json
 import logging
 import re
+import time
 import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from dataclasses import dataclass, field
 from decimal import Decimal
+from collections.abc import AsyncIterator, Callable
 from typing import Any, Optional
 
 import asyncpg
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.encryption import EncryptionService
+from app.core.invalidation import get_resource_version, invalidation_listener
 from app.models.database_connection import DatabaseConnection
 
 logger = logging.getLogger(__name__)
 
+DATABASE_CONNECTION_RESOURCE = "database_connections"
+VERSION_CHECK_INTERVAL = 5.0  # seconds between Redis version checks
+
+STREAM_FORMATS = ("ndjson", "columnar")
+
+DEFAULT_STATEMENT_CACHE_SIZE = 100  # prepared statements kept per pooled connection
+
+# :param_name placeholders (not ::type_cast)
+_PARAM_PATTERN = re.compile(r"(?<!:):([a-zA-Z_][a-zA-Z0-9_]*)")
+
+
+class StatementCachingConnection(asyncpg.Connection):
+    """
+    asyncpg connection that keeps an LRU of its own prepared statements.
+
+    The cache lives on the connection object, so statements never outlive
+    their connection or get reused on a replacement backend. Pool proxies
+    forward method calls, so the methods work on acquired connections.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._sinas_statements: OrderedDict[str, Any] = OrderedDict()
+
+    def get_cached_statement(self, sql: str) -> Optional[Any]:
+        stmt = self._sinas_statements.get(sql)
+        if stmt is not None:
+            self._sinas_statements.move_to_end(sql)
+        return stmt
+
+    def cache_statement(self, sql: str, stmt: Any, max_size: int) -> None:
+        self._sinas_statements[sql] = stmt
+        while len(self._sinas_statements) > max_size:
+            self._sinas_statements.popitem(last=False)
+
+    def forget_statement(self, sql: str) -> None:
+        self._sinas_statements.pop(sql, None)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_sql(sql: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Rewrite :param_name placeholders to $N once per distinct SQL text.
+
+    Returns (converted_sql, parameter names in $N order). Keyed by the SQL
+    itself, so an edited Query simply compiles to a new entry.
+    """
+    param_names = _PARAM_PATTERN.findall(sql)
+    if not param_names:
+        return sql, ()
+
+    # Build ordered unique param list preserving first occurrence order
+    ordered_params = tuple(dict.fromkeys(param_names))
+
+    # Build name -> position mapping and replace :name with $N
+    name_to_pos = {name: idx + 1 for idx, name in enumerate(ordered_params)}
+    converted_sql = _PARAM_PATTERN.sub(lambda m: f"${name_to_pos[m.group(1)]}", sql)
+    return converted_sql, ordered_params
+
+
+def _isoformat(val: Any) -> str:
+    return val.isoformat()
+
+
+def _total_seconds(val: datetime.timedelta) -> float:
+    return val.total_seconds()
+
+
+def _hex(val: bytes) -> str:
+    return val.hex()
+
+
+# Errors after which a cached prepared statement is discarded and re-prepared
+_STALE_STATEMENT_ERRORS = (
+    asyncpg.exceptions.InvalidCachedStatementError,
+    asyncpg.exceptions.InvalidSQLStatementNameError,
+    asyncpg.exceptions.FeatureNotSupportedError,  # cached plan must not change result type
+    asyncpg.exceptions.InterfaceError,  # statement of a closed connection whose pid was reused
+)
+
+
+def _json_line(obj: Any) -> bytes:
+    return (json.dumps(obj, default=str) + "\n").encode()
+
+
+# PostgreSQL type OID -> converter to a JSON-safe value. Types not listed
+# (int, float, bool, text, json, ...) are already JSON-safe as decoded by asyncpg.
+_OID_CONVERTERS: dict[int, Optional[Callable[[Any], Any]]] = {
+    17: _hex,  # bytea
+    1082: _isoformat,  # date
+    1083: _isoformat,  # time
+    1114: _isoformat,  # timestamp
+    1184: _isoformat,  # timestamptz
+    1186: _total_seconds,  # interval
+    1266: _isoformat,  # timetz
+    1700: str,  # numeric
+    2950: str,  # uuid
+    3802: None,  # jsonb
+    114: None,  # json
+    16: None,  # bool
+    20: None,  # int8
+    21: None,  # int2
+    23: None,  # int4
+    25: None,  # text
+    700: None,  # float4
+    701: None,  # float8
+    1043: None,  # varchar
+}
+
+
+@dataclass(frozen=True)
+class ConnectionDescriptor:
+    """Snapshot of a database connection's settings, cached per connection_id."""
+
+    id: str
+    name: str
+    host: str
+    port: int
+    database: str
+    username: str
+    password: Optional[str]  # encrypted value
+    ssl_mode: Optional[str]
+    config: Optional[dict[str, Any]]
+    config_hash: str
+
+    @property
+    def statement_cache_size(self) -> int:
+        """
+        Prepared statements cached per pooled connection; 0 when disabled.
+
+        Set config.prepared_statements = false for connections behind
+        PgBouncer in transaction/statement pooling mode.
+        """
+        config = self.config or {}
+        if config.get("prepared_statements", True) is False:
+            return 0
+        return int(config.get("statement_cache_size", DEFAULT_STATEMENT_CACHE_SIZE))
+
+    @classmethod
+    def from_model(cls, conn: DatabaseConnection) -> "ConnectionDescriptor":
+        data = {
+            "host": conn.host,
+            "port": conn.port,
+            "database": conn.database,
+            "username": conn.username,
+            "password": conn.password,
+            "ssl_mode": conn.ssl_mode,
+            "config": conn.config,
+        }
+        return cls(
+            id=str(conn.id),
+            name=conn.name,
+            config_hash=hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest(),
+            **data,
+        )
+
+
+@dataclass
+class PoolMetrics:
+    """Per-pool counters (process-local)."""
+
+    acquires: int = 0
+    acquire_wait_ms_total: float = 0.0
+    acquire_wait_ms_max: float = 0.0
+    queries: int = 0
+    query_errors: int = 0
+    query_ms_total: float = 0.0
+    query_ms_max: float = 0.0
+    statement_cache_hits: int = 0
+    statement_cache_misses: int = 0
+    created_at: float = field(default_factory=time.time)
+
+    def record_acquire(self, wait_ms: float) -> None:
+        self.acquires += 1
+        self.acquire_wait_ms_total += wait_ms
+        self.acquire_wait_ms_max = max(self.acquire_wait_ms_max, wait_ms)
+
+    def record_query(self, duration_ms: float, failed: bool) -> None:
+        self.queries += 1
+        self.query_ms_total += duration_ms
+        self.query_ms_max = max(self.query_ms_max, duration_ms)
+        if failed:
+            self.query_errors += 1
+
+
+@dataclass
+class BatchStatement:
+    """One statement of an execute_batch call."""
+
+    sql: str
+    params: dict[str, Any]
+    operation: str = "read"
+    timeout_ms: int = 5000
+    max_rows: int = 1000
+
 
 class DatabasePoolManager:
-    """Singleton managing asyncpg pools per database_connection_id."""
+    """
+    Singleton managing asyncpg pools per database_connection_id.
+
+    Connection settings are cached as descriptors so an already-open pool is
+    reached without touching the platform database. Descriptors are dropped on
+    "database_connections" invalidation events; a periodic check of the Redis
+    resource version covers events missed while disconnected. A pool is only
+    recreated when the reloaded descriptor's config hash differs.
+    """
 
     _instance: Optional["DatabasePoolManager"] = None
 
     def __init__(self):
         self._pools: dict[str, asyncpg.Pool] = {}  # connection_id -> pool
         self._pool_checksums: dict[str, str] = {}  # connection_id -> config hash
+        self._descriptors: dict[str, ConnectionDescriptor] = {}  # connection_id -> descriptor
+        self._metrics: dict[str, PoolMetrics] = {}  # connection_id -> metrics
+        # connection_id -> statement cache size of the open pool (0 = disabled)
+        self._statement_cache_sizes: dict[str, int] = {}
+        self._create_locks: dict[str, asyncio.Lock] = {}
+        self._version = -1
+        self._last_version_check = 0.0
+        invalidation_listener.register(DATABASE_CONNECTION_RESOURCE, self._on_invalidate)
 
     @classmethod
     def get_instance(cls) -> "DatabasePoolManager":
@@ -32,79 +251,161 @@ class DatabasePoolManager:
             cls._instance = cls()
         return cls._instance
 
-    def _config_hash(self, conn: DatabaseConnection) -> str:
-        """Calculate hash of connection config for invalidation detection."""
-        data = {
-            "host": conn.host,
-            "port": conn.port,
-            "database": conn.database,
-            "username": conn.username,
-            "password": conn.password,  # encrypted value
-            "ssl_mode": conn.ssl_mode,
-            "config": conn.config,
-        }
-        return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
-
-    async def get_pool(self, db: AsyncSession, connection_id: str) -> asyncpg.Pool:
-        """Get or create a connection pool for the given connection_id."""
+    def _on_invalidate(self, connection_id: Optional[str], version: int) -> None:
+        """Drop cached descriptors; pools are kept until the next lookup compares hashes."""
+        if connection_id:
+            self._descriptors.pop(connection_id, None)
+        else:
+            self._descriptors.clear()
+
+    async def _check_version(self) -> None:
+        now = time.monotonic()
+        if now - self._last_version_check < VERSION_CHECK_INTERVAL:
+            return
+        self._last_version_check = now
+        try:
+            version = await get_resource_version(DATABASE_CONNECTION_RESOURCE)
+        except Exception as e:
+            logger.warning(f"Database connection version check failed: {e}")
+            return
+        if version != self._version:
+            self._descriptors.clear()
+            self._version = version
+
+    async def _load_descriptor(
+        self, db: Optional[AsyncSession], connection_id: str
+    ) -> ConnectionDescriptor:
         from sqlalchemy import select
 
-        # Load connection config
-        result = await db.execute(
-            select(DatabaseConnection).where(
-                DatabaseConnection.id == connection_id,
-                DatabaseConnection.is_active == True,
-            )
+        query = select(DatabaseConnection).where(
+            DatabaseConnection.id == connection_id,
+            DatabaseConnection.is_active == True,
         )
-        conn = result.scalar_one_or_none()
+        if db is not None:
+            conn = (await db.execute(query)).scalar_one_or_none()
+        else:
+            from app.core.database import AsyncSessionLocal
+
+            async with AsyncSessionLocal() as session:
+                conn = (await session.execute(query)).scalar_one_or_none()
+
         if not conn:
+            # Deactivated or deleted: release the external pool too
+            await self.invalidate(connection_id)
             raise ValueError(f"Database connection '{connection_id}' not found or inactive")
 
-        config_hash = self._config_hash(conn)
+        descriptor = ConnectionDescriptor.from_model(conn)
+        self._descriptors[connection_id] = descriptor
+        return descriptor
 
-        # Check if pool exists and config hasn't changed
-        if connection_id in self._pools and self._pool_checksums.get(connection_id) == config_hash:
-            return self._pools[connection_id]
+    async def get_pool(self, db: Optional[AsyncSession], connection_id: str) -> asyncpg.Pool:
+        """
+        Get or create a connection pool for the given connection_id.
 
-        # Config changed or new pool needed - close old pool if exists
-        if connection_id in self._pools:
-            try:
-                await self._pools[connection_id].close()
-            except Exception as e:
-                logger.warning(f"Error closing stale pool for {connection_id}: {e}")
+        db is only used when the descriptor is not cached; without it a
+        short-lived session is opened.
+        """
+        connection_id = str(connection_id)
+        await self._check_version()
+
+        descriptor = self._descriptors.get(connection_id)
+        pool = self._pools.get(connection_id)
+        if descriptor and pool and self._pool_checksums.get(connection_id) == descriptor.config_hash:
+            return pool
+
+        lock = self._create_locks.setdefault(connection_id, asyncio.Lock())
+        async with lock:
+            descriptor = self._descriptors.get(connection_id) or await self._load_descriptor(
+                db, connection_id
+            )
+
+            # Check if pool exists and config hasn't changed
+            pool = self._pools.get(connection_id)
+            if pool and self._pool_checksums.get(connection_id) == descriptor.config_hash:
+                return pool
 
+            # Config changed or new pool needed - close old pool if exists
+            if pool:
+                try:
+                    await pool.close()
+                except Exception as e:
+                    logger.warning(f"Error closing stale pool for {connection_id}: {e}")
+
+            pool = await self._create_pool(descriptor)
+            self._pools[connection_id] = pool
+            self._pool_checksums[connection_id] = descriptor.config_hash
+            self._metrics[connection_id] = PoolMetrics()
+            self._statement_cache_sizes[connection_id] = descriptor.statement_cache_size
+
+            logger.info(f"Created connection pool for database connection {descriptor.name}")
+            return pool
+
+    async def _create_pool(self, descriptor: ConnectionDescriptor) -> asyncpg.Pool:
         # Decrypt password
         decrypted_password = None
-        if conn.password:
+        if descriptor.password:
             encryption_service = EncryptionService()
-            decrypted_password = encryption_service.decrypt(conn.password)
+            decrypted_password = encryption_service.decrypt(descriptor.password)
 
         # Pool settings from config
-        pool_config = conn.config or {}
+        pool_config = descriptor.config or {}
         min_size = pool_config.get("min_pool_size", 2)
         max_size = pool_config.get("max_pool_size", 10)
 
-        ssl_mode = conn.ssl_mode or "prefer"
+        ssl_mode = descriptor.ssl_mode or "prefer"
 
-        pool = await asyncpg.create_pool(
-            host=conn.host,
-            port=conn.port,
-            database=conn.database,
-            user=conn.username,
+        return await asyncpg.create_pool(
+            host=descriptor.host,
+            port=descriptor.port,
+            database=descriptor.database,
+            user=descriptor.username,
             password=decrypted_password,
             ssl=ssl_mode,
             min_size=min_size,
             max_size=max_size,
+            # Also disables asyncpg's implicit statement cache (PgBouncer-safe)
+            statement_cache_size=descriptor.statement_cache_size,
+            connection_class=StatementCachingConnection,
         )
 
-        self._pools[connection_id] = pool
-        self._pool_checksums[connection_id] = config_hash
+    async def warm_up(self) -> int:
+        """
+        Open pools for all active PostgreSQL connections (called at startup).
+
+        Returns:
+            Number of pools opened
+        """
+        from sqlalchemy import select
+
+        from app.core.database import AsyncSessionLocal
+
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(DatabaseConnection).where(
+                    DatabaseConnection.is_active == True,
+                    DatabaseConnection.connection_type == "postgresql",
+                )
+            )
+            connections = result.scalars().all()
 
-        logger.info(f"Created connection pool for database connection {conn.name}")
-        return pool
+        self._version = await get_resource_version(DATABASE_CONNECTION_RESOURCE)
+        self._last_version_check = time.monotonic()
+
+        opened = 0
+        for conn in connections:
+            connection_id = str(conn.id)
+            self._descriptors[connection_id] = ConnectionDescriptor.from_model(conn)
+            try:
+                await self.get_pool(None, connection_id)
+                opened += 1
+            except Exception as e:
+                logger.warning(f"Pool warm-up failed for database connection {conn.name}: {e}")
+        return opened
 
     async def invalidate(self, connection_id: str):
         """Close and remove pool for the given connection_id."""
+        connection_id = str(connection_id)
+        self._descriptors.pop(connection_id, None)
         if connection_id in self._pools:
             try:
                 await self._pools[connection_id].close()
@@ -112,8 +413,55 @@ class DatabasePoolManager:
                 logger.warning(f"Error closing pool for {connection_id}: {e}")
             del self._pools[connection_id]
             self._pool_checksums.pop(connection_id, None)
+            self._metrics.pop(connection_id, None)
+            self._statement_cache_sizes.pop(connection_id, None)
             logger.info(f"Invalidated pool for connection {connection_id}")
 
+    @asynccontextmanager
+    async def acquire(self, db: Optional[AsyncSession], connection_id: str):
+        """Acquire a connection from the pool, recording acquire wait time."""
+        connection_id = str(connection_id)
+        pool = await self.get_pool(db, connection_id)
+        metrics = self._metrics.setdefault(connection_id, PoolMetrics())
+
+        start = time.perf_counter()
+        async with pool.acquire() as conn:
+            metrics.record_acquire((time.perf_counter() - start) * 1000)
+            yield conn
+
+    def get_metrics(self) -> list[dict[str, Any]]:
+        """Per-pool metrics for this process."""
+        metrics = []
+        for connection_id, pool in self._pools.items():
+            m = self._metrics.get(connection_id) or PoolMetrics()
+            descriptor = self._descriptors.get(connection_id)
+            size = pool.get_size()
+            metrics.append(
+                {
+                    "connection_id": connection_id,
+                    "name": descriptor.name if descriptor else None,
+                    "size": size,
+                    "idle": pool.get_idle_size(),
+                    "active": size - pool.get_idle_size(),
+                    "min_size": pool.get_min_size(),
+                    "max_size": pool.get_max_size(),
+                    "acquires": m.acquires,
+                    "acquire_wait_ms_avg": round(m.acquire_wait_ms_total / m.acquires, 3)
+                    if m.acquires
+                    else 0.0,
+                    "acquire_wait_ms_max": round(m.acquire_wait_ms_max, 3),
+                    "queries": m.queries,
+                    "query_errors": m.query_errors,
+                    "query_ms_avg": round(m.query_ms_total / m.queries, 3) if m.queries else 0.0,
+                    "query_ms_max": round(m.query_ms_max, 3),
+                    "statement_cache_size": self._statement_cache_sizes.get(connection_id, 0),
+                    "statement_cache_hits": m.statement_cache_hits,
+                    "statement_cache_misses": m.statement_cache_misses,
+                    "since": m.created_at,
+                }
+            )
+        return metrics
+
     async def execute_query(
         self,
         db: AsyncSession,
@@ -129,41 +477,324 @@ class DatabasePoolManager:
 
         Converts :param_name syntax to $N positional params for asyncpg.
         """
-        pool = await self.get_pool(db, connection_id)
-
         # Convert :param_name to $N positional params
         converted_sql, positional_params = self._convert_params(sql, params)
 
         timeout_s = timeout_ms / 1000.0
 
-        async with pool.acquire() as conn:
-            if operation == "read":
-                # Add LIMIT if not present
-                sql_upper = converted_sql.upper().strip()
-                if "LIMIT" not in sql_upper:
-                    converted_sql = f"{converted_sql} LIMIT {max_rows}"
+        async with self.acquire(db, connection_id) as conn:
+            metrics = self._metrics.setdefault(str(connection_id), PoolMetrics())
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await self._run(
+                    str(connection_id),
+                    conn,
+                    converted_sql,
+                    positional_params,
+                    operation,
+                    timeout_s,
+                    max_rows,
+                )
+                failed = False
+                return result
+            finally:
+                metrics.record_query((time.perf_counter() - start) * 1000, failed)
+
+    async def execute_batch(
+        self,
+        db: Optional[AsyncSession],
+        connection_id: str,
+        statements: list[BatchStatement],
+        snapshot: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Execute several statements on one acquired connection, in order.
+
+        With snapshot=True and only read statements, the batch runs inside one
+        read-only REPEATABLE READ transaction so every statement sees the same
+        snapshot. Each statement runs in its own savepoint there, so a failing
+        statement does not abort the rest of the batch.
 
-                rows = await conn.fetch(converted_sql, *positional_params, timeout=timeout_s)
+        Returns:
+            One result dict per statement (same shape as execute_query), or
+            {"error": message} for a statement that failed
+        """
+        connection_id = str(connection_id)
+        use_snapshot = snapshot and all(s.operation == "read" for s in statements)
+        results: list[dict[str, Any]] = []
+
+        async with self.acquire(db, connection_id) as conn:
+            metrics = self._metrics.setdefault(connection_id, PoolMetrics())
+            tx = (
+                conn.transaction(isolation="repeatable_read", readonly=True)
+                if use_snapshot
+                else None
+            )
+            if tx is not None:
+                await tx.start()
+            try:
+                for statement in statements:
+                    converted_sql, positional_params = self._convert_params(
+                        statement.sql, statement.params
+                    )
+                    start = time.perf_counter()
+                    failed = True
+                    try:
+                        savepoint = conn.transaction() if tx is not None else nullcontext()
+                        async with savepoint:
+                            result = await self._run(
+                                connection_id,
+                                conn,
+                                converted_sql,
+                                positional_params,
+                                statement.operation,
+                                statement.timeout_ms / 1000.0,
+                                statement.max_rows,
+                            )
+                        failed = False
+                        results.append(result)
+                    except (asyncpg.PostgresError, asyncpg.InterfaceError, asyncio.TimeoutError) as e:
+                        results.append({"error": str(e) or type(e).__name__})
+                    finally:
+                        metrics.record_query((time.perf_counter() - start) * 1000, failed)
+            finally:
+                if tx is not None:
+                    await tx.rollback()
+
+        return results
+
+    async def _prepare(
+        self, connection_id: str, conn: asyncpg.Connection, sql: str, timeout_s: float
+    ) -> "asyncpg.prepared_stmt.PreparedStatement":
+        """
+        Get a prepared statement for sql on this pooled connection.
+
+        Statements are cached on the connection itself (StatementCachingConnection),
+        so repeated queries skip parse/plan.
+        """
+        cache_size = self._statement_cache_sizes.get(connection_id, 0)
+        metrics = self._metrics.setdefault(connection_id, PoolMetrics())
+        if not cache_size:
+            metrics.statement_cache_misses += 1
+            return await conn.prepare(sql, timeout=timeout_s)
+
+        stmt = conn.get_cached_statement(sql)
+        if stmt is not None:
+            metrics.statement_cache_hits += 1
+            return stmt
+
+        metrics.statement_cache_misses += 1
+        stmt = await conn.prepare(sql, timeout=timeout_s)
+        conn.cache_statement(sql, stmt, cache_size)
+        return stmt
+
+    def _forget_statement(self, connection_id: str, conn: asyncpg.Connection, sql: str) -> None:
+        if self._statement_cache_sizes.get(connection_id, 0):
+            conn.forget_statement(sql)
+
+    async def _run(
+        self,
+        connection_id: str,
+        conn: asyncpg.Connection,
+        converted_sql: str,
+        positional_params: list[Any],
+        operation: str,
+        timeout_s: float,
+        max_rows: int,
+    ) -> dict[str, Any]:
+        """Run a converted statement on an acquired connection."""
+        if operation == "read":
+            if not self._statement_cache_sizes.get(connection_id, 0):
+                # No named statements (PgBouncer): unnamed cursor, generic conversion.
+                # Stops at max_rows + 1 so the result set is never loaded whole.
+                async with conn.transaction():
+                    cursor = await conn.cursor(
+                        converted_sql, *positional_params, timeout=timeout_s
+                    )
+                    records = await cursor.fetch(max_rows + 1, timeout=timeout_s)
+                rows = [
+                    {key: self._serialize_value(value) for key, value in record.items()}
+                    for record in records[:max_rows]
+                ]
                 return {
-                    "rows": [self._serialize_row(row) for row in rows],
+                    "rows": rows,
                     "row_count": len(rows),
+                    "truncated": len(records) > max_rows,
                 }
+
+            # Fetch at most max_rows + 1 through a portal instead of rewriting
+            # the SQL with a LIMIT; the extra row only signals truncation.
+            for attempt in range(2):
+                stmt = await self._prepare(connection_id, conn, converted_sql, timeout_s)
+                try:
+                    async with conn.transaction():
+                        cursor = await stmt.cursor(*positional_params, timeout=timeout_s)
+                        records = await cursor.fetch(max_rows + 1, timeout=timeout_s)
+                    break
+                except _STALE_STATEMENT_ERRORS:
+                    # Schema changed or statement lost on the server: re-prepare once
+                    self._forget_statement(connection_id, conn, converted_sql)
+                    if attempt:
+                        raise
+
+            columns, converters = self._row_converters(stmt)
+            truncated = len(records) > max_rows
+            rows = [
+                dict(zip(columns, self._convert_record(record, converters)))
+                for record in records[:max_rows]
+            ]
+            return {
+                "rows": rows,
+                "row_count": len(rows),
+                "truncated": truncated,
+            }
+        else:
+            result = await conn.execute(converted_sql, *positional_params, timeout=timeout_s)
+            # asyncpg returns string like "UPDATE 5"
+            affected = 0
+            if result and " " in result:
+                try:
+                    affected = int(result.split(" ")[-1])
+                except ValueError:
+                    pass
+            return {
+                "affected_rows": affected,
+            }
+
+    async def stream_query(
+        self,
+        db: Optional[AsyncSession],
+        connection_id: str,
+        sql: str,
+        params: dict[str, Any],
+        fmt: str = "ndjson",
+        timeout_ms: int = 5000,
+        max_rows: int = 1000,
+        chunk_size: int = 500,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a read query through a server-side cursor.
+
+        Rows are fetched chunk_size at a time and only when the consumer asks
+        for the next chunk, so memory is bounded by one chunk and a slow client
+        slows down the fetch. timeout_ms applies per chunk.
+
+        Formats (both newline-delimited JSON):
+            ndjson:   one object per row
+            columnar: {"columns", "types"} once, then {"rows": [[...], ...]} per
+                      chunk, then {"row_count", "truncated"}
+        A failure after streaming started is reported as a final {"error"} line.
+
+        Without prepared statements (PgBouncer) an unnamed cursor is used:
+        columnar "types" is null and a query without rows has no columns.
+        """
+        if fmt not in STREAM_FORMATS:
+            raise ValueError(f"Unsupported stream format '{fmt}'")
+
+        converted_sql, positional_params = self._convert_params(sql, params)
+        timeout_s = timeout_ms / 1000.0
+
+        connection_id = str(connection_id)
+        async with self.acquire(db, connection_id) as conn:
+            prepared = bool(self._statement_cache_sizes.get(connection_id, 0))
+            metrics = self._metrics.setdefault(connection_id, PoolMetrics())
+            start = time.perf_counter()
+            failed = True
+            streamed = False
+            try:
+                columns: Optional[list[str]] = None
+                converters: list[Optional[Callable[[Any], Any]]] = []
+                types: Optional[list[str]] = None
+                stmt = None
+                if prepared:
+                    stmt = await self._prepare(connection_id, conn, converted_sql, timeout_s)
+                    columns, converters = self._row_converters(stmt)
+                    types = [attr.type.name for attr in stmt.get_attributes()]
+
+                async with conn.transaction():
+                    if stmt is not None:
+                        cursor = await stmt.cursor(*positional_params, timeout=timeout_s)
+                    else:
+                        # No named statements (PgBouncer): unnamed cursor, generic
+                        # conversion; columns come from the first rows, types are unknown
+                        cursor = await conn.cursor(
+                            converted_sql, *positional_params, timeout=timeout_s
+                        )
+
+                    sent = 0
+                    while sent < max_rows:
+                        size = min(chunk_size, max_rows - sent)
+                        records = await cursor.fetch(size, timeout=timeout_s)
+                        if columns is None:
+                            columns = list(records[0].keys()) if records else []
+                            converters = [self._serialize_value] * len(columns)
+                        if fmt == "columnar" and not streamed:
+                            yield _json_line({"columns": columns, "types": types})
+                            streamed = True
+                        if not records:
+                            break
+                        sent += len(records)
+
+                        values = [self._convert_record(r, converters) for r in records]
+                        if fmt == "columnar":
+                            yield _json_line({"rows": values})
+                        else:
+                            yield b"".join(
+                                _json_line(dict(zip(columns, row))) for row in values
+                            )
+                        streamed = True
+                        if len(records) < size:
+                            break
+
+                    truncated = sent >= max_rows and bool(
+                        await cursor.fetch(1, timeout=timeout_s)
+                    )
+
+                if fmt == "columnar":
+                    if not streamed:  # max_rows == 0: nothing was fetched
+                        yield _json_line({"columns": columns or [], "types": types})
+                    yield _json_line({"row_count": sent, "truncated": truncated})
+                failed = False
+            except Exception as e:
+                if isinstance(e, _STALE_STATEMENT_ERRORS):
+                    self._forget_statement(connection_id, conn, converted_sql)
+                # Before the first chunk the caller can still respond with an error status
+                if not streamed:
+                    raise
+                logger.error(f"Streaming query on connection {connection_id} failed: {e}")
+                yield _json_line({"error": str(e)})
+            finally:
+                metrics.record_query((time.perf_counter() - start) * 1000, failed)
+
+    @staticmethod
+    def _row_converters(
+        stmt: "asyncpg.prepared_stmt.PreparedStatement",
+    ) -> tuple[list[str], list[Optional[Callable[[Any], Any]]]]:
+        """Column names and one converter per column, chosen by type OID."""
+        columns = []
+        converters = []
+        for attr in stmt.get_attributes():
+            columns.append(attr.name)
+            if attr.type.oid in _OID_CONVERTERS:
+                converters.append(_OID_CONVERTERS[attr.type.oid])
             else:
-                result = await conn.execute(converted_sql, *positional_params, timeout=timeout_s)
-                # asyncpg returns string like "UPDATE 5"
-                affected = 0
-                if result and " " in result:
-                    try:
-                        affected = int(result.split(" ")[-1])
-                    except ValueError:
-                        pass
-                return {
-                    "affected_rows": affected,
-                }
+                # Arrays, composites, enums, extension types: generic fallback
+                converters.append(DatabasePoolManager._serialize_value)
+        return columns, converters
+
+    @staticmethod
+    def _convert_record(
+        record: asyncpg.Record, converters: list[Optional[Callable[[Any], Any]]]
+    ) -> list[Any]:
+        return [
+            value if value is None or convert is None else convert(value)
+            for value, convert in zip(record, converters)
+        ]
 
     @staticmethod
     def _serialize_value(val: Any) -> Any:
-        """Convert non-JSON-serializable types to JSON-safe values."""
+        """Convert non-JSON-serializable types to JSON-safe values (fallback for unmapped types)."""
         if val is None:
             return None
         if isinstance(val, (uuid.UUID, Decimal)):
@@ -180,11 +811,6 @@ class DatabasePoolManager:
             return {k: DatabasePoolManager._serialize_value(v) for k, v in val.items()}
         return val
 
-    @staticmethod
-    def _serialize_row(row: asyncpg.Record) -> dict[str, Any]:
-        """Convert an asyncpg Record to a JSON-safe dict."""
-        return {key: DatabasePoolManager._serialize_value(row[key]) for key in row.keys()}
-
     @staticmethod
     def _convert_params(sql: str, params: dict[str, Any]) -> tuple[str, list[Any]]:
         """
@@ -192,35 +818,8 @@ class DatabasePoolManager:
 
         Returns (converted_sql, positional_params_list).
         """
-        # Find all :param_name occurrences (not ::type_cast)
-        pattern = re.compile(r"(?<!:):([a-zA-Z_][a-zA-Z0-9_]*)")
-        param_names = pattern.findall(sql)
-
-        if not param_names:
-            return sql, []
-
-        # Build ordered unique param list preserving first occurrence order
-        seen = set()
-        ordered_params = []
-        for name in param_names:
-            if name not in seen:
-                seen.add(name)
-                ordered_params.append(name)
-
-        # Build name -> position mapping
-        name_to_pos = {name: idx + 1 for idx, name in enumerate(ordered_params)}
-
-        # Replace :name with $N
-        def replacer(match):
-            name = match.group(1)
-            return f"${name_to_pos[name]}"
-
-        converted_sql = pattern.sub(replacer, sql)
-
-        # Build positional params list
-        positional_params = [params.get(name) for name in ordered_params]
-
-        return converted_sql, positional_params
+        converted_sql, param_names = _compile_sql(sql)
+        return converted_sql, [params.get(name) for name in param_names]
 
     async def close_all(self):
         """Close all connection pools. Called on shutdown."""
@@ -231,4 +830,7 @@ class DatabasePoolManager:
                 logger.warning(f"Error closing pool for {connection_id}: {e}")
         self._pools.clear()
         self._pool_checksums.clear()
+        self._descriptors.clear()
+        self._metrics.clear()
+        self._statement_cache_sizes.clear()
         logger.info("All database connection pools closed")
@@ -6,7 +6,7 @@ import logging
 import time
 import traceback
 import uuid
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from typing import Any, Optional
 
@@ -18,7 +18,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import AsyncSessionLocal
 from app.models.execution import Execution, ExecutionStatus
 from app.models.function import Function
+from app.services.blob_store import blob_store
 from app.services.clickhouse_logger import clickhouse_logger
+from app.services.function_cache import FunctionDefinition, function_cache
+from app.services.stream_relay import execution_channel, stream_relay
 from app.services.tracking import ExecutionTracker
 
 from types import SimpleNamespace
@@ -102,7 +105,7 @@ class ASTInjector:
 
 class FunctionExecutor:
     def __init__(self):
-        self.functions_cache: dict[str, Function] = {}
+        # Per-execution namespaces, released when the execution ends
         self.namespace_cache: dict[str, dict[str, Any]] = {}
         self._container_pool = None
 
@@ -140,7 +143,7 @@ class FunctionExecutor:
 
     async def _execute_in_shared_pool(
         self,
-        function: Function,
+        function: FunctionDefinition,
         input_data: dict[str, Any],
         execution_id: str,
         user_id: str,
@@ -149,6 +152,7 @@ class FunctionExecutor:
         trigger_type: str,
         chat_id: Optional[str],
         db: AsyncSession,
+        on_progress: Optional[Callable[[Any], Awaitable[None]]] = None,
     ) -> dict[str, Any]:
         """
         Execute function in shared worker pool (separate worker containers).
@@ -170,37 +174,26 @@ class FunctionExecutor:
             trigger_type=trigger_type,
             chat_id=chat_id,
             db=db,
+            on_progress=on_progress,
         )
 
         return exec_result
 
     async def load_function(
         self, db: AsyncSession, function_namespace: str, function_name: str, user_id: str
-    ) -> Function:
-        """Load function from database with caching.
+    ) -> FunctionDefinition:
+        """Load function definition through the shared function cache.
 
         Note: No permission checks here - permissions should be validated at entry points
         (agent tool execution, webhook validation, schedule authorization).
         """
-        cache_key = f"{function_namespace}:{function_name}"
-        if cache_key in self.functions_cache:
-            return self.functions_cache[cache_key]
-
-        result = await db.execute(
-            select(Function).where(
-                Function.namespace == function_namespace,
-                Function.name == function_name,
-                Function.is_active == True,
-            )
-        )
-        function = result.scalar_one_or_none()
+        function = await function_cache.get(db, function_namespace, function_name)
 
         if not function:
             raise FunctionExecutionError(
                 f"Function '{function_namespace}/{function_name}' not found or inactive"
             )
 
-        self.functions_cache[cache_key] = function
         return function
 
     async def build_execution_namespace(
@@ -238,7 +231,8 @@ class FunctionExecutor:
         )
         functions = result.scalars().all()
 
-        # Create tracker for this execution
+        # Create tracker for this execution (steps are buffered and persisted
+        # by release_execution_namespace when the execution finishes)
         tracker = ExecutionTracker(execution_id, db, user_id)
         track_decorator = TrackingDecorator(tracker)
 
@@ -326,6 +320,9 @@ class FunctionExecutor:
         chat_id: Optional[str] = None,
     ) -> dict[str, Any]:
         """Execute a function with input validation and tracking."""
+        # Inputs above the blob threshold arrive as a reference
+        input_data = await blob_store.resolve(input_data)
+
         async with AsyncSessionLocal() as db:
             # Get user info for context
             from app.core.auth import create_access_token
@@ -361,6 +358,13 @@ class FunctionExecutor:
                 await db.commit()
 
                 # Log execution start to Redis
+                await clickhouse_logger.log_execution_start(execution_id, function_name, input_data)
+            elif execution.status == ExecutionStatus.PENDING:
+                # Pre-created by enqueue_function
+                execution.status = ExecutionStatus.RUNNING
+                execution.started_at = datetime.utcnow()
+                await db.commit()
+
                 await clickhouse_logger.log_execution_start(execution_id, function_name, input_data)
             elif resume_data is not None:
                 # Resuming paused execution
@@ -370,6 +374,18 @@ class FunctionExecutor:
                 execution.status = ExecutionStatus.RUNNING
                 await db.commit()
 
+            # Progress events of generator functions go to the execution's
+            # stream channel; it is terminated only if something was published
+            channel = execution_channel(execution_id)
+            progress_published = False
+
+            async def publish_progress(event: Any) -> None:
+                nonlocal progress_published
+                progress_published = True
+                await stream_relay.publish(
+                    channel, {"type": "progress", "execution_id": execution_id, "data": event}
+                )
+
             try:
                 # Load function definition
                 function = await self.load_function(db, function_namespace, function_name, user_id)
@@ -397,6 +413,7 @@ class FunctionExecutor:
                         trigger_type=trigger_type,
                         chat_id=chat_id,
                         db=db,
+                        on_progress=publish_progress,
                     )
                     elapsed = time.time() - start_time
                     print(f"⏱️  [TIMING] Shared pool execution completed in {elapsed:.3f}s")
@@ -418,6 +435,7 @@ class FunctionExecutor:
                         trigger_type=trigger_type,
                         chat_id=chat_id,
                         db=db,
+                        on_progress=publish_progress,
                     )
                     container_elapsed = time.time() - container_start
                     print(f"⏱️  [TIMING] Pool container execution completed in {container_elapsed:.3f}s")
@@ -445,6 +463,9 @@ class FunctionExecutor:
                     execution_id, "completed", result, None, duration_ms
                 )
 
+                if progress_published:
+                    await stream_relay.publish_done(channel)
+
                 return result
 
             except Exception as e:
@@ -461,8 +482,14 @@ class FunctionExecutor:
                     execution_id, "failed", None, str(e), None
                 )
 
+                if progress_published:
+                    await stream_relay.publish_error(channel, str(e))
+
                 raise FunctionExecutionError(f"Function execution failed: {e}")
 
+            finally:
+                await self.release_execution_namespace(user_id, execution_id)
+
     async def _execute_generator(
         self,
         execution: Execution,
@@ -545,12 +572,16 @@ class FunctionExecutor:
         trigger_id: str,
         user_id: str,
         chat_id: Optional[str] = None,
+        callback_url: Optional[str] = None,
+        idempotency_redis_key: Optional[str] = None,
     ) -> dict[str, Any]:
         """
         Enqueue a function for execution via the job queue.
 
         Creates an Execution record with PENDING status and dispatches to the queue.
-        Returns immediately with job_id and execution_id.
+        Returns immediately with job_id and execution_id. If callback_url is set,
+        the worker POSTs the final result to it; idempotency_redis_key is passed
+        on to the worker, which finishes that idempotency record.
         """
         from app.services.queue_service import queue_service
 
@@ -579,6 +610,8 @@ class FunctionExecutor:
             trigger_id=trigger_id,
             user_id=user_id,
             chat_id=chat_id,
+            callback_url=callback_url,
+            idempotency_redis_key=idempotency_redis_key,
         )
 
         return {
@@ -587,9 +620,19 @@ class FunctionExecutor:
             "job_id": job_id,
         }
 
+    async def release_execution_namespace(self, user_id: str, execution_id: str) -> None:
+        """Drop the namespace built for an execution and persist its buffered steps."""
+        namespace = self.namespace_cache.pop(f"{user_id}:{execution_id}", None)
+        if namespace is None:
+            return
+        try:
+            await namespace["track"].tracker.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush steps for execution {execution_id}: {e}")
+
     def clear_cache(self):
         """Clear function and namespace caches."""
-        self.functions_cache.clear()
+        function_cache.clear()
         self.namespace_cache.clear()
 
 
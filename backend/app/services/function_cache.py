@@ -0,0 +1,301 @@
+"""Process-wide cache of active function definitions.
+
+Shared by FunctionExecutor, ContainerPool and SharedWorkerManager so an
+execution resolves a function once, without a database round trip on a hit.
+The cache is a bounded LRU of immutable snapshots keyed by (namespace, name).
+
+It also builds namespace bundles: the active functions of a user's allowed
+namespaces, versioned by a hash of their code, which the pools preload into
+executor containers for in-process function-to-function calls. Any change
+to a function produces a new bundle version. Only namespaces a function
+actually references (as `namespace.name`, found by an AST scan) and the
+namespaces those members reference in turn are preloaded.
+
+Entries are dropped on "functions" invalidation events (published by the
+functions API and config apply). The Redis resource version is re-checked
+periodically; a missed event flushes the whole cache.
+"""
+import ast
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.invalidation import get_resource_version, invalidation_listener
+from app.models.function import Function
+
+logger = logging.getLogger(__name__)
+
+FUNCTION_RESOURCE = "functions"
+FUNCTION_CACHE_MAX_ENTRIES = 512
+BUNDLE_CACHE_MAX_ENTRIES = 256
+VERSION_CHECK_INTERVAL = 5.0  # seconds between Redis version checks
+
+
+def referenced_names(code: str) -> frozenset[str]:
+    """Names used as `name.attribute` in code: the namespaces it may call into."""
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return frozenset()
+    return frozenset(
+        node.value.id
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+    )
+
+
+@dataclass(frozen=True)
+class FunctionDefinition:
+    """Immutable snapshot of the function fields needed to execute it."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    namespace: str
+    name: str
+    code: str
+    input_schema: dict[str, Any]
+    output_schema: dict[str, Any]
+    enabled_namespaces: list[str]
+    shared_pool: bool
+    requires_approval: bool
+    reuse_module_state: bool
+    code_hash: str
+    cache_ttl: Optional[int] = None
+    cache_key_fields: Optional[tuple[str, ...]] = None
+    cache_shared: bool = False
+    cache_max_bytes: int = 1_000_000
+    queue_lane: Optional[str] = None
+    referenced_names: frozenset[str] = frozenset()
+
+    @classmethod
+    def from_model(cls, function: Function) -> "FunctionDefinition":
+        return cls(
+            id=function.id,
+            user_id=function.user_id,
+            namespace=function.namespace,
+            name=function.name,
+            code=function.code,
+            input_schema=function.input_schema,
+            output_schema=function.output_schema,
+            enabled_namespaces=function.enabled_namespaces or [],
+            shared_pool=function.shared_pool,
+            requires_approval=function.requires_approval,
+            reuse_module_state=function.reuse_module_state,
+            code_hash=hashlib.sha256(function.code.encode("utf-8")).hexdigest(),
+            cache_ttl=function.cache_ttl,
+            cache_key_fields=tuple(function.cache_key_fields)
+            if function.cache_key_fields
+            else None,
+            cache_shared=bool(function.cache_shared),
+            cache_max_bytes=function.cache_max_bytes,
+            queue_lane=function.queue_lane,
+            referenced_names=referenced_names(function.code),
+        )
+
+
+@dataclass(frozen=True)
+class FunctionBundle:
+    """Code of the functions in a set of namespaces, as sent to executor containers."""
+
+    version: str
+    functions: dict[str, dict[str, dict[str, str]]]  # namespace -> name -> {"code": ...}
+    # namespace -> names its members reference (see referenced_names)
+    references: dict[str, frozenset[str]] = field(default_factory=dict)
+    # frozenset of namespaces -> bundle of just those namespaces
+    _subsets: dict[frozenset[str], "FunctionBundle"] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    @classmethod
+    def from_functions(
+        cls, functions: dict[str, dict[str, dict[str, str]]]
+    ) -> "FunctionBundle":
+        members = [
+            [namespace, name, functions[namespace][name]["code"]]
+            for namespace in sorted(functions)
+            for name in sorted(functions[namespace])
+        ]
+        version = hashlib.sha256(json.dumps(members).encode("utf-8")).hexdigest()
+        references: dict[str, frozenset[str]] = {}
+        for namespace, _, code in members:
+            references[namespace] = references.get(namespace, frozenset()) | referenced_names(code)
+        return cls(version=version, functions=functions, references=references)
+
+    @classmethod
+    def from_models(cls, functions: list[Function]) -> "FunctionBundle":
+        bundle: dict[str, dict[str, dict[str, str]]] = {}
+        for function in functions:
+            bundle.setdefault(function.namespace, {})[function.name] = {"code": function.code}
+        return cls.from_functions(bundle)
+
+    def subset(self, namespaces: frozenset[str]) -> "FunctionBundle":
+        """Bundle of only the given namespaces (memoized)."""
+        if namespaces >= self.functions.keys():
+            return self
+        bundle = self._subsets.get(namespaces)
+        if bundle is None:
+            bundle = FunctionBundle.from_functions(
+                {ns: members for ns, members in self.functions.items() if ns in namespaces}
+            )
+            self._subsets[namespaces] = bundle
+        return bundle
+
+
+class FunctionCache:
+    """Bounded LRU of active functions, invalidated across processes."""
+
+    def __init__(self, max_entries: int = FUNCTION_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str], FunctionDefinition] = OrderedDict()
+        # (user_id, namespaces) -> bundle
+        self._bundles: OrderedDict[tuple[str, tuple[str, ...]], FunctionBundle] = OrderedDict()
+        self._version = -1
+        self._last_version_check = 0.0
+        # Bumped on every invalidation so a load racing with one is not stored
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        invalidation_listener.register(FUNCTION_RESOURCE, self._on_invalidate)
+
+    def _on_invalidate(self, resource_id: Optional[str], version: int) -> None:
+        if resource_id is None or version != self._version + 1:
+            # Unknown scope or a gap in versions: start over
+            self.clear()
+        else:
+            self.invalidate(resource_id)
+        self._version = version
+
+    def invalidate(self, function_id: str) -> None:
+        """Drop the cached definition of a function (by id)."""
+        self._generation += 1
+        for key, definition in list(self._entries.items()):
+            if str(definition.id) == function_id:
+                del self._entries[key]
+        # Bundles do not track member ids; any change rebuilds them
+        self._bundles.clear()
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._bundles.clear()
+
+    async def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if now - self._last_version_check < VERSION_CHECK_INTERVAL:
+            return
+        self._last_version_check = now
+        try:
+            version = await get_resource_version(FUNCTION_RESOURCE)
+        except Exception as e:
+            logger.warning(f"Function cache version check failed: {e}")
+            return
+        if version != self._version:
+            self.clear()
+            self._version = version
+
+    async def get(
+        self, db: AsyncSession, namespace: str, name: str
+    ) -> Optional[FunctionDefinition]:
+        """Active function by namespace/name, or None if missing or inactive."""
+        await self._ensure_fresh()
+
+        key = (namespace, name)
+        definition = self._entries.get(key)
+        if definition is not None:
+            self._entries.move_to_end(key)
+            return definition
+
+        async with self._lock:
+            definition = self._entries.get(key)
+            if definition is not None:
+                return definition
+
+            generation = self._generation
+            result = await db.execute(
+                select(Function).where(
+                    Function.namespace == namespace,
+                    Function.name == name,
+                    Function.is_active == True,
+                )
+            )
+            function = result.scalar_one_or_none()
+            if function is None:
+                return None
+
+            definition = FunctionDefinition.from_model(function)
+            if generation == self._generation:
+                self._entries[key] = definition
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            return definition
+
+    async def get_bundle(
+        self, db: AsyncSession, user_id: str, namespaces: list[str]
+    ) -> FunctionBundle:
+        """Bundle of the user's active functions in the given namespaces."""
+        await self._ensure_fresh()
+
+        key = (str(user_id), tuple(sorted(set(namespaces))))
+        bundle = self._bundles.get(key)
+        if bundle is not None:
+            self._bundles.move_to_end(key)
+            return bundle
+
+        generation = self._generation
+        result = await db.execute(
+            select(Function).where(
+                Function.is_active == True,
+                Function.namespace.in_(key[1]),
+                Function.user_id == user_id,
+            )
+        )
+        bundle = FunctionBundle.from_models(list(result.scalars().all()))
+        if generation == self._generation:
+            self._bundles[key] = bundle
+            while len(self._bundles) > BUNDLE_CACHE_MAX_ENTRIES:
+                self._bundles.popitem(last=False)
+        return bundle
+
+    async def get_call_bundle(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        function: FunctionDefinition,
+        enabled_namespaces: list[str],
+    ) -> Optional[FunctionBundle]:
+        """
+        Bundle a function needs for nested calls, or None if it makes none.
+
+        A function may call into its own namespace and its enabled_namespaces.
+        Only the ones its code references are included, plus whatever the
+        included members reference in turn.
+        """
+        allowed = {function.namespace, *enabled_namespaces}
+        needed = set(function.referenced_names & allowed)
+        if not needed:
+            return None
+
+        bundle = await self.get_bundle(db, user_id, list(allowed))
+        frontier = list(needed)
+        while frontier:
+            for name in bundle.references.get(frontier.pop(), frozenset()) & allowed:
+                if name not in needed:
+                    needed.add(name)
+                    frontier.append(name)
+
+        needed &= bundle.functions.keys()
+        if not needed:
+            return None
+        return bundle.subset(frozenset(needed))
+
+
+# Global instance
+function_cache = FunctionCache()
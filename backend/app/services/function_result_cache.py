@@ -0,0 +1,181 @@
+"""Result cache for deterministic functions.
+
+Opt-in per Function (cache_ttl). A cached result is keyed by function id, the
+hash of its code (so any code change starts from an empty cache), the calling
+user and a digest of the canonical JSON of the input fields listed in
+cache_key_fields (the whole input when unset). With cache_shared the user is
+left out and results are shared across callers: only set it for functions
+whose output depends on nothing but those input fields.
+
+queue_service.enqueue_and_wait consults the cache before enqueueing and
+stores successful results afterwards; paused (awaiting input) executions and
+results above cache_max_bytes are not cached. A hit still records an
+Execution row, flagged cached, so audits see every call.
+
+Results live in Redis; per-function hit/miss counters are kept in a Redis hash.
+"""
+import hashlib
+import json
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.database import AsyncSessionLocal
+from app.core.redis import get_redis
+from app.models.execution import Execution, ExecutionStatus
+from app.models.function import Function
+from app.services.function_cache import FunctionDefinition, function_cache
+
+logger = logging.getLogger(__name__)
+
+FUNCTION_CACHE_PREFIX = "sinas:fcache:result:"
+FUNCTION_CACHE_STATS_PREFIX = "sinas:fcache:stats:"
+
+FUNCTION_CACHE_STATS = ("hits", "misses", "oversize")
+
+
+@dataclass(frozen=True)
+class CachedResult:
+    """A cache hit (the result itself may be None)."""
+
+    value: Any
+
+
+def _cacheable(result: Any) -> bool:
+    # Generator functions that paused for input return a status dict
+    return not (isinstance(result, dict) and result.get("status") == "awaiting_input")
+
+
+class FunctionResultCache:
+    """Memoizes function results in Redis according to each function's policy."""
+
+    async def get_policy(self, namespace: str, name: str) -> Optional[FunctionDefinition]:
+        """The function if it has caching enabled, else None."""
+        try:
+            async with AsyncSessionLocal() as db:
+                definition = await function_cache.get(db, namespace, name)
+        except Exception as e:
+            logger.warning(f"Function cache policy lookup failed for {namespace}/{name}: {e}")
+            return None
+        if definition is None or not definition.cache_ttl:
+            return None
+        return definition
+
+    def cache_key(
+        self, definition: FunctionDefinition, input_data: dict[str, Any], user_id: str
+    ) -> str:
+        input_data = input_data or {}
+        if definition.cache_key_fields:
+            selected = {field: input_data.get(field) for field in definition.cache_key_fields}
+        else:
+            selected = input_data
+        canonical = json.dumps(selected, sort_keys=True, separators=(",", ":"), default=str)
+        digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        scope = "shared" if definition.cache_shared else f"user:{user_id}"
+        return (
+            f"{FUNCTION_CACHE_PREFIX}{definition.id}:{definition.code_hash[:16]}:{scope}:{digest}"
+        )
+
+    async def _record(self, definition: FunctionDefinition, stat: str) -> None:
+        try:
+            redis = await get_redis()
+            await redis.hincrby(f"{FUNCTION_CACHE_STATS_PREFIX}{definition.id}", stat, 1)
+        except Exception as e:
+            logger.debug(f"Failed to record function cache stat: {e}")
+
+    async def lookup(
+        self, definition: FunctionDefinition, input_data: dict[str, Any], user_id: str
+    ) -> tuple[Optional[str], Optional[CachedResult]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            (cache key, cached result) — key is None when the cache is
+            unavailable, result is None on a miss
+        """
+        name = f"{definition.namespace}/{definition.name}"
+        try:
+            key = self.cache_key(definition, input_data, user_id)
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Function cache read failed for {name}: {e}")
+            return None, None
+
+        if raw is None:
+            await self._record(definition, "misses")
+            return key, None
+
+        await self._record(definition, "hits")
+        return key, CachedResult(json.loads(raw))
+
+    async def store(self, definition: FunctionDefinition, key: str, result: Any) -> None:
+        if not _cacheable(result):
+            return
+        payload = json.dumps(result, default=str)
+        if len(payload) > definition.cache_max_bytes:
+            await self._record(definition, "oversize")
+            return
+
+        try:
+            redis = await get_redis()
+            await redis.set(key, payload, ex=definition.cache_ttl)
+        except Exception as e:
+            logger.warning(
+                f"Function cache write failed for {definition.namespace}/{definition.name}: {e}"
+            )
+
+    async def record_hit(
+        self,
+        definition: FunctionDefinition,
+        input_data: dict[str, Any],
+        result: Any,
+        execution_id: str,
+        trigger_type: str,
+        trigger_id: str,
+        user_id: str,
+        chat_id: Optional[str] = None,
+    ) -> None:
+        """Record a completed, cached Execution for a call answered from the cache."""
+        now = datetime.now(timezone.utc)
+        try:
+            async with AsyncSessionLocal() as db:
+                db.add(
+                    Execution(
+                        user_id=uuid.UUID(str(user_id)),
+                        execution_id=execution_id,
+                        function_name=definition.name,
+                        trigger_type=trigger_type,
+                        trigger_id=trigger_id,
+                        chat_id=chat_id,
+                        status=ExecutionStatus.COMPLETED,
+                        input_data=input_data,
+                        output_data=result,
+                        started_at=now,
+                        completed_at=now,
+                        duration_ms=0,
+                        cached=True,
+                    )
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Failed to record cached execution {execution_id}: {e}")
+
+    async def get_stats(self, function: Function) -> dict[str, Any]:
+        """Hit/miss counters for a function."""
+        redis = await get_redis()
+        raw = await redis.hgetall(f"{FUNCTION_CACHE_STATS_PREFIX}{function.id}")
+        stats: dict[str, Any] = {stat: int(raw.get(stat, 0)) for stat in FUNCTION_CACHE_STATS}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["enabled"] = bool(function.cache_ttl)
+        stats["ttl"] = function.cache_ttl
+        stats["key_fields"] = function.cache_key_fields
+        stats["shared"] = bool(function.cache_shared)
+        return stats
+
+
+# Global instance
+function_result_cache = FunctionResultCache()
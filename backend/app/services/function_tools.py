@@ -1,20 +1,26 @@
 """Function-to-tool converter for LLM tool calling."""
+import asyncio
 import logging
 import uuid
+from collections.abc import Awaitable, Callable
 from typing import Any, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_user_permissions
+from app.core.database import release_connection
 from app.core.permissions import check_permission
 from app.models.function import Function
 from app.services.template_renderer import render_function_parameters
 
 from app.models.execution import TriggerType
 from app.services.execution_engine import FunctionExecutionError, executor
+from app.services.stream_relay import execution_channel, stream_relay
 
 logger = logging.getLogger(__name__)
 
+PROGRESS_DRAIN_TIMEOUT = 2.0  # seconds to wait for trailing progress events after the result
+
 
 class FunctionToolConverter:
     """Converts functions to OpenAI tool format and manages execution."""
@@ -189,6 +195,7 @@ class FunctionToolConverter:
         locked_params: Optional[dict[str, Any]] = None,
         overridable_params: Optional[dict[str, Any]] = None,
         enabled_functions: Optional[list[str]] = None,
+        on_progress: Optional[Callable[[Any], Awaitable[None]]] = None,
     ) -> dict[str, Any]:
         """
         Execute a function as a tool call.
@@ -203,6 +210,7 @@ class FunctionToolConverter:
             locked_params: Locked parameters (always applied, LLM cannot override)
             overridable_params: Overridable parameters (applied as defaults, LLM can override)
             enabled_functions: List of enabled functions for validation
+            on_progress: Called with each progress event the function yields
 
         Returns:
             Tool execution result
@@ -285,8 +293,19 @@ class FunctionToolConverter:
         # Generate execution ID
         execution_id = str(uuid.uuid4())
 
+        progress_started = asyncio.Event()
+        relay_task = None
+        if on_progress is not None:
+            relay_task = asyncio.create_task(
+                self._relay_progress(execution_id, on_progress, progress_started)
+            )
+
+        # Don't hold a database connection while the function runs
+        await release_connection(db)
+
         try:
-            # Enqueue function and wait for result via queue
+            # Enqueue function and wait for result via queue (answered from the
+            # result cache when the function has a cache policy)
             from app.services.queue_service import queue_service
 
             result = await queue_service.enqueue_and_wait(
@@ -314,3 +333,31 @@ class FunctionToolConverter:
         except Exception as e:
             logger.error(f"Function execution failed: {e}")
             return {"error": "Function execution failed", "message": str(e)}
+        finally:
+            if relay_task is not None:
+                await self._stop_relay(relay_task, progress_started)
+
+    async def _relay_progress(
+        self,
+        execution_id: str,
+        on_progress: Callable[[Any], Awaitable[None]],
+        started: asyncio.Event,
+    ) -> None:
+        """Forward the progress events of an execution until its stream terminates."""
+        async for event in stream_relay.subscribe(execution_channel(execution_id)):
+            if event.get("type") == "progress":
+                started.set()
+                try:
+                    await on_progress(event.get("data"))
+                except Exception as e:
+                    logger.warning(f"Failed to forward progress of {execution_id}: {e}")
+
+    async def _stop_relay(self, relay_task: asyncio.Task, started: asyncio.Event) -> None:
+        # A stream that carried progress is terminated by the worker; let the
+        # relay catch up with it. Without progress there is nothing to wait for.
+        if started.is_set():
+            try:
+                await asyncio.wait_for(relay_task, timeout=PROGRESS_DRAIN_TIMEOUT)
+            except Exception:
+                pass
+        relay_task.cancel()
@@ -0,0 +1,246 @@
+"""Idempotency keys and request coalescing for function executions.
+
+A request carrying an idempotency key (the Idempotency-Key header, or a
+webhook's idempotency_key expression) claims the key in Redis before any
+work is enqueued:
+
+    sinas:idem:{sha256(scope|key)} -> {"execution_id", "status", "fingerprint", ...}
+
+- The first request runs the function. Its result is stored under the key
+  for settings.idempotency_window seconds and replayed to duplicates.
+- Duplicates that arrive while it runs attach to it: in the same process
+  through a shared future, elsewhere through a Redis pub/sub notification
+  (with polling as a fallback). No new execution is created.
+- A failed execution releases the key, so a retry runs again. A request
+  that times out waiting keeps the claim; the worker finishes it.
+- Queued (fire-and-forget) executions only claim the key; the worker
+  completes or releases it through the Redis key passed in the job.
+- Reusing a key with a different input raises IdempotencyConflictError.
+
+Scopes include the caller, so keys of different users never collide.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.services.blob_store import blob_store
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_PREFIX = "sinas:idem:"
+IDEMPOTENCY_DONE_CHANNEL_PREFIX = "sinas:idem:done:"
+IN_FLIGHT_GRACE = 30  # seconds a running claim outlives the execution timeout
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflictError(ValueError):
+    """The idempotency key was already used for a request with different input."""
+
+
+def _fingerprint(input_data: Any) -> str:
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class IdempotencyStore:
+    """Redis-backed idempotency records with in-process request coalescing."""
+
+    def __init__(self):
+        # Redis key -> (input fingerprint, future of (ok, execution_id, result or error))
+        self._inflight: dict[str, tuple[str, asyncio.Future]] = {}
+
+    def redis_key(self, scope: str, key: str) -> str:
+        """Redis key of an idempotency record (passed to queued jobs that finish it)."""
+        digest = hashlib.sha256(f"{scope}|{key}".encode("utf-8")).hexdigest()
+        return f"{IDEMPOTENCY_PREFIX}{digest}"
+
+    async def _get(self, redis_key: str) -> Optional[dict[str, Any]]:
+        redis = await get_redis()
+        raw = await redis.get(redis_key)
+        return json.loads(raw) if raw else None
+
+    def _check(self, record: dict[str, Any], fingerprint: str) -> None:
+        if record.get("fingerprint") != fingerprint:
+            raise IdempotencyConflictError(
+                "Idempotency key was already used for a request with different input"
+            )
+
+    async def claim(
+        self,
+        scope: str,
+        key: str,
+        execution_id: str,
+        input_data: Any,
+        ttl: Optional[int] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Claim a key for a new execution.
+
+        Returns:
+            None if the key was claimed for execution_id, otherwise the
+            existing record (whose execution_id the caller should report)
+
+        Raises:
+            IdempotencyConflictError: The key was used with a different input
+        """
+        if len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyConflictError(
+                f"Idempotency key is longer than {MAX_KEY_LENGTH} characters"
+            )
+
+        redis_key = self.redis_key(scope, key)
+        fingerprint = _fingerprint(input_data)
+        record = {"execution_id": execution_id, "status": "running", "fingerprint": fingerprint}
+        redis = await get_redis()
+        claimed = await redis.set(
+            redis_key, json.dumps(record), nx=True, ex=ttl or settings.idempotency_window
+        )
+        if claimed:
+            return None
+
+        existing = await self._get(redis_key)
+        if existing is None:
+            # Released between SET and GET (the owner failed); claim again
+            return await self.claim(scope, key, execution_id, input_data, ttl)
+        self._check(existing, fingerprint)
+        return existing
+
+    async def _finish(self, redis_key: str, record: Optional[dict[str, Any]]) -> None:
+        redis = await get_redis()
+        async with redis.pipeline(transaction=False) as pipe:
+            if record is None:
+                pipe.delete(redis_key)
+            else:
+                pipe.set(redis_key, json.dumps(record), ex=settings.idempotency_window)
+            pipe.publish(f"{IDEMPOTENCY_DONE_CHANNEL_PREFIX}{redis_key}", "1")
+            await pipe.execute()
+
+    async def complete(self, redis_key: str, execution_id: str, result: Any) -> None:
+        """Store the result of a queued execution that claimed redis_key."""
+        record = await self._get(redis_key)
+        if record is None or record.get("execution_id") != execution_id:
+            return
+        record["status"] = "completed"
+        record["result"] = await blob_store.offload(result)
+        await self._finish(redis_key, record)
+
+    async def release(self, redis_key: str, execution_id: str) -> None:
+        """Drop a claim whose execution failed or was never enqueued, so a retry runs again."""
+        record = await self._get(redis_key)
+        if record is None or record.get("execution_id") != execution_id:
+            return
+        await self._finish(redis_key, None)
+
+    async def _outcome(self, record: dict[str, Any]) -> tuple[str, Any]:
+        if record.get("status") == "completed":
+            return record["execution_id"], await blob_store.resolve(record.get("result"))
+        raise Exception(record.get("error", "Original request failed"))
+
+    async def _wait(self, redis_key: str, fingerprint: str, timeout: int) -> tuple[str, Any]:
+        """Wait for the execution that owns a key in another process."""
+        redis = await get_redis()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(f"{IDEMPOTENCY_DONE_CHANNEL_PREFIX}{redis_key}")
+        try:
+            deadline = asyncio.get_event_loop().time() + timeout
+            while asyncio.get_event_loop().time() < deadline:
+                record = await self._get(redis_key)
+                if record is None:
+                    raise Exception("Original request failed; retry to run it again")
+                self._check(record, fingerprint)
+                if record.get("status") != "running":
+                    return await self._outcome(record)
+                await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            raise TimeoutError(f"Original request timed out after {timeout}s")
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        execution_id: str,
+        input_data: Any,
+        execute: Callable[[str, str], Awaitable[Any]],
+        timeout: Optional[int] = None,
+    ) -> tuple[str, Any]:
+        """
+        Run execute(execution_id, redis_key) once per key, coalescing duplicates.
+
+        execute should pass redis_key on to the job it queues. If waiting for
+        it times out (or is cancelled) the claim stays running, and the worker
+        completes or releases it when the job finishes.
+
+        Returns:
+            (execution_id of the execution that produced the result, result)
+        """
+        timeout = timeout or settings.queue_default_timeout
+        redis_key = self.redis_key(scope, key)
+        fingerprint = _fingerprint(input_data)
+
+        inflight = self._inflight.get(redis_key)
+        if inflight is not None:
+            if inflight[0] != fingerprint:
+                raise IdempotencyConflictError(
+                    "Idempotency key was already used for a request with different input"
+                )
+            ok, owner_id, value = await asyncio.shield(inflight[1])
+            if not ok:
+                raise Exception(value)
+            return owner_id, value
+
+        existing = await self.claim(
+            scope, key, execution_id, input_data, ttl=timeout + IN_FLIGHT_GRACE
+        )
+        if existing is not None:
+            if existing.get("status") == "running":
+                return await self._wait(redis_key, fingerprint, timeout)
+            return await self._outcome(existing)
+
+        future = asyncio.get_event_loop().create_future()
+        self._inflight[redis_key] = (fingerprint, future)
+        try:
+            result = await execute(execution_id, redis_key)
+        except (TimeoutError, asyncio.CancelledError) as e:
+            # The job is still queued or running; a retry must not start another
+            future.set_result((False, execution_id, str(e) or type(e).__name__))
+            try:
+                redis = await get_redis()
+                await redis.expire(redis_key, settings.idempotency_window)
+            except Exception as extend_error:
+                logger.warning(f"Failed to extend idempotency claim: {extend_error}")
+            raise
+        except BaseException as e:
+            future.set_result((False, execution_id, str(e)))
+            try:
+                await self._finish(redis_key, None)
+            except Exception as release_error:
+                logger.warning(f"Failed to release idempotency key: {release_error}")
+            raise
+        else:
+            future.set_result((True, execution_id, result))
+            try:
+                await self._finish(
+                    redis_key,
+                    {
+                        "execution_id": execution_id,
+                        "status": "completed",
+                        "fingerprint": fingerprint,
+                        "result": await blob_store.offload(result),
+                    },
+                )
+            except Exception as store_error:
+                logger.warning(f"Failed to store idempotent result: {store_error}")
+            return execution_id, result
+        finally:
+            self._inflight.pop(redis_key, None)
+
+
+# Global instance
+idempotency_store = IdempotencyStore()
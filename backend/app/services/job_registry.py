@@ -0,0 +1,316 @@
+"""Indexed job registry for queued function and agent jobs.
+
+Each job is a Redis hash (sinas:job:record:{job_id}) plus membership in
+sorted sets scored by enqueued_at:
+
+- sinas:jobs:index:all                    every job
+- sinas:jobs:index:status:{status}        one set per status, moved atomically on transition
+- sinas:jobs:index:queue:{queue}          functions / agents
+- sinas:jobs:index:function:{ns/name}     function jobs
+- sinas:jobs:index:agent:{ns/name}        agent jobs
+
+Lifetime counters per queue and status live in the sinas:jobs:counters hash.
+Stats are ZCARDs and listing is a ZREVRANGEBYSCORE page resumed from the last
+job's (score, job_id), so neither depends on how many jobs ran in the retention
+window. Index entries older than JOB_TTL are trimmed lazily by score.
+
+Jobs enqueued before the registry existed have a JSON string under the old
+sinas:job:status:{job_id} key. They are read as-is and converted to a hash on
+their next status transition.
+"""
+import json
+import logging
+import time
+from typing import Any, Optional
+
+from redis.asyncio import Redis
+
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+JOB_STATUS_PREFIX = "sinas:job:record:"
+LEGACY_JOB_STATUS_PREFIX = "sinas:job:status:"  # JSON strings, before the registry
+JOB_INDEX_PREFIX = "sinas:jobs:index:"
+JOB_COUNTERS_KEY = "sinas:jobs:counters"
+JOB_TTL = 86400  # 24 hours
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+# Fields stored as numbers in the job hash
+_FLOAT_FIELDS = {"enqueued_at", "started_at", "finished_at"}
+
+# Atomically move a job to a new status set (keeping its enqueued_at score),
+# update hash fields, refresh TTL and bump the lifetime counter. A legacy JSON
+# record is converted to the hash first.
+# KEYS: [job hash, counters hash, target status set, legacy key, other status sets...]
+# ARGV: [job_id, status, ttl, fallback score, field1, value1, ...]
+_SET_STATUS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    local legacy = redis.call('GET', KEYS[4])
+    if legacy then
+        local ok, record = pcall(cjson.decode, legacy)
+        if ok and type(record) == 'table' then
+            for k, v in pairs(record) do
+                if type(v) == 'string' or type(v) == 'number' or type(v) == 'boolean' then
+                    redis.call('HSET', KEYS[1], k, tostring(v))
+                end
+            end
+        end
+        redis.call('DEL', KEYS[4])
+    end
+end
+local score = redis.call('HGET', KEYS[1], 'enqueued_at') or ARGV[4]
+local queue = redis.call('HGET', KEYS[1], 'queue') or 'unknown'
+for i = 5, #KEYS do
+    redis.call('ZREM', KEYS[i], ARGV[1])
+end
+redis.call('ZADD', KEYS[3], score, ARGV[1])
+redis.call('HSET', KEYS[1], 'status', ARGV[2])
+for i = 5, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('HINCRBY', KEYS[2], queue .. ':' .. ARGV[2], 1)
+return 1
+"""
+
+
+def _status_index(status: str) -> str:
+    return f"{JOB_INDEX_PREFIX}status:{status}"
+
+
+def _format_cursor(position: tuple[float, str]) -> str:
+    score, job_id = position
+    return f"{score!r}:{job_id}"
+
+
+def _parse_cursor(cursor: str) -> tuple[float, str]:
+    """(enqueued_at, job_id) of a list cursor. Raises ValueError if malformed."""
+    score, sep, job_id = cursor.partition(":")
+    if not sep or not job_id:
+        raise ValueError(f"Invalid cursor '{cursor}'")
+    return float(score), job_id
+
+
+def _decode_job(job_id: str, data: dict[str, str]) -> dict[str, Any]:
+    job: dict[str, Any] = {"job_id": job_id}
+    for key, value in data.items():
+        if key in _FLOAT_FIELDS:
+            try:
+                job[key] = float(value)
+            except ValueError:
+                job[key] = None
+        else:
+            job[key] = value
+    return job
+
+
+class JobRegistry:
+    """Create, transition, count, and list jobs using Redis hashes and sorted sets."""
+
+    def __init__(self):
+        self._set_status_script = None
+
+    async def _redis(self, redis: Optional[Redis]) -> Redis:
+        return redis if redis is not None else await get_redis()
+
+    async def create(
+        self,
+        job_id: str,
+        queue: str,
+        fields: dict[str, Any],
+        redis: Optional[Redis] = None,
+    ) -> None:
+        """Register a newly enqueued job in the queued state."""
+        redis = await self._redis(redis)
+        now = time.time()
+
+        mapping = {k: str(v) for k, v in fields.items() if v is not None}
+        mapping.update({"status": "queued", "queue": queue, "enqueued_at": str(now)})
+
+        index_keys = [
+            f"{JOB_INDEX_PREFIX}all",
+            f"{JOB_INDEX_PREFIX}queue:{queue}",
+        ]
+        if fields.get("function"):
+            index_keys.append(f"{JOB_INDEX_PREFIX}function:{fields['function']}")
+        if fields.get("agent"):
+            index_keys.append(f"{JOB_INDEX_PREFIX}agent:{fields['agent']}")
+
+        hash_key = f"{JOB_STATUS_PREFIX}{job_id}"
+        cutoff = now - JOB_TTL
+
+        async with redis.pipeline(transaction=True) as pipe:
+            # A re-enqueued job (e.g. resume) starts from a clean record
+            pipe.delete(hash_key)
+            pipe.hset(hash_key, mapping=mapping)
+            pipe.expire(hash_key, JOB_TTL)
+            for status in JOB_STATUSES:
+                if status != "queued":
+                    pipe.zrem(_status_index(status), job_id)
+            for key in [*index_keys, _status_index("queued")]:
+                pipe.zadd(key, {job_id: now})
+                pipe.zremrangebyscore(key, "-inf", cutoff)
+            pipe.hincrby(JOB_COUNTERS_KEY, f"{queue}:queued", 1)
+            await pipe.execute()
+
+    async def set_status(
+        self,
+        job_id: str,
+        status: str,
+        redis: Optional[Redis] = None,
+        **fields: Any,
+    ) -> None:
+        """Transition a job to a new status and update extra hash fields."""
+        redis = await self._redis(redis)
+        if self._set_status_script is None:
+            self._set_status_script = redis.register_script(_SET_STATUS_SCRIPT)
+
+        now = time.time()
+        if status == "running":
+            fields.setdefault("started_at", now)
+        elif status in ("completed", "failed"):
+            fields.setdefault("finished_at", now)
+
+        keys = [
+            f"{JOB_STATUS_PREFIX}{job_id}",
+            JOB_COUNTERS_KEY,
+            _status_index(status),
+            f"{LEGACY_JOB_STATUS_PREFIX}{job_id}",
+            *[_status_index(s) for s in JOB_STATUSES if s != status],
+        ]
+        args: list[Any] = [job_id, status, JOB_TTL, now]
+        for key, value in fields.items():
+            if value is not None:
+                args.extend([key, str(value)])
+
+        await self._set_status_script(keys=keys, args=args, client=redis)
+
+    async def get(self, job_id: str, redis: Optional[Redis] = None) -> Optional[dict[str, Any]]:
+        """Get a job record, or None if unknown/expired."""
+        redis = await self._redis(redis)
+        data = await redis.hgetall(f"{JOB_STATUS_PREFIX}{job_id}")
+        if not data:
+            legacy = await redis.get(f"{LEGACY_JOB_STATUS_PREFIX}{job_id}")
+            return json.loads(legacy) if legacy else None
+        job = _decode_job(job_id, data)
+        job.pop("job_id")
+        return job
+
+    async def status_counts(self, redis: Optional[Redis] = None) -> dict[str, int]:
+        """Count jobs per status within the retention window."""
+        redis = await self._redis(redis)
+        cutoff = time.time() - JOB_TTL
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for status in JOB_STATUSES:
+                pipe.zremrangebyscore(_status_index(status), "-inf", cutoff)
+                pipe.zcard(_status_index(status))
+            results = await pipe.execute()
+
+        return {status: results[i * 2 + 1] for i, status in enumerate(JOB_STATUSES)}
+
+    async def counters(self, redis: Optional[Redis] = None) -> dict[str, dict[str, int]]:
+        """Lifetime job counters, grouped by queue then status."""
+        redis = await self._redis(redis)
+        raw = await redis.hgetall(JOB_COUNTERS_KEY)
+        counters: dict[str, dict[str, int]] = {}
+        for field, value in raw.items():
+            queue, _, status = field.partition(":")
+            counters.setdefault(queue, {})[status] = int(value)
+        return counters
+
+    async def list(
+        self,
+        status: Optional[str] = None,
+        queue: Optional[str] = None,
+        function: Optional[str] = None,
+        agent: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        redis: Optional[Redis] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """
+        List jobs newest first.
+
+        The most selective index is scanned (status, then function, agent,
+        queue), remaining filters are applied to the loaded hashes.
+
+        Args:
+            cursor: "enqueued_at:job_id" of the last job of the previous page
+                (exclusive), so jobs enqueued at the same instant are not skipped
+
+        Returns:
+            (jobs, next_cursor) — next_cursor is None when there are no more jobs
+
+        Raises:
+            ValueError: Malformed cursor
+        """
+        redis = await self._redis(redis)
+
+        if status:
+            index_key = _status_index(status)
+        elif function:
+            index_key = f"{JOB_INDEX_PREFIX}function:{function}"
+        elif agent:
+            index_key = f"{JOB_INDEX_PREFIX}agent:{agent}"
+        elif queue:
+            index_key = f"{JOB_INDEX_PREFIX}queue:{queue}"
+        else:
+            index_key = f"{JOB_INDEX_PREFIX}all"
+
+        filters = {"status": status, "queue": queue, "function": function, "agent": agent}
+        filters = {k: v for k, v in filters.items() if v}
+
+        cutoff = time.time() - JOB_TTL
+        await redis.zremrangebyscore(index_key, "-inf", cutoff)
+
+        jobs: list[dict[str, Any]] = []
+        position = _parse_cursor(cursor) if cursor else None
+        batch_size = max(limit, 50)
+
+        while len(jobs) < limit:
+            if position is None:
+                entries = await redis.zrevrangebyscore(
+                    index_key, "+inf", cutoff, start=0, num=batch_size, withscores=True
+                )
+                older = entries
+            else:
+                # Jobs enqueued at the same instant as the last one returned
+                # (rare, usually none) come first, ordered like ZREVRANGE
+                last_score, last_id = position
+                ties = await redis.zrevrangebyscore(
+                    index_key, last_score, last_score, withscores=True
+                )
+                older = await redis.zrevrangebyscore(
+                    index_key, f"({last_score}", cutoff, start=0, num=batch_size, withscores=True
+                )
+                entries = [(job_id, score) for job_id, score in ties if job_id < last_id] + older
+            if not entries:
+                return jobs, None
+
+            async with redis.pipeline(transaction=False) as pipe:
+                for job_id, _ in entries:
+                    pipe.hgetall(f"{JOB_STATUS_PREFIX}{job_id}")
+                hashes = await pipe.execute()
+
+            for (job_id, score), data in zip(entries, hashes):
+                position = (score, job_id)
+                if not data:
+                    continue
+                job = _decode_job(job_id, data)
+                if any(job.get(k) != v for k, v in filters.items()):
+                    continue
+                jobs.append(job)
+                if len(jobs) == limit:
+                    return jobs, _format_cursor(position)
+
+            if len(older) < batch_size:
+                return jobs, None
+
+        return jobs, None
+
+
+# Global instance
+job_registry = JobRegistry()
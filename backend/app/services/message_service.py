@@ -5,7 +5,7 @@ import logging
 import time
 import traceback
 import uuid
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 from datetime import UTC, datetime
 from typing import Any, Optional
 
@@ -13,6 +13,7 @@ import jsonschema
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.database import AsyncSessionLocal, release_connection
 from app.models import Agent, Chat, Message
 from app.models.execution import Execution, ExecutionStatus
 from app.models.function import Function
@@ -373,6 +374,9 @@ class MessageService:
         # Strip _metadata from tools before sending to LLM
         clean_tools = self._strip_tool_metadata(prep["tools"])
 
+        # Context is loaded; don't hold a database connection while the LLM answers
+        await release_connection(self.db)
+
         response = await prep["llm_provider"].complete(
             messages=prep["messages"],
             model=prep["final_model"],
@@ -430,7 +434,7 @@ class MessageService:
             result = await self.db.execute(
                 select(Message)
                 .where(Message.chat_id == chat_id)
-                .order_by(Message.created_at.desc())
+                .order_by(Message.seq.desc())
                 .limit(1)
             )
             return result.scalar_one()
@@ -544,6 +548,9 @@ class MessageService:
         # Strip _metadata from tools before sending to LLM (keep original tools for later lookup)
         clean_tools = self._strip_tool_metadata(tools)
 
+        # Context is loaded; don't hold a database connection while the LLM streams
+        await release_connection(self.db)
+
         async for chunk in llm_provider.stream(
             messages=messages,
             model=final_model,
@@ -891,7 +898,7 @@ class MessageService:
         from app.core.config import settings
 
         result = await self.db.execute(
-            select(Message).where(Message.chat_id == chat.id).order_by(Message.created_at)
+            select(Message).where(Message.chat_id == chat.id).order_by(Message.seq)
         )
         all_messages = result.scalars().all()
 
@@ -1242,13 +1249,6 @@ class MessageService:
         if agent_id_str not in enabled_agent_ids:
             return {"error": f"Agent {agent_id_str} not enabled for this agent"}
 
-        # Load agent
-        result = await self.db.execute(select(Agent).where(Agent.id == agent_id_str))
-        agent = result.scalar_one_or_none()
-
-        if not agent:
-            return {"error": f"Agent not found: {agent_id_str}"}
-
         # Prepare input data for the agent
         # Filter out internal _* parameters and extract prompt
         user_arguments = {k: v for k, v in arguments.items() if not k.startswith("_")}
@@ -1258,26 +1258,33 @@ class MessageService:
         # Resume existing chat or create a new one
         resume_chat_id = arguments.get("_chat_id")
         try:
-            if resume_chat_id:
-                # Verify the chat exists, belongs to this user and agent
-                result = await self.db.execute(
-                    select(Chat).where(
-                        Chat.id == resume_chat_id,
-                        Chat.user_id == user_id,
-                        Chat.agent_id == agent_id_str,
+            # Own short session, closed before waiting on the sub-agent
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Agent).where(Agent.id == agent_id_str))
+                agent = result.scalar_one_or_none()
+                if not agent:
+                    return {"error": f"Agent not found: {agent_id_str}"}
+
+                if resume_chat_id:
+                    # Verify the chat exists, belongs to this user and agent
+                    result = await db.execute(
+                        select(Chat).where(
+                            Chat.id == resume_chat_id,
+                            Chat.user_id == user_id,
+                            Chat.agent_id == agent_id_str,
+                        )
+                    )
+                    sub_chat = result.scalar_one_or_none()
+                    if not sub_chat:
+                        return {"error": f"Chat {resume_chat_id} not found or does not belong to this agent"}
+                    logger.info(f"Resuming sub-agent chat {sub_chat.id} with {agent.namespace}/{agent.name}")
+                else:
+                    sub_chat = await MessageService(db).create_chat_with_agent(
+                        agent_id=str(agent.id),
+                        user_id=user_id,
+                        input_data=input_data,
+                        name=f"Sub-chat: {agent.name}",
                     )
-                )
-                sub_chat = result.scalar_one_or_none()
-                if not sub_chat:
-                    return {"error": f"Chat {resume_chat_id} not found or does not belong to this agent"}
-                logger.info(f"Resuming sub-agent chat {sub_chat.id} with {agent.namespace}/{agent.name}")
-            else:
-                sub_chat = await self.create_chat_with_agent(
-                    agent_id=str(agent.id),
-                    user_id=user_id,
-                    input_data=input_data,
-                    name=f"Sub-chat: {agent.name}",
-                )
 
             # Route agent-to-agent calls through the queue so each sub-agent
             # runs in its own worker — enables agent swarms without recursive blocking.
@@ -1316,6 +1323,42 @@ class MessageService:
             logger.error(f"Failed to execute agent tool {tool_name}: {e}")
             return {"error": str(e)}
 
+    def _progress_forwarder(
+        self, progress: Optional[asyncio.Queue], tool_call: dict[str, Any]
+    ) -> Optional[Callable[[Any], Awaitable[None]]]:
+        """Callback turning a function's progress events into tool_progress chunks."""
+        if progress is None:
+            return None
+
+        async def forward(event: Any) -> None:
+            await progress.put(
+                {
+                    "type": "tool_progress",
+                    "tool_call_id": tool_call["id"],
+                    "name": tool_call["function"]["name"],
+                    "data": event,
+                }
+            )
+
+        return forward
+
+    async def _stream_tool_progress(
+        self, task: asyncio.Task, progress: asyncio.Queue
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Yield queued tool_progress chunks until the tool task finishes."""
+        while True:
+            if not progress.empty():
+                yield progress.get_nowait()
+                continue
+            if task.done():
+                return
+            getter = asyncio.ensure_future(progress.get())
+            await asyncio.wait({task, getter}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+
     def _is_sequential_tool(self, tool_name: str) -> bool:
         """Check if a tool must be executed sequentially (not parallelizable)."""
         return tool_name.startswith("call_agent_") or tool_name == "continue_execution"
@@ -1327,15 +1370,17 @@ class MessageService:
         user_id: str,
         user_token: str,
         tools: list[dict[str, Any]],
+        progress: Optional[asyncio.Queue] = None,
     ) -> tuple[str, str, str]:
         """
         Execute a single tool call. Uses its own DB session for parallel safety.
 
+        Progress events of streaming functions are put on the progress queue
+        as tool_progress chunks.
+
         Returns:
             Tuple of (tool_call_id, tool_name, result_content)
         """
-        from app.core.database import AsyncSessionLocal
-
         tool_name = tool_call["function"]["name"]
         arguments_str = tool_call["function"]["arguments"]
 
@@ -1395,6 +1440,7 @@ class MessageService:
                         if fn:
                             fn_ns, fn_name = fn.namespace, fn.name
 
+                    await release_connection(db)
                     result = await queue_service.enqueue_and_wait(
                         function_namespace=fn_ns,
                         function_name=fn_name,
@@ -1422,6 +1468,7 @@ class MessageService:
                             )
                             enabled_agent_ids = [str(a.id) for a in resolved]
 
+                    await release_connection(db)
                     result = await self._execute_agent_tool(
                         chat=chat,
                         user_id=user_id,
@@ -1540,6 +1587,7 @@ class MessageService:
                             locked_params=locked_params,
                             overridable_params=overridable_params,
                             enabled_functions=enabled_function_list,
+                            on_progress=self._progress_forwarder(progress, tool_call),
                         )
 
                     elapsed = time.time() - start_time
@@ -1554,6 +1602,96 @@ class MessageService:
 
         return (tool_call["id"], tool_name, result_content)
 
+    async def _execute_query_tool_batch(
+        self,
+        tool_calls: list[dict[str, Any]],
+        chat_id: str,
+        user_id: str,
+        tools: list[dict[str, Any]],
+    ) -> list[tuple[str, str, str]]:
+        """
+        Execute several query tool calls together. Uses its own DB session.
+
+        Agent, user and permissions are loaded once, and calls against the same
+        database connection share one pooled connection.
+
+        Returns:
+            (tool_call_id, tool_name, result_content) per call, in order
+        """
+        from app.models.user import User
+
+        results: list[Optional[tuple[str, str, str]]] = [None] * len(tool_calls)
+        calls = []
+        call_indexes = []
+
+        for i, tc in enumerate(tool_calls):
+            tool_name = tc["function"]["name"]
+            arguments_str = tc["function"]["arguments"]
+            try:
+                if isinstance(arguments_str, str):
+                    arguments = json.loads(arguments_str) if arguments_str.strip() else {}
+                else:
+                    arguments = arguments_str
+            except json.JSONDecodeError as e:
+                logger.error(f"Failed to parse tool arguments for {tool_name}: {e}")
+                results[i] = (
+                    tc["id"],
+                    tool_name,
+                    json.dumps({
+                        "error": f"Invalid JSON arguments: {str(e)}",
+                        "raw_arguments": arguments_str[:200],
+                    }),
+                )
+                continue
+
+            tool_metadata = {}
+            for tool in tools:
+                if tool.get("function", {}).get("name") == tool_name:
+                    tool_metadata = tool.get("function", {}).get("_metadata", {})
+                    break
+
+            calls.append((
+                tool_name,
+                arguments,
+                tool_metadata.get("locked_params", {}),
+                tool_metadata.get("overridable_params", {}),
+            ))
+            call_indexes.append(i)
+
+        if calls:
+            start_time = time.time()
+            async with AsyncSessionLocal() as db:
+                result_chat = await db.execute(select(Chat).where(Chat.id == chat_id))
+                chat = result_chat.scalar_one_or_none()
+
+                # Get enabled queries list from agent
+                enabled_query_list = []
+                if chat and chat.agent_id:
+                    result_agent = await db.execute(select(Agent).where(Agent.id == chat.agent_id))
+                    chat_agent = result_agent.scalar_one_or_none()
+                    if chat_agent:
+                        enabled_query_list = chat_agent.enabled_queries or []
+
+                # Get user email for context injection
+                user_result = await db.execute(select(User).where(User.id == user_id))
+                user_obj = user_result.scalar_one_or_none()
+
+                batch_results = await self.query_converter.execute_query_tools_batch(
+                    db=db,
+                    calls=calls,
+                    user_id=user_id,
+                    user_email=user_obj.email if user_obj else None,
+                    enabled_queries=enabled_query_list,
+                )
+
+            for i, (tool_name, *_), result in zip(call_indexes, calls, batch_results):
+                results[i] = (tool_calls[i]["id"], tool_name, json.dumps(result))
+
+            elapsed = time.time() - start_time
+            logger.debug(f"Query batch of {len(calls)} completed in {elapsed:.3f}s")
+
+        return results
+
     async def _handle_tool_calls(
         self,
         chat_id: str,
@@ -1587,7 +1725,7 @@ class MessageService:
                     Message.role == "assistant",
                     Message.tool_calls.isnot(None),
                 )
-                .order_by(Message.created_at.desc())
+                .order_by(Message.seq.desc())
                 .limit(10)
             )
             for msg in result.scalars().all():
@@ -1620,29 +1758,75 @@ class MessageService:
         # Collect all results preserving original order
         tool_results: dict[str, tuple[str, str, str]] = {}  # tool_call_id -> (id, name, content)
 
-        # Execute parallel tools concurrently
-        if parallel_calls:
-            parallel_tasks = [
-                self._execute_single_tool(tc, chat_id, user_id, user_token, tools)
-                for tc in parallel_calls
+        # Several query calls in one turn run as a batch (one connection per database)
+        query_calls = [tc for tc in parallel_calls if tc["function"]["name"].startswith("query_")]
+        if len(query_calls) > 1:
+            parallel_calls = [
+                tc for tc in parallel_calls if not tc["function"]["name"].startswith("query_")
             ]
-            parallel_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
-            for i, res in enumerate(parallel_results):
-                tc = parallel_calls[i]
-                if isinstance(res, Exception):
-                    logger.error(f"Parallel tool execution failed: {res}")
-                    tool_results[tc["id"]] = (
-                        tc["id"],
-                        tc["function"]["name"],
-                        json.dumps({"error": str(res)}),
+        else:
+            query_calls = []
+
+        # Tools run in a task so progress events of streaming functions can
+        # be relayed while they execute
+        progress: asyncio.Queue = asyncio.Queue()
+
+        async def run_tools() -> None:
+            # Execute parallel tools concurrently
+            if parallel_calls or query_calls:
+                parallel_tasks = [
+                    self._execute_single_tool(tc, chat_id, user_id, user_token, tools, progress)
+                    for tc in parallel_calls
+                ]
+                if query_calls:
+                    parallel_tasks.append(
+                        self._execute_query_tool_batch(query_calls, chat_id, user_id, tools)
                     )
-                else:
-                    tool_results[tc["id"]] = res
+                parallel_results = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+
+                if query_calls:
+                    batch_res = parallel_results.pop()
+                    for i, tc in enumerate(query_calls):
+                        if isinstance(batch_res, Exception):
+                            logger.error(f"Query tool batch failed: {batch_res}")
+                            tool_results[tc["id"]] = (
+                                tc["id"],
+                                tc["function"]["name"],
+                                json.dumps({"error": str(batch_res)}),
+                            )
+                        else:
+                            tool_results[tc["id"]] = batch_res[i]
+
+                for i, res in enumerate(parallel_results):
+                    tc = parallel_calls[i]
+                    if isinstance(res, Exception):
+                        logger.error(f"Parallel tool execution failed: {res}")
+                        tool_results[tc["id"]] = (
+                            tc["id"],
+                            tc["function"]["name"],
+                            json.dumps({"error": str(res)}),
+                        )
+                    else:
+                        tool_results[tc["id"]] = res
 
-        # Execute sequential tools one by one
-        for tc in sequential_calls:
-            res = await self._execute_single_tool(tc, chat_id, user_id, user_token, tools)
-            tool_results[tc["id"]] = res
+            # Execute sequential tools one by one
+            for tc in sequential_calls:
+                res = await self._execute_single_tool(
+                    tc, chat_id, user_id, user_token, tools, progress
+                )
+                tool_results[tc["id"]] = res
+
+        # Tools use their own sessions; release this one's connection while they run
+        await release_connection(self.db)
+
+        tools_task = asyncio.create_task(run_tools())
+        try:
+            async for event in self._stream_tool_progress(tools_task, progress):
+                yield event
+            await tools_task
+        finally:
+            if not tools_task.done():
+                tools_task.cancel()
 
         # Save all tool result messages in original order
         for tc in valid_tool_calls:
@@ -1689,7 +1873,7 @@ class MessageService:
 
         # Rebuild messages with tool results
         result = await self.db.execute(
-            select(Message).where(Message.chat_id == chat_id).order_by(Message.created_at)
+            select(Message).where(Message.chat_id == chat_id).order_by(Message.seq)
         )
         for msg in result.scalars().all():
             message_dict = {"role": msg.role}
@@ -1715,7 +1899,9 @@ class MessageService:
         # Strip _metadata from tools before sending to LLM
         clean_tools = self._strip_tool_metadata(tools)
 
-        # Stream the response after tool execution
+        # Stream the response after tool execution (without holding a connection)
+        await release_connection(self.db)
+
         full_content = ""
         tool_calls_list = []
 
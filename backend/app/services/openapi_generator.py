@@ -1,25 +1,41 @@
-"""Dynamic OpenAPI specification generator for runtime API."""
-from typing import Any
+"""Dynamic OpenAPI specification generator for runtime API.
+
+The spec is assembled from the static FastAPI routes plus one section per
+database-driven resource type (webhooks, agents, collections, templates).
+runtime_openapi_cache keeps the serialized spec per process and rebuilds only
+the sections whose resources changed (invalidation events, plus a periodic
+check of the Redis resource versions).
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import re
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, Optional
 
 from fastapi.openapi.utils import get_openapi
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.invalidation import get_resource_versions, invalidation_listener
 from app.models.agent import Agent
 from app.models.file import Collection
 from app.models.function import Function
 from app.models.template import Template
 from app.models.webhook import Webhook
 
+logger = logging.getLogger(__name__)
 
-async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
-    """
-    Generate dynamic OpenAPI specification for runtime API.
+VERSION_CHECK_INTERVAL = 5.0  # seconds between Redis version checks
 
-    Merges FastAPI's auto-generated spec with dynamic endpoints for:
-    - Active webhooks (based on database)
-    - Active agents (based on database)
-    """
+Paths = dict[str, dict[str, Any]]
+
+
+def _base_spec() -> dict[str, Any]:
+    """FastAPI's spec for the static runtime routes (no database access)."""
     from app.api.runtime import runtime_router
 
     # Get FastAPI's auto-generated OpenAPI spec for static endpoints
@@ -50,25 +66,41 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             "ApiKeyAuth": {"type": "apiKey", "in": "header", "name": "X-API-Key"},
         }
 
-    # Add dynamic webhook endpoints (database-driven)
+    return base_spec
+
+
+async def _webhook_paths(db: AsyncSession) -> Paths:
+    """Dynamic webhook endpoints (database-driven)."""
+    paths: Paths = {}
     webhook_result = await db.execute(select(Webhook).where(Webhook.is_active == True))
     webhooks = webhook_result.scalars().all()
 
+    # Load the associated functions (for schemas) in one query
+    functions: dict[tuple[str, str], Function] = {}
+    refs = {(w.function_namespace, w.function_name) for w in webhooks}
+    if refs:
+        function_result = await db.execute(
+            select(Function).where(
+                tuple_(Function.namespace, Function.name).in_(list(refs)),
+                Function.is_active == True,
+            )
+        )
+        functions = {(f.namespace, f.name): f for f in function_result.scalars().all()}
+
     for webhook in webhooks:
-        # Load associated function to get schemas
-        function = await Function.get_by_name(db, webhook.function_namespace, webhook.function_name)
+        function = functions.get((webhook.function_namespace, webhook.function_name))
 
         path = f"/webhooks/{webhook.path}"
         method = webhook.http_method.lower()
 
-        if path not in base_spec["paths"]:
-            base_spec["paths"][path] = {}
+        if path not in paths:
+            paths[path] = {}
 
-        base_spec["paths"][path][method] = {
+        paths[path][method] = {
             "summary": webhook.description
             or f"Execute {webhook.function_namespace}/{webhook.function_name}",
             "tags": ["runtime-webhooks"],
-            "operationId": f"execute_webhook_{webhook.path.replace('/', '_')}_{method}",
+            "operationId": f"execute_webhook_{re.sub(r'[/{}]', '_', webhook.path)}_{method}",
             "requestBody": {
                 "required": True,
                 "content": {
@@ -103,11 +135,44 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             },
         }
 
+        if webhook.response_mode == "async":
+            responses = paths[path][method]["responses"]
+            del responses["200"]
+            responses["202"] = {
+                "description": "Function queued; poll /executions/{execution_id} for the result",
+                "content": {
+                    "application/json": {
+                        "schema": {
+                            "type": "object",
+                            "properties": {
+                                "success": {"type": "boolean"},
+                                "execution_id": {"type": "string", "format": "uuid"},
+                                "status": {"type": "string"},
+                            },
+                        }
+                    }
+                },
+            }
+            responses["500"] = {"description": "Function could not be queued"}
+
+        # Templated path segments ({param}) become path parameters
+        path_params = re.findall(r"\{([^/{}]+)\}", webhook.path)
+        if path_params:
+            paths[path][method]["parameters"] = [
+                {"name": name, "in": "path", "required": True, "schema": {"type": "string"}}
+                for name in path_params
+            ]
+
         # Add security if required
         if webhook.requires_auth:
-            base_spec["paths"][path][method]["security"] = [{"BearerAuth": []}, {"ApiKeyAuth": []}]
+            paths[path][method]["security"] = [{"BearerAuth": []}, {"ApiKeyAuth": []}]
+
+    return paths
 
-    # Add dynamic agent chat creation endpoints (database-driven)
+
+async def _agent_paths(db: AsyncSession) -> Paths:
+    """Dynamic agent chat creation endpoints (database-driven)."""
+    paths: Paths = {}
     agent_result = await db.execute(select(Agent).where(Agent.is_active == True))
     agents = agent_result.scalars().all()
 
@@ -130,7 +195,7 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             },
         }
 
-        base_spec["paths"][path] = {
+        paths[path] = {
             "post": {
                 "summary": f"Create chat with {agent.namespace}/{agent.name}",
                 "description": f"Create new chat with the {agent.namespace}/{agent.name} agent. Returns chat object. Use POST /chats/{{chat_id}}/messages to send messages.",
@@ -171,7 +236,12 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             }
         }
 
-    # Add dynamic collection upload endpoints (database-driven)
+    return paths
+
+
+async def _collection_paths(db: AsyncSession) -> Paths:
+    """Dynamic collection upload endpoints (database-driven)."""
+    paths: Paths = {}
     collection_result = await db.execute(select(Collection))
     collections = collection_result.scalars().all()
 
@@ -212,7 +282,7 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
 
         op_id = f"upload_to_{coll.namespace}_{coll.name}".replace("-", "_").replace(".", "_")
 
-        base_spec["paths"][path] = {
+        paths[path] = {
             "post": {
                 "summary": f"Upload file to {coll.namespace}/{coll.name}",
                 "description": f"Upload a file to the {coll.namespace}/{coll.name} collection. "
@@ -253,7 +323,12 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             },
         }
 
-    # Add dynamic template render + email endpoints (database-driven)
+    return paths
+
+
+async def _template_paths(db: AsyncSession) -> Paths:
+    """Dynamic template render + email endpoints (database-driven)."""
+    paths: Paths = {}
     template_result = await db.execute(select(Template).where(Template.is_active == True))
     templates = template_result.scalars().all()
 
@@ -263,7 +338,7 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
 
         # Render endpoint
         render_path = f"/templates/{tmpl.namespace}/{tmpl.name}/render"
-        base_spec["paths"][render_path] = {
+        paths[render_path] = {
             "post": {
                 "summary": f"Render template {tmpl.namespace}/{tmpl.name}",
                 "description": tmpl.description or f"Render the {tmpl.namespace}/{tmpl.name} template with variables.",
@@ -312,7 +387,7 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
 
         # Email endpoint
         email_path = f"/templates/{tmpl.namespace}/{tmpl.name}/email"
-        base_spec["paths"][email_path] = {
+        paths[email_path] = {
             "post": {
                 "summary": f"Send email with {tmpl.namespace}/{tmpl.name}",
                 "description": f"Send an email using the {tmpl.namespace}/{tmpl.name} template.",
@@ -371,5 +446,128 @@ async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
             },
         }
 
+    return paths
+
+
+# Spec section -> (invalidation resources it depends on, builder)
+OPENAPI_SECTIONS: dict[str, tuple[tuple[str, ...], Callable[[AsyncSession], Awaitable[Paths]]]] = {
+    "webhooks": (("webhooks", "functions"), _webhook_paths),
+    "agents": (("agents",), _agent_paths),
+    "collections": (("collections",), _collection_paths),
+    "templates": (("templates",), _template_paths),
+}
+
+OPENAPI_RESOURCES = sorted({r for resources, _ in OPENAPI_SECTIONS.values() for r in resources})
+
+
+def _assemble(base_spec: dict[str, Any], sections: list[Paths]) -> dict[str, Any]:
+    """Merge section paths into a copy of the base spec (methods merge per path)."""
+    paths = {path: dict(ops) for path, ops in base_spec["paths"].items()}
+    for section in sections:
+        for path, ops in section.items():
+            paths.setdefault(path, {}).update(ops)
     # All other endpoints (chats, auth, states, executions) are auto-generated by FastAPI
-    return base_spec
+    return {**base_spec, "paths": paths}
+
+
+async def generate_runtime_openapi(db: AsyncSession) -> dict[str, Any]:
+    """
+    Generate dynamic OpenAPI specification for runtime API.
+
+    Merges FastAPI's auto-generated spec with dynamic endpoints for:
+    - Active webhooks (based on database)
+    - Active agents (based on database)
+    - Collections and active templates (based on database)
+    """
+    sections = [await builder(db) for _, builder in OPENAPI_SECTIONS.values()]
+    return _assemble(_base_spec(), sections)
+
+
+class RuntimeOpenAPICache:
+    """Per-process cache of the serialized runtime spec and its ETag."""
+
+    def __init__(self):
+        self._base: Optional[dict[str, Any]] = None
+        self._sections: dict[str, Paths] = {}
+        self._section_versions: dict[str, Optional[tuple[int, ...]]] = {}
+        self._stale: set[str] = set(OPENAPI_SECTIONS)
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._last_version_check = 0.0
+        self._lock = asyncio.Lock()
+        for resource in OPENAPI_RESOURCES:
+            invalidation_listener.register(resource, functools.partial(self._on_invalidate, resource))
+
+    def _on_invalidate(self, resource: str, resource_id: Optional[str], version: int) -> None:
+        for section, (resources, _) in OPENAPI_SECTIONS.items():
+            if resource in resources:
+                self._stale.add(section)
+
+    async def _versions(self) -> Optional[dict[str, int]]:
+        try:
+            return await get_resource_versions(OPENAPI_RESOURCES)
+        except Exception as e:
+            logger.warning(f"OpenAPI spec version check failed: {e}")
+            return None
+
+    async def _check_versions(self) -> None:
+        versions = await self._versions()
+        for section, (resources, _) in OPENAPI_SECTIONS.items():
+            current = tuple(versions[r] for r in resources) if versions else None
+            if current is None or current != self._section_versions.get(section):
+                self._stale.add(section)
+
+    async def _rebuild(self) -> None:
+        from app.core.database import AsyncSessionLocal
+
+        if self._base is None:
+            self._base = _base_spec()
+
+        # Versions are read before loading, so a change during the load
+        # shows up as a newer version on the next check
+        stale, self._stale = self._stale, set()
+        versions = await self._versions()
+        start = time.perf_counter()
+        try:
+            async with AsyncSessionLocal() as db:
+                for section in sorted(stale):
+                    resources, builder = OPENAPI_SECTIONS[section]
+                    self._sections[section] = await builder(db)
+                    self._section_versions[section] = (
+                        tuple(versions[r] for r in resources) if versions else None
+                    )
+        except Exception:
+            self._stale |= stale
+            raise
+
+        spec = _assemble(self._base, [self._sections[s] for s in OPENAPI_SECTIONS])
+        self._body = json.dumps(spec, ensure_ascii=False, separators=(",", ":")).encode()
+        self._etag = f'"{hashlib.sha256(self._body).hexdigest()[:32]}"'
+        logger.info(
+            f"Rebuilt runtime OpenAPI sections {sorted(stale)} "
+            f"in {(time.perf_counter() - start) * 1000:.1f}ms"
+        )
+
+    async def get(self) -> tuple[bytes, str]:
+        """
+        Get the serialized spec.
+
+        Returns:
+            (JSON body, ETag)
+        """
+        now = time.monotonic()
+        if self._body is not None and now - self._last_version_check >= VERSION_CHECK_INTERVAL:
+            self._last_version_check = now
+            await self._check_versions()
+
+        if self._stale or self._body is None:
+            async with self._lock:
+                if self._stale or self._body is None:
+                    await self._rebuild()
+                    self._last_version_check = time.monotonic()
+
+        return self._body, self._etag
+
+
+# Global instance
+runtime_openapi_cache = RuntimeOpenAPICache()
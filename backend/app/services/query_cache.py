@@ -0,0 +1,338 @@
+"""Result cache for read queries.
+
+Opt-in per Query (cache_ttl). A cached result is keyed by query id, a digest
+of the query definition, the parameter values the SQL actually references
+(so queries that do not use :user_id are shared across users), and the
+current versions of the query's cache tags.
+
+Tags are scoped to the query's database connection. A write query that
+declares tags bumps their version after it succeeds, which makes every read
+keyed on the old version unreachable; stale entries simply expire.
+
+Results live in Redis (shared) with a small in-process LRU in front of it.
+Per-query hit/miss counters are kept in a Redis hash.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis import get_redis
+from app.models.query import Query
+from app.services.database_pool import BatchStatement, DatabasePoolManager
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_PREFIX = "sinas:qcache:result:"
+QUERY_CACHE_TAG_PREFIX = "sinas:qcache:tag:"
+QUERY_CACHE_STATS_PREFIX = "sinas:qcache:stats:"
+
+LOCAL_CACHE_MAX_ENTRIES = 1000
+LOCAL_CACHE_MAX_TTL = 30  # seconds; bounds staleness of the in-process copy
+
+QUERY_CACHE_STATS = ("memory_hits", "redis_hits", "misses", "oversize", "invalidations")
+
+
+def _definition_digest(query: Query) -> str:
+    data = {
+        "connection": str(query.database_connection_id),
+        "sql": query.sql,
+        "max_rows": query.max_rows,
+    }
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()[:16]
+
+
+class QueryResultCache:
+    """Executes queries through DatabasePoolManager, caching read results."""
+
+    def __init__(self):
+        # cache key -> (expires_at, result)
+        self._local: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    def _tag_keys(self, query: Query) -> list[str]:
+        return [
+            f"{QUERY_CACHE_TAG_PREFIX}{query.database_connection_id}:{tag}"
+            for tag in sorted(set(query.cache_tags or []))
+        ]
+
+    def _local_get(self, key: str) -> Optional[dict[str, Any]]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return result
+
+    def _local_set(self, key: str, result: dict[str, Any], ttl: int) -> None:
+        self._local[key] = (time.monotonic() + min(ttl, LOCAL_CACHE_MAX_TTL), result)
+        self._local.move_to_end(key)
+        while len(self._local) > LOCAL_CACHE_MAX_ENTRIES:
+            self._local.popitem(last=False)
+
+    async def _record(self, query: Query, stat: str) -> None:
+        try:
+            redis = await get_redis()
+            await redis.hincrby(f"{QUERY_CACHE_STATS_PREFIX}{query.id}", stat, 1)
+        except Exception as e:
+            logger.debug(f"Failed to record query cache stat: {e}")
+
+    async def _cache_key(self, query: Query, params: dict[str, Any]) -> str:
+        _, positional_params = DatabasePoolManager._convert_params(query.sql, params)
+
+        tag_versions: list[Optional[str]] = []
+        tag_keys = self._tag_keys(query)
+        if tag_keys:
+            redis = await get_redis()
+            tag_versions = await redis.mget(tag_keys)
+
+        digest = hashlib.sha256(
+            json.dumps(
+                [_definition_digest(query), positional_params, tag_versions], default=str
+            ).encode()
+        ).hexdigest()
+        return f"{QUERY_CACHE_PREFIX}{query.id}:{digest}"
+
+    async def _lookup(
+        self, query: Query, params: dict[str, Any]
+    ) -> tuple[Optional[str], Optional[dict[str, Any]]]:
+        """
+        Look up a cacheable read.
+
+        Returns:
+            (cache key, cached result) — key is None when the cache is
+            unavailable, result is None on a miss
+        """
+        try:
+            key = await self._cache_key(query, params)
+        except Exception as e:
+            logger.warning(f"Query cache unavailable for {query.namespace}/{query.name}: {e}")
+            return None, None
+
+        cached = self._local_get(key)
+        if cached is not None:
+            await self._record(query, "memory_hits")
+            return key, {**cached, "cached": True}
+
+        try:
+            redis = await get_redis()
+            raw = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Query cache read failed for {query.namespace}/{query.name}: {e}")
+            return None, None
+
+        if raw is not None:
+            cached = json.loads(raw)
+            self._local_set(key, cached, query.cache_ttl)
+            await self._record(query, "redis_hits")
+            return key, {**cached, "cached": True}
+
+        await self._record(query, "misses")
+        return key, None
+
+    async def _store(self, query: Query, key: str, result: dict[str, Any]) -> None:
+        payload = json.dumps(result, default=str)
+        if len(payload) > (query.cache_max_bytes or 0):
+            await self._record(query, "oversize")
+            return
+
+        try:
+            redis = await get_redis()
+            await redis.set(key, payload, ex=query.cache_ttl)
+        except Exception as e:
+            logger.warning(f"Query cache write failed for {query.namespace}/{query.name}: {e}")
+        self._local_set(key, result, query.cache_ttl)
+
+    async def execute(
+        self, db: Optional[AsyncSession], query: Query, params: dict[str, Any]
+    ) -> dict[str, Any]:
+        """
+        Execute a query, serving reads from the cache when enabled.
+
+        Returns the DatabasePoolManager result dict; cached reads carry
+        "cached": True.
+        """
+        pool_manager = DatabasePoolManager.get_instance()
+
+        async def run() -> dict[str, Any]:
+            return await pool_manager.execute_query(
+                db=db,
+                connection_id=str(query.database_connection_id),
+                sql=query.sql,
+                params=params,
+                operation=query.operation,
+                timeout_ms=query.timeout_ms,
+                max_rows=query.max_rows,
+            )
+
+        if query.operation != "read":
+            result = await run()
+            await self.invalidate_tags(query)
+            return result
+
+        if not query.cache_ttl:
+            return await run()
+
+        key, cached = await self._lookup(query, params)
+        if cached is not None:
+            return cached
+
+        result = await run()
+        if key is not None:
+            await self._store(query, key, result)
+        return result
+
+    async def execute_batch(
+        self,
+        db: Optional[AsyncSession],
+        calls: list[tuple[Query, dict[str, Any]]],
+        snapshot: bool = False,
+    ) -> list[dict[str, Any]]:
+        """
+        Execute several queries, one pooled connection per database connection.
+
+        Cached reads are answered first; the remaining calls are grouped by
+        database_connection_id and each group runs through
+        DatabasePoolManager.execute_batch (groups run concurrently). Snapshot
+        batches bypass the cache so all reads of a group see the same data.
+
+        Returns:
+            One result per call, in order; failed calls are {"error": message}
+        """
+        pool_manager = DatabasePoolManager.get_instance()
+        results: list[Optional[dict[str, Any]]] = [None] * len(calls)
+        cache_keys: dict[int, str] = {}
+        groups: dict[str, list[int]] = {}
+
+        for i, (query, params) in enumerate(calls):
+            if query.operation == "read" and query.cache_ttl and not snapshot:
+                key, cached = await self._lookup(query, params)
+                if cached is not None:
+                    results[i] = cached
+                    continue
+                if key is not None:
+                    cache_keys[i] = key
+            groups.setdefault(str(query.database_connection_id), []).append(i)
+
+        async def run_group(
+            group_db: Optional[AsyncSession], connection_id: str, indexes: list[int]
+        ) -> None:
+            statements = [
+                BatchStatement(
+                    sql=calls[i][0].sql,
+                    params=calls[i][1],
+                    operation=calls[i][0].operation,
+                    timeout_ms=calls[i][0].timeout_ms,
+                    max_rows=calls[i][0].max_rows,
+                )
+                for i in indexes
+            ]
+            try:
+                group_results = await pool_manager.execute_batch(
+                    group_db, connection_id, statements, snapshot=snapshot
+                )
+            except Exception as e:
+                logger.error(f"Query batch failed on connection {connection_id}: {e}")
+                group_results = [{"error": str(e)} for _ in indexes]
+
+            for i, result in zip(indexes, group_results):
+                results[i] = result
+                if "error" in result:
+                    continue
+                query = calls[i][0]
+                if query.operation != "read":
+                    await self.invalidate_tags(query)
+                elif i in cache_keys:
+                    await self._store(query, cache_keys[i], result)
+
+        # Concurrent groups must not share the session; with db=None the pool
+        # manager opens its own short session if a descriptor is not cached.
+        group_db = db if len(groups) == 1 else None
+        await asyncio.gather(*(run_group(group_db, cid, idx) for cid, idx in groups.items()))
+        return results
+
+    async def stream(
+        self,
+        db: Optional[AsyncSession],
+        query: Query,
+        params: dict[str, Any],
+        fmt: str,
+        chunk_size: int,
+    ) -> AsyncIterator[bytes]:
+        """
+        Stream a read query in chunks (bypasses the result cache).
+
+        The first chunk is fetched before returning, so connection and SQL
+        errors are raised here rather than in the middle of a response.
+        """
+        stream = DatabasePoolManager.get_instance().stream_query(
+            db=db,
+            connection_id=str(query.database_connection_id),
+            sql=query.sql,
+            params=params,
+            fmt=fmt,
+            timeout_ms=query.timeout_ms,
+            max_rows=query.max_rows,
+            chunk_size=chunk_size,
+        )
+        try:
+            first = await stream.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        except Exception:
+            await stream.aclose()
+            raise
+
+        async def chunks() -> AsyncIterator[bytes]:
+            try:
+                if first:
+                    yield first
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+        return chunks()
+
+    async def invalidate_tags(self, query: Query) -> None:
+        """Bump the versions of a (write) query's cache tags."""
+        tag_keys = self._tag_keys(query)
+        if not tag_keys:
+            return
+        try:
+            redis = await get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for tag_key in tag_keys:
+                    pipe.incr(tag_key)
+                pipe.hincrby(f"{QUERY_CACHE_STATS_PREFIX}{query.id}", "invalidations", 1)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(
+                f"Failed to invalidate cache tags {query.cache_tags} "
+                f"for {query.namespace}/{query.name}: {e}"
+            )
+
+    async def get_stats(self, query: Query) -> dict[str, Any]:
+        """Hit/miss counters for a query."""
+        redis = await get_redis()
+        raw = await redis.hgetall(f"{QUERY_CACHE_STATS_PREFIX}{query.id}")
+        stats: dict[str, Any] = {stat: int(raw.get(stat, 0)) for stat in QUERY_CACHE_STATS}
+        hits = stats["memory_hits"] + stats["redis_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["enabled"] = bool(query.cache_ttl) and query.operation == "read"
+        stats["ttl"] = query.cache_ttl
+        stats["tags"] = query.cache_tags or []
+        return stats
+
+
+# Global instance
+query_result_cache = QueryResultCache()
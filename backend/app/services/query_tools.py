@@ -8,7 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_user_permissions
 from app.core.permissions import check_permission
 from app.models.query import Query
-from app.services.database_pool import DatabasePoolManager
+from app.services.query_cache import query_result_cache
 from app.services.template_renderer import render_function_parameters
 
 logger = logging.getLogger(__name__)
@@ -143,29 +143,23 @@ class QueryToolConverter:
             },
         }
 
-    async def execute_query_tool(
+    async def _resolve_query_call(
         self,
         db: AsyncSession,
         tool_name: str,
         arguments: dict[str, Any],
         user_id: str,
-        user_email: Optional[str] = None,
-        locked_params: Optional[dict[str, Any]] = None,
-        overridable_params: Optional[dict[str, Any]] = None,
-        enabled_queries: Optional[list[str]] = None,
-    ) -> dict[str, Any]:
+        user_email: Optional[str],
+        user_permissions: dict[str, bool],
+        locked_params: Optional[dict[str, Any]],
+        overridable_params: Optional[dict[str, Any]],
+        enabled_queries: Optional[list[str]],
+    ) -> tuple[Optional[Query], dict[str, Any]]:
         """
-        Execute a query as a tool call.
+        Validate a query tool call and build its parameters.
 
-        Args:
-            db: Database session
-            tool_name: Query name as "query_namespace__name"
-            arguments: Tool arguments from LLM
-            user_id: User ID
-            user_email: User email for context injection
-            locked_params: Locked parameters
-            overridable_params: Overridable parameters
-            enabled_queries: List of enabled queries for validation
+        Returns:
+            (query, final_input), or (None, error_result) if the call is rejected
         """
         # Parse query_namespace__name -> namespace/name
         if tool_name.startswith("query_"):
@@ -175,7 +169,7 @@ class QueryToolConverter:
             tool_name = tool_name.replace("__", "/", 1)
 
         if "/" not in tool_name:
-            return {"error": f"Invalid query name format: {tool_name}"}
+            return None, {"error": f"Invalid query name format: {tool_name}"}
 
         namespace, name = tool_name.split("/", 1)
         query_ref = f"{namespace}/{name}"
@@ -186,7 +180,7 @@ class QueryToolConverter:
                 f"Security: LLM attempted to call non-enabled query '{query_ref}'. "
                 f"Enabled queries: {enabled_queries}"
             )
-            return {
+            return None, {
                 "error": "Query not enabled",
                 "message": f"Query '{query_ref}' is not enabled for this agent.",
             }
@@ -194,13 +188,12 @@ class QueryToolConverter:
         # Load query
         query = await Query.get_by_name(db, namespace, name)
         if not query or not query.is_active:
-            return {"error": f"Query not found: {namespace}/{name}"}
+            return None, {"error": f"Query not found: {namespace}/{name}"}
 
         # Check permissions
-        user_permissions = await get_user_permissions(db, user_id)
         perm = f"sinas.queries/{namespace}/{name}.execute:own"
         if not check_permission(user_permissions, perm):
-            return {
+            return None, {
                 "error": "Permission denied",
                 "message": f"You don't have permission to execute query '{namespace}/{name}'.",
             }
@@ -230,18 +223,51 @@ class QueryToolConverter:
         if user_email:
             final_input["user_email"] = user_email
 
+        return query, final_input
+
+    async def execute_query_tool(
+        self,
+        db: AsyncSession,
+        tool_name: str,
+        arguments: dict[str, Any],
+        user_id: str,
+        user_email: Optional[str] = None,
+        locked_params: Optional[dict[str, Any]] = None,
+        overridable_params: Optional[dict[str, Any]] = None,
+        enabled_queries: Optional[list[str]] = None,
+    ) -> dict[str, Any]:
+        """
+        Execute a query as a tool call.
+
+        Args:
+            db: Database session
+            tool_name: Query name as "query_namespace__name"
+            arguments: Tool arguments from LLM
+            user_id: User ID
+            user_email: User email for context injection
+            locked_params: Locked parameters
+            overridable_params: Overridable parameters
+            enabled_queries: List of enabled queries for validation
+        """
+        user_permissions = await get_user_permissions(db, user_id)
+        query, final_input = await self._resolve_query_call(
+            db,
+            tool_name,
+            arguments,
+            user_id,
+            user_email,
+            user_permissions,
+            locked_params,
+            overridable_params,
+            enabled_queries,
+        )
+        if query is None:
+            return final_input
+
+        query_ref = f"{query.namespace}/{query.name}"
         start_time = time.time()
         try:
-            pool_manager = DatabasePoolManager.get_instance()
-            result = await pool_manager.execute_query(
-                db=db,
-                connection_id=str(query.database_connection_id),
-                sql=query.sql,
-                params=final_input,
-                operation=query.operation,
-                timeout_ms=query.timeout_ms,
-                max_rows=query.max_rows,
-            )
+            result = await query_result_cache.execute(db, query, final_input)
 
             elapsed_ms = int((time.time() - start_time) * 1000)
             logger.debug(f"Query execution completed in {elapsed_ms}ms: {query_ref}")
@@ -251,3 +277,68 @@ class QueryToolConverter:
         except Exception as e:
             logger.error(f"Query execution failed for {query_ref}: {e}")
             return {"error": "Query execution failed", "message": str(e)}
+
+    async def execute_query_tools_batch(
+        self,
+        db: AsyncSession,
+        calls: list[tuple[str, dict[str, Any], dict[str, Any], dict[str, Any]]],
+        user_id: str,
+        user_email: Optional[str] = None,
+        enabled_queries: Optional[list[str]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Execute several query tool calls of one turn together.
+
+        Permissions are loaded once, and calls against the same database
+        connection share one pooled connection.
+
+        Args:
+            db: Database session
+            calls: (tool_name, arguments, locked_params, overridable_params) per call
+            user_id: User ID
+            user_email: User email for context injection
+            enabled_queries: List of enabled queries for validation
+
+        Returns:
+            One result per call, in order
+        """
+        user_permissions = await get_user_permissions(db, user_id)
+
+        results: list[Optional[dict[str, Any]]] = [None] * len(calls)
+        batch: list[tuple[Query, dict[str, Any]]] = []
+        batch_indexes: list[int] = []
+
+        for i, (tool_name, arguments, locked_params, overridable_params) in enumerate(calls):
+            query, final_input = await self._resolve_query_call(
+                db,
+                tool_name,
+                arguments,
+                user_id,
+                user_email,
+                user_permissions,
+                locked_params,
+                overridable_params,
+                enabled_queries,
+            )
+            if query is None:
+                results[i] = final_input
+            else:
+                batch.append((query, final_input))
+                batch_indexes.append(i)
+
+        if batch:
+            start_time = time.time()
+            batch_results = await query_result_cache.execute_batch(db, batch)
+            elapsed_ms = int((time.time() - start_time) * 1000)
+            logger.debug(f"Query batch of {len(batch)} completed in {elapsed_ms}ms")
+
+            for i, (query, _), result in zip(batch_indexes, batch, batch_results):
+                if "error" in result:
+                    logger.error(
+                        f"Query execution failed for {query.namespace}/{query.name}: "
+                        f"{result['error']}"
+                    )
+                    result = {"error": "Query execution failed", "message": result["error"]}
+                results[i] = result
+
+        return results
@@ -1,27 +1,114 @@
 """Queue service for dispatching function and agent jobs via arq."""
 import asyncio
+import hashlib
 import json
 import logging
+import re
 import time
 import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any, Optional
 
 from app.core.config import settings
 from app.core.redis import get_arq_pool, get_redis
+from app.models.execution import TriggerType
+from app.services.agent_dispatcher import AGENT_QUEUE, agent_dispatcher
+from app.services.blob_store import blob_store
+from app.services.function_result_cache import function_result_cache
+from app.services.job_registry import JOB_TTL, job_registry
 
 logger = logging.getLogger(__name__)
 
-# Redis key prefixes
-JOB_STATUS_PREFIX = "sinas:job:status:"
+# Redis key prefixes (job records and JOB_TTL live in job_registry)
 JOB_RESULT_PREFIX = "sinas:job:result:"
 JOB_DONE_CHANNEL_PREFIX = "sinas:job:done:"
-DLQ_KEY = "sinas:queue:dlq"
-JOB_TTL = 86400  # 24 hours
+
+FUNCTION_QUEUE = "sinas:queue:functions"
+MAINTENANCE_QUEUE = "sinas:queue:maintenance"  # bulk jobs, drained by the scheduler service
+
+# Priority lanes of the function queue: lane -> head start in seconds.
+# All lanes share the arq sorted set, which workers drain lowest score first.
+# A job's score is its enqueue time minus its lane's head start, so a job is
+# overtaken only by higher-lane jobs enqueued less than the difference in head
+# starts after it: interactive calls skip ahead of batch backlogs, while batch
+# jobs wait at most that long behind a sustained interactive burst.
+QUEUE_LANES = {"interactive": 300, "default": 60, "batch": 0}
+LANE_PENDING_PREFIX = "sinas:queue:lane:pending:"  # zset job_id scored by enqueued_at
+LANE_WAITS_PREFIX = "sinas:queue:lane:waits:"  # list of recent queue waits (ms)
+LANE_WAIT_SAMPLES = 1000
+
+# Dead-letter queue: entries stored by job_id, indexed by failure time
+DLQ_KEY = "sinas:queue:dlq"  # Legacy list, drained into the indexed structure on access
+DLQ_ENTRIES_KEY = "sinas:queue:dlq:entries"  # hash job_id -> entry JSON
+DLQ_INDEX_KEY = "sinas:queue:dlq:index"  # zset job_id scored by failed_at
+DLQ_FUNCTION_INDEX_PREFIX = "sinas:queue:dlq:function:"  # zset per function
+DLQ_SIGNATURE_INDEX_PREFIX = "sinas:queue:dlq:signature:"  # zset per error signature
+DLQ_SIGNATURES_KEY = "sinas:queue:dlq:signatures"  # hash signature -> sample error
+DLQ_FILTER_PREFIX = "sinas:queue:dlq:filter:"  # temporary function x signature intersection
+DLQ_BULK_RETRY_PREFIX = "sinas:queue:dlq:bulk:"  # hash per bulk retry run (progress, results)
+DLQ_BULK_RETRY_MAX_SECONDS = 3600  # longest a rate-limited bulk retry may run (limit / rate)
+
+_DLQ_RETRY_REQUIRED_FIELDS = [
+    "function_namespace", "function_name", "input_data",
+    "execution_id", "trigger_type", "trigger_id", "user_id",
+]
+
+# Volatile parts of error messages stripped before computing the signature
+_ERROR_VOLATILE_RE = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"  # UUIDs
+    r"|0x[0-9a-f]+"  # addresses
+    r"|'[^']*'|\"[^\"]*\""  # quoted values
+    r"|\d+",  # numbers
+    re.IGNORECASE,
+)
+
+
+def error_signature(error: str) -> str:
+    """Stable short hash of an error message with ids, numbers and quoted values removed."""
+    normalized = _ERROR_VOLATILE_RE.sub("?", error or "").strip()[:500]
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * fraction))
+    return sorted_values[index]
 
 
 class QueueService:
     """Service for enqueuing and tracking jobs."""
 
+    async def resolve_lane(
+        self,
+        function_namespace: str,
+        function_name: str,
+        trigger_type: str,
+        waiting: bool,
+    ) -> str:
+        """
+        Pick the priority lane of a function job.
+
+        The function's queue_lane setting wins; otherwise scheduled jobs go to
+        "batch", jobs a caller waits on to "interactive", the rest to "default".
+        """
+        if function_name:
+            from app.core.database import AsyncSessionLocal
+            from app.services.function_cache import function_cache
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    definition = await function_cache.get(db, function_namespace, function_name)
+            except Exception as e:
+                logger.warning(
+                    f"Queue lane lookup failed for {function_namespace}/{function_name}: {e}"
+                )
+                definition = None
+            if definition is not None and definition.queue_lane in QUEUE_LANES:
+                return definition.queue_lane
+
+        if trigger_type == TriggerType.SCHEDULE.value:
+            return "batch"
+        return "interactive" if waiting else "default"
+
     async def enqueue_function(
         self,
         function_namespace: str,
@@ -34,57 +121,78 @@ class QueueService:
         chat_id: Optional[str] = None,
         delay: Optional[int] = None,
         resume_data: Optional[dict[str, Any]] = None,
+        callback_url: Optional[str] = None,
+        lane: Optional[str] = None,
+        idempotency_redis_key: Optional[str] = None,
     ) -> str:
         """
         Enqueue a function execution job.
 
         Uses execution_id as the arq job_id so there's a single ID
         to track both the queue job and the execution record.
+        If callback_url is set, the worker POSTs the final result there.
+        If idempotency_redis_key is set, the worker completes (or, once
+        retries are exhausted, releases) that idempotency record.
+        Without an explicit lane, resolve_lane picks one (as a job nobody
+        waits on).
 
         Returns:
             execution_id (str) — same value passed in, now also the job_id
         """
         pool = await get_arq_pool()
-        redis = await get_redis()
+
+        if lane not in QUEUE_LANES:
+            lane = await self.resolve_lane(
+                function_namespace, function_name, trigger_type, waiting=False
+            )
 
         # Use execution_id as job_id — single ID for both queue and execution
         job_id = execution_id
 
         fn_label = f"{function_namespace}/{function_name}" if function_name else f"resume:{execution_id[:8]}"
 
-        # Set initial status in Redis
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps({
-                "status": "queued",
+        # Register job in the indexed job registry
+        await job_registry.create(
+            job_id,
+            queue="functions",
+            fields={
                 "execution_id": execution_id,
-                "queue": "functions",
                 "function": fn_label,
                 "trigger_type": trigger_type,
-                "enqueued_at": time.time(),
-            }),
-            ex=JOB_TTL,
+                "lane": lane,
+            },
         )
 
-        # Build kwargs for arq job
+        # Build kwargs for arq job (large inputs travel as a blob reference)
         job_kwargs: dict[str, Any] = {
             "job_id": job_id,
             "function_namespace": function_namespace,
             "function_name": function_name,
-            "input_data": input_data,
+            "input_data": await blob_store.offload(input_data),
             "execution_id": execution_id,
             "trigger_type": trigger_type,
             "trigger_id": trigger_id,
             "user_id": user_id,
             "chat_id": chat_id,
+            "lane": lane,
         }
         if resume_data is not None:
             job_kwargs["resume_data"] = resume_data
+        if callback_url:
+            job_kwargs["callback_url"] = callback_url
+        if idempotency_redis_key:
+            job_kwargs["idempotency_redis_key"] = idempotency_redis_key
+
+        # Score = enqueue time + optional delay - lane head start
+        enqueue_kwargs: dict[str, Any] = {"_job_id": job_id, "_queue_name": FUNCTION_QUEUE}
+        offset = (delay or 0) - QUEUE_LANES[lane]
+        if offset:
+            enqueue_kwargs["_defer_until"] = datetime.now(timezone.utc) + timedelta(
+                seconds=offset
+            )
 
-        # Enqueue with optional delay
-        enqueue_kwargs = {"_job_id": job_id, "_queue_name": "sinas:queue:functions"}
-        if delay:
-            enqueue_kwargs["_defer_by"] = delay
+        redis = await get_redis()
+        await redis.zadd(f"{LANE_PENDING_PREFIX}{lane}", {job_id: time.time() + (delay or 0)})
 
         await pool.enqueue_job(
             "execute_function_job",
@@ -94,24 +202,76 @@ class QueueService:
 
         logger.info(
             f"Enqueued function job: {function_namespace}/{function_name} "
-            f"(execution_id={execution_id})"
+            f"(execution_id={execution_id}, lane={lane})"
         )
         return execution_id
 
+    async def record_dequeue(self, job_id: str, lane: str, redis=None) -> None:
+        """Take a starting job off its lane's pending index and sample its queue wait."""
+        redis = redis or await get_redis()
+        pending_key = f"{LANE_PENDING_PREFIX}{lane}"
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zscore(pending_key, job_id)
+            pipe.zrem(pending_key, job_id)
+            enqueued_at, removed = await pipe.execute()
+
+        # Retries of a job already started are not sampled again
+        if not removed or enqueued_at is None:
+            return
+        wait_ms = max(0.0, (time.time() - float(enqueued_at)) * 1000)
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(f"{LANE_WAITS_PREFIX}{lane}", round(wait_ms, 1))
+            pipe.ltrim(f"{LANE_WAITS_PREFIX}{lane}", 0, LANE_WAIT_SAMPLES - 1)
+            await pipe.execute()
+
+    async def get_lane_stats(self, redis) -> dict[str, dict[str, Any]]:
+        """Pending jobs and recent queue wait times per function lane."""
+        now = time.time()
+        cutoff = now - JOB_TTL
+        lanes = list(QUEUE_LANES)
+
+        async with redis.pipeline(transaction=False) as pipe:
+            for lane in lanes:
+                pending_key = f"{LANE_PENDING_PREFIX}{lane}"
+                # Jobs that never started (expired, lost) drop out after JOB_TTL
+                pipe.zremrangebyscore(pending_key, "-inf", cutoff)
+                pipe.zcount(pending_key, "-inf", now)
+                pipe.zrangebyscore(pending_key, "-inf", now, start=0, num=1, withscores=True)
+                pipe.lrange(f"{LANE_WAITS_PREFIX}{lane}", 0, -1)
+            results = await pipe.execute()
+
+        stats: dict[str, dict[str, Any]] = {}
+        for i, lane in enumerate(lanes):
+            _, pending, oldest, samples = results[i * 4 : i * 4 + 4]
+            waits = sorted(float(v) for v in samples)
+            stats[lane] = {
+                "pending": pending,
+                "oldest_wait_seconds": round(now - oldest[0][1], 1) if oldest else 0.0,
+                "wait_ms": {
+                    "samples": len(waits),
+                    "avg": round(sum(waits) / len(waits), 1) if waits else 0.0,
+                    "p50": _percentile(waits, 0.5) if waits else 0.0,
+                    "p95": _percentile(waits, 0.95) if waits else 0.0,
+                    "max": waits[-1] if waits else 0.0,
+                },
+            }
+        return stats
+
     async def get_job_status(self, job_id: str) -> Optional[dict[str, Any]]:
-        """Get job status from Redis."""
-        redis = await get_redis()
-        data = await redis.get(f"{JOB_STATUS_PREFIX}{job_id}")
-        if data:
-            return json.loads(data)
-        return None
+        """Get job status from Redis (with queue position for agent jobs still waiting)."""
+        status = await job_registry.get(job_id)
+        if status and status.get("queue") == "agents" and status.get("status") == "queued":
+            position = await agent_dispatcher.position(job_id)
+            if position:
+                status.update(position)
+        return status
 
     async def get_job_result(self, job_id: str) -> Optional[Any]:
         """Get job result from Redis."""
         redis = await get_redis()
         data = await redis.get(f"{JOB_RESULT_PREFIX}{job_id}")
         if data:
-            return json.loads(data)
+            return await blob_store.resolve(json.loads(data))
         return None
 
     async def enqueue_and_wait(
@@ -126,14 +286,76 @@ class QueueService:
         chat_id: Optional[str] = None,
         resume_data: Optional[dict[str, Any]] = None,
         timeout: Optional[int] = None,
+        idempotency_redis_key: Optional[str] = None,
     ) -> Any:
         """
         Enqueue a function job and wait for its result.
 
-        Uses Redis pub/sub to get notified when the job completes.
+        Uses Redis pub/sub to get notified when the job completes. Functions
+        with a result cache policy are answered from the cache when possible
+        (recorded as a cached execution) and populate it on success.
+        idempotency_redis_key is passed to the job (see enqueue_function).
         """
+        cache_policy = None
+        cache_key = None
+        if resume_data is None:
+            cache_policy = await function_result_cache.get_policy(
+                function_namespace, function_name
+            )
+        if cache_policy is not None:
+            cache_key, cached = await function_result_cache.lookup(
+                cache_policy, input_data, user_id
+            )
+            if cached is not None:
+                await function_result_cache.record_hit(
+                    cache_policy,
+                    input_data,
+                    cached.value,
+                    execution_id=execution_id,
+                    trigger_type=trigger_type,
+                    trigger_id=trigger_id,
+                    user_id=user_id,
+                    chat_id=chat_id,
+                )
+                return cached.value
+
+        result = await self._run_and_wait(
+            function_namespace=function_namespace,
+            function_name=function_name,
+            input_data=input_data,
+            execution_id=execution_id,
+            trigger_type=trigger_type,
+            trigger_id=trigger_id,
+            user_id=user_id,
+            chat_id=chat_id,
+            resume_data=resume_data,
+            timeout=timeout,
+            idempotency_redis_key=idempotency_redis_key,
+        )
+
+        if cache_key is not None:
+            await function_result_cache.store(cache_policy, cache_key, result)
+        return result
+
+    async def _run_and_wait(
+        self,
+        function_namespace: str,
+        function_name: str,
+        input_data: dict[str, Any],
+        execution_id: str,
+        trigger_type: str,
+        trigger_id: str,
+        user_id: str,
+        chat_id: Optional[str],
+        resume_data: Optional[dict[str, Any]],
+        timeout: Optional[int],
+        idempotency_redis_key: Optional[str] = None,
+    ) -> Any:
         redis = await get_redis()
         timeout = timeout or settings.queue_default_timeout
+        lane = await self.resolve_lane(
+            function_namespace, function_name, trigger_type, waiting=True
+        )
 
         job_id = await self.enqueue_function(
             function_namespace=function_namespace,
@@ -145,6 +367,8 @@ class QueueService:
             user_id=user_id,
             chat_id=chat_id,
             resume_data=resume_data,
+            lane=lane,
+            idempotency_redis_key=idempotency_redis_key,
         )
 
         # Subscribe to completion channel
@@ -161,7 +385,7 @@ class QueueService:
                     result_data = json.loads(msg["data"])
                     if result_data.get("status") == "failed":
                         raise Exception(result_data.get("error", "Job failed"))
-                    return result_data.get("result")
+                    return await blob_store.resolve(result_data.get("result"))
 
                 # Also check if result is already stored (race condition safety)
                 status = await self.get_job_status(job_id)
@@ -188,41 +412,33 @@ class QueueService:
         agent: Optional[str] = None,
         trigger_type: Optional[str] = None,
     ) -> str:
-        """Enqueue an agent message processing job."""
-        pool = await get_arq_pool()
-        redis = await get_redis()
-
+        """Enqueue an agent message processing job (fair-queued per user, see agent_dispatcher)."""
         job_id = str(uuid.uuid4())
 
-        status_data: dict[str, Any] = {
-            "status": "queued",
+        fields: dict[str, Any] = {
             "channel_id": channel_id,
-            "queue": "agents",
             "type": "message",
             "chat_id": chat_id,
-            "enqueued_at": time.time(),
+            "agent": agent,
         }
-        if agent:
-            status_data["agent"] = agent
         if trigger_type:
-            status_data["trigger_type"] = trigger_type
-
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps(status_data),
-            ex=JOB_TTL,
-        )
-
-        await pool.enqueue_job(
-            "execute_agent_message_job",
-            job_id=job_id,
-            chat_id=chat_id,
-            user_id=user_id,
-            user_token=user_token,
-            content=content,
-            channel_id=channel_id,
-            _job_id=job_id,
-            _queue_name="sinas:queue:agents",
+            fields["trigger_type"] = trigger_type
+
+        await job_registry.create(job_id, queue="agents", fields=fields)
+
+        await agent_dispatcher.submit(
+            job_id,
+            tenant=str(user_id),
+            agent=agent,
+            function="execute_agent_message_job",
+            kwargs={
+                "job_id": job_id,
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "user_token": user_token,
+                "content": content,
+                "channel_id": channel_id,
+            },
         )
 
         logger.info(f"Enqueued agent message job {job_id} for chat {chat_id}")
@@ -239,39 +455,31 @@ class QueueService:
         agent: Optional[str] = None,
     ) -> str:
         """Enqueue an agent resume job (after tool approval)."""
-        pool = await get_arq_pool()
-        redis = await get_redis()
-
         job_id = str(uuid.uuid4())
 
-        status_data: dict[str, Any] = {
-            "status": "queued",
+        fields: dict[str, Any] = {
             "channel_id": channel_id,
-            "queue": "agents",
             "type": "resume",
             "chat_id": chat_id,
-            "enqueued_at": time.time(),
+            "agent": agent,
         }
-        if agent:
-            status_data["agent"] = agent
 
-        await redis.set(
-            f"{JOB_STATUS_PREFIX}{job_id}",
-            json.dumps(status_data),
-            ex=JOB_TTL,
-        )
-
-        await pool.enqueue_job(
-            "execute_agent_resume_job",
-            job_id=job_id,
-            chat_id=chat_id,
-            user_id=user_id,
-            user_token=user_token,
-            pending_approval_id=pending_approval_id,
-            approved=approved,
-            channel_id=channel_id,
-            _job_id=job_id,
-            _queue_name="sinas:queue:agents",
+        await job_registry.create(job_id, queue="agents", fields=fields)
+
+        await agent_dispatcher.submit(
+            job_id,
+            tenant=str(user_id),
+            agent=agent,
+            function="execute_agent_resume_job",
+            kwargs={
+                "job_id": job_id,
+                "chat_id": chat_id,
+                "user_id": user_id,
+                "user_token": user_token,
+                "pending_approval_id": pending_approval_id,
+                "approved": approved,
+                "channel_id": channel_id,
+            },
         )
 
         logger.info(f"Enqueued agent resume job {job_id} for chat {chat_id}")
@@ -283,35 +491,27 @@ class QueueService:
         redis = await get_redis()
 
         # Queue depths (arq uses sorted sets)
-        functions_pending = await redis.zcard("sinas:queue:functions")
-        agents_pending = await redis.zcard("sinas:queue:agents")
+        functions_pending = await redis.zcard(FUNCTION_QUEUE)
+        agents_pending = await redis.zcard(AGENT_QUEUE)
 
         # DLQ size
-        dlq_size = await redis.llen(DLQ_KEY)
+        await self._drain_legacy_dlq()
+        dlq_size = await redis.zcard(DLQ_INDEX_KEY)
 
-        # Job status counts via SCAN
-        status_counts: dict[str, int] = {}
-        cursor = 0
-        while True:
-            cursor, keys = await redis.scan(
-                cursor, match=f"{JOB_STATUS_PREFIX}*", count=200
-            )
-            if keys:
-                values = await redis.mget(*keys)
-                for val in values:
-                    if val:
-                        try:
-                            status = json.loads(val).get("status", "unknown")
-                            status_counts[status] = status_counts.get(status, 0) + 1
-                        except (json.JSONDecodeError, TypeError):
-                            pass
-            if cursor == 0:
-                break
+        # Job status counts from per-status indexes (O(1) per status)
+        status_counts = await job_registry.status_counts(redis)
+        totals = await job_registry.counters(redis)
 
         return {
             "queues": {
-                "functions": {"pending": functions_pending},
-                "agents": {"pending": agents_pending},
+                "functions": {
+                    "pending": functions_pending,
+                    "lanes": await self.get_lane_stats(redis),
+                },
+                "agents": {
+                    "pending": agents_pending,
+                    "dispatch": await agent_dispatcher.get_stats(),
+                },
             },
             "jobs": {
                 "queued": status_counts.get("queued", 0),
@@ -319,98 +519,220 @@ class QueueService:
                 "completed": status_counts.get("completed", 0),
                 "failed": status_counts.get("failed", 0),
             },
+            "totals": totals,
             "dlq": {"size": dlq_size},
         }
 
     async def get_jobs_list(
         self,
         status: Optional[str] = None,
+        queue: Optional[str] = None,
+        function: Optional[str] = None,
+        agent: Optional[str] = None,
         limit: int = 50,
-    ) -> list[dict[str, Any]]:
-        """List jobs, optionally filtered by status. Sorted newest first."""
-        redis = await get_redis()
-        jobs: list[dict[str, Any]] = []
-
-        cursor = 0
-        while True:
-            cursor, keys = await redis.scan(
-                cursor, match=f"{JOB_STATUS_PREFIX}*", count=200
-            )
-            if keys:
-                values = await redis.mget(*keys)
-                for key, val in zip(keys, values):
-                    if val:
-                        try:
-                            data = json.loads(val)
-                        except (json.JSONDecodeError, TypeError):
-                            continue
-                        if status and data.get("status") != status:
-                            continue
-                        job_id = key.removeprefix(JOB_STATUS_PREFIX)
-                        jobs.append({
-                            "job_id": job_id,
-                            "status": data.get("status"),
-                            "queue": data.get("queue"),
-                            "function": data.get("function"),
-                            "agent": data.get("agent"),
-                            "type": data.get("type"),
-                            "trigger_type": data.get("trigger_type"),
-                            "chat_id": data.get("chat_id"),
-                            "execution_id": data.get("execution_id"),
-                            "channel_id": data.get("channel_id"),
-                            "error": data.get("error"),
-                            "enqueued_at": data.get("enqueued_at"),
-                        })
-            if cursor == 0:
-                break
-
-        # Sort newest first; jobs without timestamp sort last
-        jobs.sort(key=lambda j: j.get("enqueued_at") or 0, reverse=True)
-        return jobs[:limit]
+        cursor: Optional[str] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """
+        List jobs, optionally filtered by status, queue, function, or agent. Sorted newest first.
 
-    async def get_dlq_entries(self) -> list[dict[str, Any]]:
-        """Get all dead-letter queue entries."""
+        Returns:
+            (jobs, next_cursor) — pass next_cursor back as cursor for the next page
+        """
+        jobs, next_cursor = await job_registry.list(
+            status=status,
+            queue=queue,
+            function=function,
+            agent=agent,
+            limit=limit,
+            cursor=cursor,
+        )
+        fields = [
+            "status", "queue", "function", "agent", "type", "trigger_type",
+            "chat_id", "execution_id", "channel_id", "lane", "error", "enqueued_at",
+        ]
+        return [
+            {"job_id": job["job_id"], **{f: job.get(f) for f in fields}} for job in jobs
+        ], next_cursor
+
+    async def push_dlq_entry(self, entry: dict[str, Any], redis=None) -> None:
+        """Add a failed job to the dead-letter queue, indexed by job, function and error."""
+        redis = redis or await get_redis()
+        job_id = entry["job_id"]
+        failed_at = entry.setdefault("failed_at", time.time())
+
+        # DLQ entries outlive blobs (BLOB_TTL): keep the input itself
+        try:
+            entry["input_data"] = await blob_store.resolve(entry.get("input_data"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to resolve input of DLQ entry {job_id}: {e}")
+        signature = entry.setdefault("error_signature", error_signature(entry.get("error", "")))
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(DLQ_ENTRIES_KEY, job_id, json.dumps(entry, default=str))
+            pipe.zadd(DLQ_INDEX_KEY, {job_id: failed_at})
+            if entry.get("function"):
+                pipe.zadd(f"{DLQ_FUNCTION_INDEX_PREFIX}{entry['function']}", {job_id: failed_at})
+            pipe.zadd(f"{DLQ_SIGNATURE_INDEX_PREFIX}{signature}", {job_id: failed_at})
+            pipe.hsetnx(DLQ_SIGNATURES_KEY, signature, (entry.get("error") or "")[:500])
+            await pipe.execute()
+
+    async def _drain_legacy_dlq(self) -> None:
+        """Move entries from the pre-index DLQ list into the indexed structure."""
         redis = await get_redis()
-        raw_entries = await redis.lrange(DLQ_KEY, 0, -1)
-        entries: list[dict[str, Any]] = []
-        for raw in raw_entries:
+        if not await redis.exists(DLQ_KEY):
+            return
+        while raw := await redis.rpop(DLQ_KEY):
             try:
                 entry = json.loads(raw)
-                entries.append({
-                    "job_id": entry.get("job_id"),
-                    "function": entry.get("function"),
-                    "execution_id": entry.get("execution_id"),
-                    "error": entry.get("error"),
-                    "attempts": entry.get("attempts"),
-                })
             except (json.JSONDecodeError, TypeError):
-                pass
-        return entries
+                continue
+            if entry.get("job_id"):
+                await self.push_dlq_entry(entry, redis=redis)
 
-    async def retry_dlq_job(self, job_id: str) -> dict[str, Any]:
-        """Remove a job from the DLQ and re-enqueue it."""
+    async def _pop_dlq_entry(self, job_id: str) -> Optional[dict[str, Any]]:
+        """Atomically remove an entry from the DLQ and all its indexes. None if absent."""
+        redis = await get_redis()
+        raw = await redis.hget(DLQ_ENTRIES_KEY, job_id)
+        if not raw:
+            return None
+        entry = json.loads(raw)
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(DLQ_ENTRIES_KEY, job_id)
+            pipe.zrem(DLQ_INDEX_KEY, job_id)
+            if entry.get("function"):
+                pipe.zrem(f"{DLQ_FUNCTION_INDEX_PREFIX}{entry['function']}", job_id)
+            if entry.get("error_signature"):
+                pipe.zrem(f"{DLQ_SIGNATURE_INDEX_PREFIX}{entry['error_signature']}", job_id)
+            removed, *_ = await pipe.execute()
+
+        # Another caller removed it concurrently
+        return entry if removed else None
+
+    async def get_dlq_entries(
+        self,
+        function: Optional[str] = None,
+        signature: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[float] = None,
+    ) -> tuple[list[dict[str, Any]], Optional[float]]:
+        """
+        Get a page of dead-letter queue entries, newest failure first.
+
+        Returns:
+            (entries, next_cursor) — pass next_cursor back as cursor for the next page
+        """
+        await self._drain_legacy_dlq()
         redis = await get_redis()
-        raw_entries = await redis.lrange(DLQ_KEY, 0, -1)
 
-        target_entry = None
-        target_raw = None
+        members = await self._dlq_members(redis, function, signature, limit + 1, before=cursor)
+        next_cursor = None
+        if len(members) > limit:
+            members = members[:limit]
+            next_cursor = members[-1][1]
+        if not members:
+            return [], None
+
+        raw_entries = await redis.hmget(DLQ_ENTRIES_KEY, [job_id for job_id, _ in members])
+        entries: list[dict[str, Any]] = []
         for raw in raw_entries:
+            if not raw:
+                continue
             try:
                 entry = json.loads(raw)
-                if entry.get("job_id") == job_id:
-                    target_entry = entry
-                    target_raw = raw
-                    break
             except (json.JSONDecodeError, TypeError):
                 continue
+            entries.append({
+                "job_id": entry.get("job_id"),
+                "function": entry.get("function"),
+                "execution_id": entry.get("execution_id"),
+                "error": entry.get("error"),
+                "error_signature": entry.get("error_signature"),
+                "attempts": entry.get("attempts"),
+                "failed_at": entry.get("failed_at"),
+            })
+        return entries, next_cursor
+
+    async def _dlq_members(
+        self,
+        redis,
+        function: Optional[str],
+        signature: Optional[str],
+        limit: int,
+        before: Optional[float] = None,
+        oldest_first: bool = False,
+    ) -> list[tuple[str, float]]:
+        """
+        Up to limit (job_id, failed_at) pairs of DLQ entries matching every given filter.
 
-        if not target_entry:
+        With both filters, the function and signature indexes are intersected
+        before the limit is applied.
+        """
+        if signature and function:
+            index_key = f"{DLQ_FILTER_PREFIX}{uuid.uuid4()}"
+        elif signature:
+            index_key = f"{DLQ_SIGNATURE_INDEX_PREFIX}{signature}"
+        elif function:
+            index_key = f"{DLQ_FUNCTION_INDEX_PREFIX}{function}"
+        else:
+            index_key = DLQ_INDEX_KEY
+
+        max_score = f"({before}" if before is not None else "+inf"
+        async with redis.pipeline(transaction=True) as pipe:
+            if signature and function:
+                pipe.zinterstore(
+                    index_key,
+                    [f"{DLQ_SIGNATURE_INDEX_PREFIX}{signature}", f"{DLQ_FUNCTION_INDEX_PREFIX}{function}"],
+                    aggregate="MAX",
+                )
+            if oldest_first:
+                pipe.zrangebyscore(index_key, "-inf", max_score, start=0, num=limit, withscores=True)
+            else:
+                pipe.zrevrangebyscore(index_key, max_score, "-inf", start=0, num=limit, withscores=True)
+            if signature and function:
+                pipe.delete(index_key)
+                _, members, _ = await pipe.execute()
+            else:
+                (members,) = await pipe.execute()
+        return members
+
+    async def get_dlq_signatures(self) -> list[dict[str, Any]]:
+        """Group DLQ entries by error signature, largest group first."""
+        await self._drain_legacy_dlq()
+        redis = await get_redis()
+        samples = await redis.hgetall(DLQ_SIGNATURES_KEY)
+        if not samples:
+            return []
+
+        signatures = list(samples.keys())
+        async with redis.pipeline(transaction=False) as pipe:
+            for sig in signatures:
+                pipe.zcard(f"{DLQ_SIGNATURE_INDEX_PREFIX}{sig}")
+            counts = await pipe.execute()
+
+        # Forget signatures whose entries have all been retried
+        empty = [sig for sig, count in zip(signatures, counts) if not count]
+        if empty:
+            await redis.hdel(DLQ_SIGNATURES_KEY, *empty)
+
+        groups = [
+            {"signature": sig, "error": samples[sig], "count": count}
+            for sig, count in zip(signatures, counts)
+            if count
+        ]
+        groups.sort(key=lambda g: g["count"], reverse=True)
+        return groups
+
+    async def retry_dlq_job(self, job_id: str) -> dict[str, Any]:
+        """Remove a job from the DLQ and re-enqueue it."""
+        await self._drain_legacy_dlq()
+        redis = await get_redis()
+        raw = await redis.hget(DLQ_ENTRIES_KEY, job_id)
+        if not raw:
             raise ValueError(f"Job {job_id} not found in DLQ")
 
         # Verify we have the parameters needed for re-enqueue
-        required = ["function_namespace", "function_name", "input_data",
-                     "execution_id", "trigger_type", "trigger_id", "user_id"]
-        missing = [k for k in required if k not in target_entry]
+        missing = [k for k in _DLQ_RETRY_REQUIRED_FIELDS if k not in json.loads(raw)]
         if missing:
             raise ValueError(
                 f"DLQ entry missing fields for retry: {missing}. "
@@ -418,7 +740,9 @@ class QueueService:
             )
 
         # Remove from DLQ
-        await redis.lrem(DLQ_KEY, 1, target_raw)
+        target_entry = await self._pop_dlq_entry(job_id)
+        if not target_entry:
+            raise ValueError(f"Job {job_id} not found in DLQ")
 
         # Re-enqueue with a new job ID
         new_job_id = await self.enqueue_function(
@@ -430,11 +754,145 @@ class QueueService:
             trigger_id=target_entry["trigger_id"],
             user_id=target_entry["user_id"],
             chat_id=target_entry.get("chat_id"),
+            callback_url=target_entry.get("callback_url"),
+            lane=target_entry.get("lane"),
         )
 
         logger.info(f"Retried DLQ job {job_id} as new job {new_job_id}")
         return {"old_job_id": job_id, "new_job_id": new_job_id}
 
+    async def start_dlq_bulk_retry(
+        self,
+        function: Optional[str] = None,
+        signature: Optional[str] = None,
+        limit: int = 100,
+        rate: float = 10.0,
+    ) -> dict[str, Any]:
+        """
+        Start a bulk DLQ retry on the maintenance queue (run by the scheduler service).
+
+        Returns the run's progress record; poll get_dlq_bulk_retry with its
+        retry_id.
+
+        Raises:
+            ValueError: No filter given, or limit / rate exceeds DLQ_BULK_RETRY_MAX_SECONDS
+        """
+        if not function and not signature:
+            raise ValueError("Bulk retry requires a function or error signature filter")
+        if rate <= 0 or limit / rate > DLQ_BULK_RETRY_MAX_SECONDS:
+            raise ValueError(
+                f"limit / rate must not exceed {DLQ_BULK_RETRY_MAX_SECONDS} seconds; "
+                "raise the rate or retry in smaller batches"
+            )
+
+        retry_id = str(uuid.uuid4())
+        redis = await get_redis()
+        key = f"{DLQ_BULK_RETRY_PREFIX}{retry_id}"
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                key,
+                mapping={
+                    "status": "queued",
+                    "function": function or "",
+                    "signature": signature or "",
+                    "limit": limit,
+                    "rate": rate,
+                    "retried": 0,
+                    "skipped": 0,
+                    "created_at": time.time(),
+                },
+            )
+            pipe.expire(key, JOB_TTL)
+            await pipe.execute()
+
+        pool = await get_arq_pool()
+        await pool.enqueue_job(
+            "retry_dlq_jobs_job",
+            retry_id=retry_id,
+            function=function,
+            signature=signature,
+            limit=limit,
+            rate=rate,
+            _job_id=f"dlq-bulk-{retry_id}",
+            _queue_name=MAINTENANCE_QUEUE,
+        )
+        return await self.get_dlq_bulk_retry(retry_id)
+
+    async def get_dlq_bulk_retry(self, retry_id: str) -> Optional[dict[str, Any]]:
+        """Progress of a bulk DLQ retry, with the retried/skipped entries once finished."""
+        redis = await get_redis()
+        data = await redis.hgetall(f"{DLQ_BULK_RETRY_PREFIX}{retry_id}")
+        if not data:
+            return None
+        run: dict[str, Any] = {"retry_id": retry_id, **data}
+        for field in ("limit", "retried", "skipped"):
+            run[field] = int(run.get(field, 0))
+        for field in ("rate", "created_at", "finished_at"):
+            if field in run:
+                run[field] = float(run[field])
+        for field in ("retried_jobs", "skipped_jobs"):
+            if field in run:
+                run[field] = json.loads(run[field])
+        return run
+
+    async def _set_bulk_retry(self, retry_id: Optional[str], **fields: Any) -> None:
+        if not retry_id:
+            return
+        redis = await get_redis()
+        await redis.hset(f"{DLQ_BULK_RETRY_PREFIX}{retry_id}", mapping=fields)
+
+    async def retry_dlq_jobs(
+        self,
+        function: Optional[str] = None,
+        signature: Optional[str] = None,
+        limit: int = 100,
+        rate: float = 10.0,
+        retry_id: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Bulk-retry DLQ entries matching a function and/or error signature, oldest first.
+
+        Re-enqueues at most `rate` jobs per second so a recovered downstream
+        isn't immediately flooded again. Runs on the maintenance queue
+        (retry_dlq_jobs_job); progress is recorded under retry_id when given.
+        """
+        if not function and not signature:
+            raise ValueError("Bulk retry requires a function or error signature filter")
+
+        await self._drain_legacy_dlq()
+        redis = await get_redis()
+        await self._set_bulk_retry(retry_id, status="running")
+        members = await self._dlq_members(redis, function, signature, limit, oldest_first=True)
+
+        interval = 1.0 / rate if rate > 0 else 0.0
+        retried: list[dict[str, Any]] = []
+        skipped: list[dict[str, Any]] = []
+
+        for job_id, _ in members:
+            try:
+                retried.append(await self.retry_dlq_job(job_id))
+            except ValueError as e:
+                skipped.append({"job_id": job_id, "reason": str(e)})
+                await self._set_bulk_retry(retry_id, skipped=len(skipped))
+                continue
+            await self._set_bulk_retry(retry_id, retried=len(retried))
+
+            if interval:
+                await asyncio.sleep(interval)
+
+        logger.info(
+            f"Bulk DLQ retry (function={function}, signature={signature}): "
+            f"{len(retried)} retried, {len(skipped)} skipped"
+        )
+        await self._set_bulk_retry(
+            retry_id,
+            status="completed",
+            finished_at=time.time(),
+            retried_jobs=json.dumps(retried, default=str),
+            skipped_jobs=json.dumps(skipped, default=str),
+        )
+        return {"retried": retried, "skipped": skipped}
+
     async def get_active_workers(self) -> list[dict[str, Any]]:
         """List active arq worker processes from heartbeat keys."""
         from app.queue.worker import WORKER_HEARTBEAT_PREFIX
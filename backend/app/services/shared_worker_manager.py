@@ -3,6 +3,7 @@ import asyncio
 import io
 import json
 import tarfile
+from collections import OrderedDict
 from datetime import datetime
 from typing import Any, Optional
 
@@ -11,6 +12,15 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.services.container_pool import (
+    BUNDLE_LOAD_TIMEOUT,
+    CONTAINER_BUNDLE_CACHE_ENTRIES,
+    CONTAINER_CODE_CACHE_ENTRIES,
+    ProgressCallback,
+    remember,
+    wait_for_result,
+)
+from app.services.function_cache import FunctionBundle, function_cache
 
 WORKER_EXEC_COUNT_KEY = "sinas:worker:executions"
 
@@ -28,6 +38,10 @@ class SharedWorkerManager:
     def __init__(self):
         self.client = docker.from_env()
         self.workers: dict[str, dict[str, Any]] = {}  # worker_id -> worker_info
+        self.in_flight: dict[str, int] = {}  # worker_id -> executions running in this process
+        # worker_id -> function code hashes / namespace bundles the worker has loaded
+        self._code_hashes: dict[str, OrderedDict[str, None]] = {}
+        self._bundles: dict[str, OrderedDict[str, None]] = {}
         self.next_worker_index = 0  # For round-robin load balancing
         self._lock = asyncio.Lock()
         self._initialized = False
@@ -356,6 +370,8 @@ class SharedWorkerManager:
             container.remove()
 
             del self.workers[worker_id]
+            self._code_hashes.pop(worker_id, None)
+            self._bundles.pop(worker_id, None)
 
             print(f"✅ Removed worker: {container_name}")
             return True
@@ -363,6 +379,8 @@ class SharedWorkerManager:
         except docker.errors.NotFound:
             # Already removed
             del self.workers[worker_id]
+            self._code_hashes.pop(worker_id, None)
+            self._bundles.pop(worker_id, None)
             return True
         except Exception as e:
             print(f"❌ Failed to remove worker {container_name}: {e}")
@@ -415,9 +433,12 @@ class SharedWorkerManager:
         trigger_type: str,
         chat_id: Optional[str],
         db: AsyncSession,
+        on_progress: Optional[ProgressCallback] = None,
     ) -> dict[str, Any]:
         """
         Execute function in a worker container using round-robin load balancing.
+
+        Progress events of generator functions are passed to on_progress.
         """
         async with self._lock:
             if not self.workers:
@@ -433,37 +454,39 @@ class SharedWorkerManager:
 
             worker_info = self.workers[worker_id]
             container_name = worker_info["container_name"]
+            self.in_flight[worker_id] = self.in_flight.get(worker_id, 0) + 1
 
         try:
             container = self.client.containers.get(container_name)
 
-            # Fetch function code from database
-            from app.models.function import Function
-
-            result = await db.execute(
-                select(Function).where(
-                    Function.namespace == function_namespace,
-                    Function.name == function_name,
-                    Function.is_active == True,
-                    Function.shared_pool == True,
-                )
-            )
-            function = result.scalar_one_or_none()
+            # Fetch function code
+            function = await function_cache.get(db, function_namespace, function_name)
 
-            if not function:
+            if not function or not function.shared_pool:
                 return {
                     "status": "failed",
                     "error": f"Function {function_namespace}/{function_name} not found or not marked as shared_pool",
                 }
 
-            # Prepare execution payload with inline code
+            # Namespaces this function references, preloaded into the worker
+            # (None when its code makes no nested calls)
+            bundle = await function_cache.get_call_bundle(db, user_id, function, enabled_namespaces)
+            known_bundles = self._bundles.setdefault(worker_id, OrderedDict())
+
+            # Prepare execution payload; the code is only sent when this
+            # worker has not been given it before
+            known_hashes = self._code_hashes.setdefault(worker_id, OrderedDict())
             payload = {
                 "action": "execute_inline",
-                "function_code": function.code,
+                "code_hash": function.code_hash,
+                "function_code": None if function.code_hash in known_hashes else function.code,
+                "reuse_module_state": function.reuse_module_state,
+                "bundle_version": bundle.version if bundle else None,
                 "execution_id": execution_id,
                 "function_namespace": function_namespace,
                 "function_name": function_name,
                 "enabled_namespaces": enabled_namespaces,
+                # Inline: the request file is private to this call, the blob volume is not
                 "input_data": input_data,
                 "context": {
                     "user_id": user_id,
@@ -475,81 +498,143 @@ class SharedWorkerManager:
                 },
             }
 
-            # Write payload to container via exec_run + stdin pipe.
-            # We cannot use put_archive: it writes to the overlay layer which
-            # is invisible through tmpfs mounts on Linux.
-            # Stdin piping has no ARG_MAX limit and works with any payload size.
-            payload_bytes = json.dumps(payload).encode("utf-8")
-
-            # Step 1: Pipe payload into container via stdin (exec_create + exec_start)
-            api = container.client.api
-            exec_id = api.exec_create(
-                container.id,
-                ['python3', '-c', 'import sys; open("/tmp/exec_request.json","wb").write(sys.stdin.buffer.read())'],
-                stdin=True,
-                stdout=True,
-                stderr=True,
-            )["Id"]
-            sock = api.exec_start(exec_id, socket=True)
-            sock._sock.sendall(payload_bytes)
-            import socket as _sock_mod
-            sock._sock.shutdown(_sock_mod.SHUT_WR)
-            sock.read()  # Wait for command to finish
-            sock.close()
-
-            # Step 2: Trigger execution and poll for result
-            exec_result = await asyncio.to_thread(
-                container.exec_run,
-                cmd=[
-                    "python3",
-                    "-c",
-                    f"""
-import sys, json, time, os
-with open("/tmp/exec_trigger", "w") as f:
-    f.write("1")
-max_wait = {settings.function_timeout}
-start = time.time()
-while time.time() - start < max_wait:
-    try:
-        with open("/tmp/exec_result.json", "r") as f:
-            result = json.load(f)
-            os.remove("/tmp/exec_result.json")
-            os.remove("/tmp/exec_trigger")
-            print(json.dumps(result))
-            sys.exit(0)
-    except FileNotFoundError:
-        time.sleep(0.1)
-        continue
-print(json.dumps({{"error": "Execution timeout"}}))
-sys.exit(1)
-""",
-                ],
-                demux=True,
-            )
+            # A bundle that fails to load only costs the nested calls, the
+            # function itself still runs
+            if bundle and bundle.version not in known_bundles:
+                if not await self._load_bundle(container, known_bundles, bundle):
+                    payload["bundle_version"] = None
+
+            # The worker may have evicted the bundle or the code; resend
+            # whichever it reports missing
+            for _ in range(3):
+                result = await self._run_request(container, payload, on_progress)
+                if result.get("bundle_not_loaded") and payload["bundle_version"]:
+                    if not await self._load_bundle(container, known_bundles, bundle):
+                        payload["bundle_version"] = None
+                elif result.get("code_not_cached"):
+                    payload["function_code"] = function.code
+                else:
+                    break
 
-            stdout, stderr = exec_result.output
-            stdout_str = stdout.decode() if stdout else ""
+            remember(known_hashes, function.code_hash, CONTAINER_CODE_CACHE_ENTRIES)
 
-            if exec_result.exit_code == 0:
-                result = json.loads(stdout_str)
+            # Track execution count in Redis (shared across processes)
+            try:
+                from redis.asyncio import Redis
 
-                # Track execution count in Redis (shared across processes)
-                try:
-                    from redis.asyncio import Redis
+                redis = Redis.from_url(settings.redis_url, decode_responses=True)
+                await redis.hincrby(WORKER_EXEC_COUNT_KEY, worker_id, 1)
+                await redis.aclose()
+            except Exception:
+                pass  # Non-critical — don't fail execution over counter
 
-                    redis = Redis.from_url(settings.redis_url, decode_responses=True)
-                    await redis.hincrby(WORKER_EXEC_COUNT_KEY, worker_id, 1)
-                    await redis.aclose()
-                except Exception:
-                    pass  # Non-critical — don't fail execution over counter
-
-                return result
-            else:
-                error_msg = stderr.decode() if stderr else "Unknown error"
-                return {"status": "failed", "error": error_msg}
+            return result
 
         except Exception as e:
             return {"status": "failed", "error": f"Worker execution failed: {str(e)}"}
+        finally:
+            self.in_flight[worker_id] -= 1
+            if not self.in_flight[worker_id]:
+                del self.in_flight[worker_id]
+
+    def busy_containers(self) -> list[str]:
+        """Containers of workers with executions running in this process."""
+        return [
+            self.workers[worker_id]["container_name"]
+            for worker_id in self.in_flight
+            if worker_id in self.workers
+        ]
+
+    async def sync(self, draining: set[str]) -> None:
+        """
+        Refresh this process's view of the workers (queue workers).
+
+        Adds running worker containers created since startup and stops
+        routing to ones that are gone or being retired.
+        """
+        containers = await asyncio.to_thread(
+            self.client.containers.list, filters={"name": "sinas-worker-", "status": "running"}
+        )
+        running = {c.name: c for c in containers if c.name.startswith("sinas-worker-")}
+
+        async with self._lock:
+            for worker_id, info in list(self.workers.items()):
+                if info["container_name"] not in running or info["container_name"] in draining:
+                    del self.workers[worker_id]
+                    self._code_hashes.pop(worker_id, None)
+                    self._bundles.pop(worker_id, None)
+            known = {info["container_name"] for info in self.workers.values()}
+            for name, container in running.items():
+                if name in known or name in draining:
+                    continue
+                self.workers[f"worker-{name.replace('sinas-worker-', '')}"] = {
+                    "container_name": name,
+                    "container_id": container.id,
+                    "created_at": container.attrs.get("Created", datetime.utcnow().isoformat()),
+                    "executions": 0,
+                }
+
+    async def retire(self, container_names: list[str]) -> int:
+        """Remove the workers running in the given containers. Returns the number removed."""
+        removed = 0
+        async with self._lock:
+            for worker_id, info in list(self.workers.items()):
+                if info["container_name"] in container_names and await self._remove_worker(
+                    worker_id
+                ):
+                    removed += 1
+        return removed
+
+    async def _load_bundle(
+        self, container, known_bundles: OrderedDict, bundle: FunctionBundle
+    ) -> bool:
+        """Precompile a namespace bundle in a worker (load_functions action)."""
+        result = await self._run_request(
+            container,
+            {
+                "action": "load_functions",
+                "bundle_version": bundle.version,
+                "functions": bundle.functions,
+                "timeout": BUNDLE_LOAD_TIMEOUT,
+            },
+        )
+        if result.get("status") != "loaded":
+            print(f"⚠️  Failed to load function bundle {bundle.version[:12]}: {result.get('error', result)}")
+            return False
+        remember(known_bundles, bundle.version, CONTAINER_BUNDLE_CACHE_ENTRIES)
+        return True
+
+    async def _run_request(
+        self,
+        container,
+        payload: dict[str, Any],
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> dict[str, Any]:
+        """Write an execution request to a worker and wait for its result."""
+        # Write payload to container via exec_run + stdin pipe.
+        # We cannot use put_archive: it writes to the overlay layer which
+        # is invisible through tmpfs mounts on Linux.
+        # Stdin piping has no ARG_MAX limit and works with any payload size.
+        payload_bytes = json.dumps(payload).encode("utf-8")
+
+        # Step 1: Pipe payload into container via stdin (exec_create + exec_start)
+        api = container.client.api
+        exec_id = api.exec_create(
+            container.id,
+            ['python3', '-c', 'import sys; open("/tmp/exec_request.json","wb").write(sys.stdin.buffer.read())'],
+            stdin=True,
+            stdout=True,
+            stderr=True,
+        )["Id"]
+        sock = api.exec_start(exec_id, socket=True)
+        sock._sock.sendall(payload_bytes)
+        import socket as _sock_mod
+        sock._sock.shutdown(_sock_mod.SHUT_WR)
+        sock.read()  # Wait for command to finish
+        sock.close()
+
+        # Step 2: Trigger execution and wait for the result (streaming progress)
+        return await wait_for_result(container, on_progress)
 
 
 # Global worker manager instance
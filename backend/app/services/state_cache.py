@@ -0,0 +1,279 @@
+"""Redis read-through cache for the state store.
+
+States are cached as whole namespaces, so one MGET answers any key/filter
+lookup an agent turn needs:
+
+- sinas:state:own:{user_id}:{namespace}   the user's states in a namespace
+- sinas:state:shared:{namespace}          shared states of all users in a namespace
+- sinas:state:namespaces:{user_id}        namespaces the user has states in
+
+Misses are loaded from Postgres and stored with SET NX. Writers delete the
+affected entries after committing, so the next read reloads them; writers
+never store a snapshot themselves, which would let a slower writer's older
+snapshot replace a newer one. A reader that loaded just before a commit can
+still store its snapshot just after the delete; entries expire after
+settings.state_cache_ttl, which bounds that and out-of-band writes.
+Expired states are filtered when read.
+"""
+import json
+import logging
+import uuid as uuid_lib
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from sqlalchemy import and_, distinct, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis import get_redis
+from app.models.state import State
+
+logger = logging.getLogger(__name__)
+
+STATE_CACHE_PREFIX = "sinas:state:"
+STATE_CACHE_MAX_ENTRIES = 1000  # larger namespaces are served but not cached
+
+
+def _own_key(user_id: str, namespace: str) -> str:
+    return f"{STATE_CACHE_PREFIX}own:{user_id}:{namespace}"
+
+
+def _shared_key(namespace: str) -> str:
+    return f"{STATE_CACHE_PREFIX}shared:{namespace}"
+
+
+def _namespaces_key(user_id: str) -> str:
+    return f"{STATE_CACHE_PREFIX}namespaces:{user_id}"
+
+
+def _parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _not_expired():
+    return or_(State.expires_at == None, State.expires_at > datetime.utcnow())
+
+
+@dataclass(frozen=True)
+class StateEntry:
+    """Cached snapshot of a State row (same attribute names as the model)."""
+
+    id: uuid_lib.UUID
+    user_id: uuid_lib.UUID
+    namespace: str
+    key: str
+    value: dict[str, Any]
+    visibility: str
+    description: Optional[str]
+    tags: list[str] = field(default_factory=list)
+    relevance_score: float = 1.0
+    expires_at: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_model(cls, state: State) -> "StateEntry":
+        return cls(
+            id=state.id,
+            user_id=state.user_id,
+            namespace=state.namespace,
+            key=state.key,
+            value=state.value,
+            visibility=state.visibility,
+            description=state.description,
+            tags=state.tags or [],
+            relevance_score=state.relevance_score,
+            expires_at=state.expires_at,
+            created_at=state.created_at,
+            updated_at=state.updated_at,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "StateEntry":
+        return cls(
+            **{
+                **data,
+                "id": uuid_lib.UUID(data["id"]),
+                "user_id": uuid_lib.UUID(data["user_id"]),
+                "expires_at": _parse_datetime(data.get("expires_at")),
+                "created_at": _parse_datetime(data.get("created_at")),
+                "updated_at": _parse_datetime(data.get("updated_at")),
+            }
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        data = asdict(self)
+        for name in ("id", "user_id"):
+            data[name] = str(data[name])
+        for name in ("expires_at", "created_at", "updated_at"):
+            data[name] = data[name].isoformat() if data[name] else None
+        return data
+
+    @property
+    def expired(self) -> bool:
+        if self.expires_at is None:
+            return False
+        now = datetime.now(timezone.utc) if self.expires_at.tzinfo else datetime.utcnow()
+        return self.expires_at <= now
+
+
+class StateCache:
+    """Namespace-granular read-through cache over the states table."""
+
+    async def _get_many(
+        self, keys: list[str]
+    ) -> tuple[dict[str, Any], list[str]]:
+        """MGET keys; returns (decoded hits, missing keys). Redis errors count as misses."""
+        if not keys:
+            return {}, []
+        try:
+            redis = await get_redis()
+            raw = await redis.mget(keys)
+        except Exception as e:
+            logger.warning(f"State cache read failed: {e}")
+            return {}, list(keys)
+
+        hits, missing = {}, []
+        for key, value in zip(keys, raw):
+            if value is None:
+                missing.append(key)
+            else:
+                hits[key] = json.loads(value)
+        return hits, missing
+
+    async def _set_many(self, values: dict[str, Any]) -> None:
+        if not values:
+            return
+        try:
+            redis = await get_redis()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    if isinstance(value, list) and len(value) > STATE_CACHE_MAX_ENTRIES:
+                        pipe.delete(key)
+                        continue
+                    pipe.set(key, json.dumps(value), ex=settings.state_cache_ttl, nx=True)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"State cache write failed: {e}")
+
+    async def _load_user_namespaces(self, db: AsyncSession, user_id: str) -> list[str]:
+        result = await db.execute(
+            select(distinct(State.namespace)).where(
+                and_(State.user_id == uuid_lib.UUID(user_id), _not_expired())
+            )
+        )
+        return sorted(result.scalars().all())
+
+    async def _load_namespaces(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        own_namespaces: list[str],
+        shared_namespaces: list[str],
+    ) -> dict[str, list[dict[str, Any]]]:
+        """Load own/shared namespace entries from Postgres, keyed by cache key."""
+        filters = []
+        if own_namespaces:
+            filters.append(
+                and_(
+                    State.user_id == uuid_lib.UUID(user_id),
+                    State.namespace.in_(own_namespaces),
+                )
+            )
+        if shared_namespaces:
+            filters.append(
+                and_(State.visibility == "shared", State.namespace.in_(shared_namespaces))
+            )
+        if not filters:
+            return {}
+
+        loaded: dict[str, list[dict[str, Any]]] = {
+            **{_own_key(user_id, ns): [] for ns in own_namespaces},
+            **{_shared_key(ns): [] for ns in shared_namespaces},
+        }
+        result = await db.execute(select(State).where(and_(_not_expired(), or_(*filters))))
+        for state in result.scalars().all():
+            entry = StateEntry.from_model(state).to_dict()
+            if str(state.user_id) == str(user_id) and state.namespace in own_namespaces:
+                loaded[_own_key(user_id, state.namespace)].append(entry)
+            if state.visibility == "shared" and state.namespace in shared_namespaces:
+                loaded[_shared_key(state.namespace)].append(entry)
+        return loaded
+
+    async def user_namespaces(self, db: AsyncSession, user_id: str) -> list[str]:
+        """Namespaces the user has (non-expired) states in."""
+        key = _namespaces_key(user_id)
+        hits, missing = await self._get_many([key])
+        if not missing:
+            return hits[key]
+        namespaces = await self._load_user_namespaces(db, user_id)
+        await self._set_many({key: namespaces})
+        return namespaces
+
+    async def get_states(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        namespaces: Optional[list[str]] = None,
+        shared_namespaces: Optional[list[str]] = None,
+    ) -> list[StateEntry]:
+        """
+        Non-expired states visible through the cache.
+
+        Args:
+            namespaces: Own states in these namespaces (None = all of the user's namespaces)
+            shared_namespaces: Shared states (of any user) in these namespaces
+
+        Returns:
+            Own and shared entries, de-duplicated
+        """
+        own_namespaces = (
+            namespaces if namespaces is not None else await self.user_namespaces(db, user_id)
+        )
+        shared_namespaces = shared_namespaces or []
+
+        keys = [_own_key(user_id, ns) for ns in own_namespaces]
+        keys += [_shared_key(ns) for ns in shared_namespaces]
+        hits, missing = await self._get_many(keys)
+
+        if missing:
+            missing_set = set(missing)
+            loaded = await self._load_namespaces(
+                db,
+                user_id,
+                [ns for ns in own_namespaces if _own_key(user_id, ns) in missing_set],
+                [ns for ns in shared_namespaces if _shared_key(ns) in missing_set],
+            )
+            await self._set_many(loaded)
+            hits.update(loaded)
+
+        entries: dict[str, StateEntry] = {}
+        for key in keys:
+            for data in hits.get(key, []):
+                if data["id"] not in entries:
+                    entry = StateEntry.from_dict(data)
+                    if not entry.expired:
+                        entries[data["id"]] = entry
+        return list(entries.values())
+
+    async def invalidate(self, user_id: str, namespaces: list[str], shared: bool = False) -> None:
+        """
+        Drop cached entries after a committed change to the user's states.
+
+        Args:
+            namespaces: Namespaces that changed
+            shared: Whether a shared state was created, changed or removed
+        """
+        keys = [_namespaces_key(user_id), *(_own_key(user_id, ns) for ns in namespaces)]
+        if shared:
+            keys += [_shared_key(ns) for ns in namespaces]
+        try:
+            redis = await get_redis()
+            await redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"State cache invalidation failed: {e}")
+
+
+# Global instance
+state_cache = StateCache()
@@ -1,12 +1,12 @@
 """Context store tools for LLM to save/retrieve context."""
 import uuid as uuid_lib
-from datetime import datetime
 from typing import Any, Optional
 
-from sqlalchemy import and_, or_, select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.state import State
+from app.services.state_cache import StateEntry, state_cache
 
 
 class StateTools:
@@ -36,17 +36,17 @@ class StateTools:
         readwrite_namespaces = agent_state_namespaces_readwrite or []
         all_namespaces = readonly_namespaces + readwrite_namespaces
 
+        # Opt-in: if no namespaces at all, return no tools
+        if len(all_namespaces) == 0:
+            return []
+
         # Get available context keys if db and user_id provided
         available_keys_info = ""
         if db and user_id:
             available_keys_info = await StateTools._get_available_keys_description(
-                db, user_id, allowed_namespaces=all_namespaces or None
+                db, user_id, allowed_namespaces=all_namespaces
             )
 
-        # Opt-in: if no namespaces at all, return no tools
-        if len(all_namespaces) == 0:
-            return []
-
         # Build namespace info for allowed namespaces
         readonly_ns_list = (
             ", ".join([f"'{ns}'" for ns in readonly_namespaces]) if readonly_namespaces else ""
@@ -98,6 +98,11 @@ class StateTools:
                                 "type": "string",
                                 "description": "Specific key to retrieve (optional, omit to get all in namespace)",
                             },
+                            "keys": {
+                                "type": "array",
+                                "items": {"type": "string"},
+                                "description": "Several specific keys to retrieve at once",
+                            },
                             "search": {
                                 "type": "string",
                                 "description": "Search term to find in keys and descriptions",
@@ -250,29 +255,13 @@ class StateTools:
         Returns:
             Formatted string describing available context keys
         """
-        user_uuid = uuid_lib.UUID(user_id)
-
         # Own states are always visible; shared states only in allowed namespaces
-        visibility_filter = State.user_id == user_uuid
-        if allowed_namespaces:
-            visibility_filter = or_(
-                visibility_filter,
-                and_(State.visibility == "shared", State.namespace.in_(allowed_namespaces)),
-            )
-
-        query = (
-            select(State.namespace, State.key, State.description)
-            .where(
-                and_(
-                    or_(State.expires_at == None, State.expires_at > datetime.utcnow()),
-                    visibility_filter,
-                )
-            )
-            .order_by(State.namespace, State.key)
+        entries = await state_cache.get_states(
+            db, user_id, shared_namespaces=allowed_namespaces or []
+        )
+        contexts = sorted(
+            ((e.namespace, e.key, e.description) for e in entries), key=lambda c: (c[0], c[1])
         )
-
-        result = await db.execute(query)
-        contexts = result.all()
 
         if not contexts:
             return ""
@@ -402,6 +391,9 @@ class StateTools:
         db.add(context)
         await db.commit()
         await db.refresh(context)
+        await state_cache.invalidate(
+            user_id, [context.namespace], shared=context.visibility == "shared"
+        )
 
         return {
             "success": True,
@@ -417,49 +409,44 @@ class StateTools:
         args: dict[str, Any],
         allowed_namespaces: Optional[list[str]] = None,
     ) -> dict[str, Any]:
-        """Retrieve context from store."""
-        user_uuid = uuid_lib.UUID(user_id)
+        """Retrieve context from store (served from the state cache)."""
+        namespace = args.get("namespace")
 
         # Own states always visible; shared states only in allowed namespaces
-        visibility_filter = State.user_id == user_uuid
-        if allowed_namespaces:
-            visibility_filter = or_(
-                visibility_filter,
-                and_(State.visibility == "shared", State.namespace.in_(allowed_namespaces)),
-            )
-
-        query = select(State).where(
-            and_(
-                or_(State.expires_at == None, State.expires_at > datetime.utcnow()),
-                visibility_filter,
-            )
+        shared_namespaces = allowed_namespaces or []
+        if namespace:
+            shared_namespaces = [ns for ns in shared_namespaces if ns == namespace]
+        contexts = await state_cache.get_states(
+            db,
+            user_id,
+            namespaces=[namespace] if namespace else None,
+            shared_namespaces=shared_namespaces,
         )
 
         # Apply filters
-        if "namespace" in args and args["namespace"]:
-            query = query.where(State.namespace == args["namespace"])
-
         if "key" in args and args["key"]:
-            query = query.where(State.key == args["key"])
+            contexts = [ctx for ctx in contexts if ctx.key == args["key"]]
+
+        if "keys" in args and args["keys"]:
+            wanted = set(args["keys"])
+            contexts = [ctx for ctx in contexts if ctx.key in wanted]
 
         if "search" in args and args["search"]:
-            search_pattern = f"%{args['search']}%"
-            query = query.where(
-                or_(State.key.ilike(search_pattern), State.description.ilike(search_pattern))
-            )
+            search = args["search"].lower()
+            contexts = [
+                ctx
+                for ctx in contexts
+                if search in ctx.key.lower() or search in (ctx.description or "").lower()
+            ]
 
         if "tags" in args and args["tags"]:
             tag_list = [tag.strip() for tag in args["tags"].split(",")]
-            for tag in tag_list:
-                query = query.where(State.tags.contains([tag]))
+            contexts = [ctx for ctx in contexts if all(tag in ctx.tags for tag in tag_list)]
 
         # Order by relevance and limit
-        query = query.order_by(State.relevance_score.desc())
+        contexts.sort(key=lambda ctx: ctx.relevance_score, reverse=True)
         limit = args.get("limit", 10)
-        query = query.limit(limit)
-
-        result = await db.execute(query)
-        contexts = result.scalars().all()
+        contexts = contexts[:limit]
 
         if not contexts:
             return {"success": True, "message": "No matching contexts found", "contexts": []}
@@ -517,6 +504,9 @@ class StateTools:
 
         await db.commit()
         await db.refresh(context)
+        await state_cache.invalidate(
+            user_id, [context.namespace], shared=context.visibility == "shared"
+        )
 
         return {
             "success": True,
@@ -548,8 +538,10 @@ class StateTools:
                 "error": f"Context not found for namespace '{args['namespace']}' and key '{args['key']}'"
             }
 
+        shared = context.visibility == "shared"
         await db.delete(context)
         await db.commit()
+        await state_cache.invalidate(user_id, [args["namespace"]], shared=shared)
 
         return {"success": True, "message": f"Deleted context: {args['namespace']}/{args['key']}"}
 
@@ -560,10 +552,12 @@ class StateTools:
         agent_id: Optional[str] = None,
         namespaces: Optional[list[str]] = None,
         limit: int = 5,
-    ) -> list[State]:
+    ) -> list[StateEntry]:
         """
         Get relevant contexts for auto-injection into prompts.
 
+        Served from the state cache, so a warm turn does not query Postgres.
+
         Args:
             db: Database session
             user_id: User ID
@@ -574,29 +568,115 @@ class StateTools:
         Returns:
             List of relevant context entries
         """
-        user_uuid = uuid_lib.UUID(user_id)
-
         # Own states always visible; shared states only in allowed namespaces
-        visibility_filter = State.user_id == user_uuid
-        if namespaces:
-            visibility_filter = or_(
-                visibility_filter,
-                and_(State.visibility == "shared", State.namespace.in_(namespaces)),
-            )
+        contexts = await state_cache.get_states(
+            db, user_id, namespaces=namespaces, shared_namespaces=namespaces or []
+        )
+
+        # Order by relevance and limit
+        contexts.sort(key=lambda ctx: ctx.relevance_score, reverse=True)
+        return contexts[:limit]
+
+    @staticmethod
+    async def get_states(
+        db: AsyncSession, user_id: str, namespace: str, keys: list[str]
+    ) -> dict[str, StateEntry]:
+        """
+        Get several of the user's own states in a namespace at once.
+
+        Returns:
+            key -> entry for the keys that exist (and have not expired)
+        """
+        wanted = set(keys)
+        entries = await state_cache.get_states(db, user_id, namespaces=[namespace])
+        return {entry.key: entry for entry in entries if entry.key in wanted}
+
+    @staticmethod
+    async def set_states(
+        db: AsyncSession, user_id: str, namespace: str, items: list[dict[str, Any]]
+    ) -> list[State]:
+        """
+        Create or update several of the user's own states in a namespace.
+
+        Each item has "key" and "value" plus optional description, tags,
+        visibility, relevance_score and expires_at; omitted fields keep their
+        current value on existing states. One transaction for all items.
 
-        query = select(State).where(
-            and_(
-                or_(State.expires_at == None, State.expires_at > datetime.utcnow()),
-                visibility_filter,
+        Returns:
+            The saved states, in item order
+        """
+        user_uuid = uuid_lib.UUID(user_id)
+        result = await db.execute(
+            select(State).where(
+                and_(
+                    State.user_id == user_uuid,
+                    State.namespace == namespace,
+                    State.key.in_([item["key"] for item in items]),
+                )
             )
         )
+        existing = {state.key: state for state in result.scalars().all()}
+        shared = any(state.visibility == "shared" for state in existing.values())
+
+        states = []
+        for item in items:
+            state = existing.get(item["key"])
+            if state is None:
+                state = State(
+                    user_id=user_uuid,
+                    namespace=namespace,
+                    key=item["key"],
+                    value=item["value"],
+                    visibility=item.get("visibility") or "private",
+                    description=item.get("description"),
+                    tags=item.get("tags") or [],
+                    relevance_score=(
+                        item["relevance_score"] if item.get("relevance_score") is not None else 1.0
+                    ),
+                    expires_at=item.get("expires_at"),
+                )
+                db.add(state)
+                existing[item["key"]] = state
+            else:
+                state.value = item["value"]
+                for field in ("description", "tags", "visibility", "relevance_score", "expires_at"):
+                    if item.get(field) is not None:
+                        setattr(state, field, item[field])
+            shared = shared or state.visibility == "shared"
+            states.append(state)
 
-        # Filter by namespaces if provided
-        if namespaces:
-            query = query.where(State.namespace.in_(namespaces))
+        await db.commit()
+        for state in existing.values():
+            await db.refresh(state)
+        await state_cache.invalidate(user_id, [namespace], shared=shared)
+        return states
 
-        # Order by relevance and limit
-        query = query.order_by(State.relevance_score.desc()).limit(limit)
+    @staticmethod
+    async def delete_states(
+        db: AsyncSession, user_id: str, namespace: str, keys: list[str]
+    ) -> list[str]:
+        """
+        Delete several of the user's own states in a namespace.
+
+        Returns:
+            The keys that existed and were deleted
+        """
+        result = await db.execute(
+            select(State).where(
+                and_(
+                    State.user_id == uuid_lib.UUID(user_id),
+                    State.namespace == namespace,
+                    State.key.in_(keys),
+                )
+            )
+        )
+        states = result.scalars().all()
+        if not states:
+            return []
 
-        result = await db.execute(query)
-        return result.scalars().all()
+        shared = any(state.visibility == "shared" for state in states)
+        for state in states:
+            await db.delete(state)
+        await db.commit()
+        await state_cache.invalidate(user_id, [namespace], shared=shared)
+        return [state.key for state in states]
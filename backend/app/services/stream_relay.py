@@ -19,6 +19,11 @@ STREAM_TTL = 3600  # 1 hour TTL for stream keys
 SUBSCRIBE_WAIT_TIMEOUT = 120  # Max seconds to wait for stream to appear
 
 
+def execution_channel(execution_id: str) -> str:
+    """Channel carrying the progress events of a function execution."""
+    return f"execution:{execution_id}"
+
+
 class StreamRelay:
     """Publish and subscribe to Redis Streams for SSE event relay."""
 
@@ -50,6 +55,11 @@ class StreamRelay:
         """Publish a terminal 'error' event."""
         await self.publish(channel_id, {"type": "error", "error": error})
 
+    async def exists(self, channel_id: str) -> bool:
+        """Whether anything has been published to a channel (within STREAM_TTL)."""
+        redis = await get_redis()
+        return bool(await redis.exists(f"{STREAM_PREFIX}{channel_id}"))
+
     async def subscribe(
         self, channel_id: str, last_id: str = "0"
     ) -> AsyncIterator[dict[str, Any]]:
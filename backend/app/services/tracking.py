@@ -1,16 +1,27 @@
-"""Execution tracking service for function calls."""
+"""Execution tracking service for function calls.
+
+Steps are buffered in memory and written in bulk: one Postgres insert and one
+ClickHouse insert per flush, at the end of the execution or whenever
+STEP_FLUSH_THRESHOLD completed steps are pending.
+"""
 import asyncio
+import logging
 import time
 import uuid
 from collections.abc import Callable
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Any
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.execution import ExecutionStatus, StepExecution
 from app.services.clickhouse_logger import clickhouse_logger
 
+logger = logging.getLogger(__name__)
+
+STEP_FLUSH_THRESHOLD = 50  # completed steps buffered before an intermediate flush
+
 
 class ExecutionTracker:
     def __init__(self, execution_id: str, db: AsyncSession, user_id: str):
@@ -18,34 +29,35 @@ class ExecutionTracker:
         self.db = db
         self.user_id = user_id
         self.call_stack: list[str] = []
+        self._pending: list[dict[str, Any]] = []
+        self._flush_lock = asyncio.Lock()
+
+    async def _complete_step(self, step: dict[str, Any]) -> None:
+        self._pending.append(step)
+        if len(self._pending) >= STEP_FLUSH_THRESHOLD:
+            await self.flush()
 
     async def track_function_call(
         self, func: Callable, args: tuple[Any, ...], kwargs: dict[str, Any]
     ) -> Any:
         """Track a function call with start/end times and results."""
         function_name = func.__name__
-        step_id = str(uuid.uuid4())
 
         # Prepare input data (first argument is typically the input dict)
         input_data = args[0] if args else kwargs
 
-        # Create step execution record
-        step = StepExecution(
-            execution_id=self.execution_id,
-            function_name=function_name,
-            status=ExecutionStatus.RUNNING,
-            input_data=input_data,
-            started_at=datetime.utcnow(),
-        )
-
-        self.db.add(step)
-        await self.db.commit()
-
-        # Log function call to Redis
-        await clickhouse_logger.log_function_call(
-            self.execution_id, function_name, str(step.id), input_data
-        )
-
+        step: dict[str, Any] = {
+            "id": uuid.uuid4(),
+            "execution_id": self.execution_id,
+            "function_name": function_name,
+            "status": ExecutionStatus.RUNNING,
+            "input_data": input_data,
+            "output_data": None,
+            "error": None,
+            "duration_ms": None,
+            "started_at": datetime.now(timezone.utc),
+            "completed_at": None,
+        }
         start_time = time.time()
 
         try:
@@ -58,48 +70,43 @@ class ExecutionTracker:
             else:
                 result = func(*args, **kwargs)
 
-            end_time = time.time()
-            duration_ms = int((end_time - start_time) * 1000)
-
-            # Update step with success
-            step.status = ExecutionStatus.COMPLETED
-            step.output_data = result
-            step.completed_at = datetime.utcnow()
-            step.duration_ms = duration_ms
-
-            await self.db.commit()
-
-            # Log function result to Redis
-            await clickhouse_logger.log_function_result(
-                self.execution_id, function_name, str(step.id), result, None, duration_ms
-            )
-
+            step["status"] = ExecutionStatus.COMPLETED
+            step["output_data"] = result
             return result
 
         except Exception as e:
-            end_time = time.time()
-            duration_ms = int((end_time - start_time) * 1000)
-
-            # Update step with error
-            step.status = ExecutionStatus.FAILED
-            step.error = str(e)
-            step.completed_at = datetime.utcnow()
-            step.duration_ms = duration_ms
-
-            await self.db.commit()
-
-            # Log function error to Redis
-            await clickhouse_logger.log_function_result(
-                self.execution_id, function_name, str(step.id), None, str(e), duration_ms
-            )
-
+            step["status"] = ExecutionStatus.FAILED
+            step["error"] = str(e)
             raise e
 
         finally:
+            step["completed_at"] = datetime.now(timezone.utc)
+            step["duration_ms"] = int((time.time() - start_time) * 1000)
+            await self._complete_step(step)
+
             # Remove from call stack
             if self.call_stack and self.call_stack[-1] == function_name:
                 self.call_stack.pop()
 
+    async def flush(self) -> None:
+        """Write buffered steps to Postgres and ClickHouse in one batch each."""
+        async with self._flush_lock:
+            steps, self._pending = self._pending, []
+            if not steps:
+                return
+
+            try:
+                await self.db.execute(insert(StepExecution), steps)
+                await self.db.commit()
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(
+                    f"Failed to persist {len(steps)} steps for execution {self.execution_id}: {e}"
+                )
+                return
+
+            await clickhouse_logger.log_function_steps(self.execution_id, steps)
+
     def get_call_stack(self) -> list[str]:
         """Get current call stack."""
         return self.call_stack.copy()
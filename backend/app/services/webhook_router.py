@@ -0,0 +1,199 @@
+"""In-process routing table for runtime webhooks.
+
+Compiled from all active webhooks so the webhook hot path does not query the
+database. Static paths are resolved through a hash map keyed by
+(method, path); templated paths such as ``orders/{id}`` go into a segment
+trie where literal segments take precedence over parameters.
+
+The table is rebuilt lazily after a "webhooks" invalidation event, and the
+Redis resource version is re-checked periodically in case an event was missed.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import select
+
+from app.core.invalidation import get_resource_version, invalidation_listener
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_RESOURCE = "webhooks"
+VERSION_CHECK_INTERVAL = 5.0  # seconds between Redis version checks
+
+
+@dataclass(frozen=True)
+class WebhookRoute:
+    """Immutable snapshot of the webhook fields needed to serve a request."""
+
+    id: uuid.UUID
+    user_id: uuid.UUID
+    path: str
+    http_method: str
+    function_namespace: str
+    function_name: str
+    default_values: Optional[dict[str, Any]]
+    requires_auth: bool
+    response_mode: str
+    callback_url: Optional[str]
+    idempotency_key: Optional[str] = None
+
+
+@dataclass
+class _TrieNode:
+    children: dict[str, "_TrieNode"] = field(default_factory=dict)
+    param_name: Optional[str] = None
+    param_child: Optional["_TrieNode"] = None
+    routes: dict[str, WebhookRoute] = field(default_factory=dict)  # method -> route
+
+
+def _normalize(path: str) -> str:
+    return path.strip("/")
+
+
+def _param_name(segment: str) -> Optional[str]:
+    if len(segment) > 2 and segment.startswith("{") and segment.endswith("}"):
+        return segment[1:-1]
+    return None
+
+
+class WebhookRouter:
+    """Compiled webhook routing table, shared by all requests in the process."""
+
+    def __init__(self):
+        self._exact: dict[tuple[str, str], WebhookRoute] = {}
+        self._trie = _TrieNode()
+        self._loaded = False
+        self._version = -1
+        self._last_version_check = 0.0
+        self._lock = asyncio.Lock()
+        invalidation_listener.register(WEBHOOK_RESOURCE, self._on_invalidate)
+
+    def _on_invalidate(self, resource_id: Optional[str], version: int) -> None:
+        self._loaded = False
+
+    def _compile(self, routes: list[WebhookRoute]) -> None:
+        exact: dict[tuple[str, str], WebhookRoute] = {}
+        trie = _TrieNode()
+
+        for route in routes:
+            segments = route.path.split("/") if route.path else []
+            if not any(_param_name(seg) for seg in segments):
+                exact[(route.http_method, route.path)] = route
+                continue
+
+            node = trie
+            for seg in segments:
+                name = _param_name(seg)
+                if name is None:
+                    node = node.children.setdefault(seg, _TrieNode())
+                else:
+                    if node.param_child is None:
+                        node.param_child = _TrieNode()
+                        node.param_name = name
+                    elif node.param_name != name:
+                        logger.warning(
+                            f"Webhook '{route.path}' reuses a parameter position as "
+                            f"'{{{name}}}'; '{{{node.param_name}}}' takes precedence"
+                        )
+                    node = node.param_child
+            node.routes[route.http_method] = route
+
+        # Swap in atomically (single assignment each; readers never see a partial table)
+        self._exact, self._trie = exact, trie
+
+    async def rebuild(self) -> None:
+        """Reload all active webhooks from the database and recompile the table."""
+        from app.core.database import AsyncSessionLocal
+        from app.models.webhook import Webhook
+
+        version = await get_resource_version(WEBHOOK_RESOURCE)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Webhook).where(Webhook.is_active == True))
+            routes = [
+                WebhookRoute(
+                    id=w.id,
+                    user_id=w.user_id,
+                    path=_normalize(w.path),
+                    http_method=getattr(w.http_method, "value", w.http_method),
+                    function_namespace=w.function_namespace,
+                    function_name=w.function_name,
+                    default_values=w.default_values,
+                    requires_auth=w.requires_auth,
+                    response_mode=w.response_mode,
+                    callback_url=w.callback_url,
+                    idempotency_key=w.idempotency_key,
+                )
+                for w in result.scalars().all()
+            ]
+
+        self._compile(routes)
+        self._version = version
+        self._loaded = True
+        self._last_version_check = time.monotonic()
+        logger.info(f"Compiled webhook routing table: {len(routes)} routes (v{version})")
+
+    async def _ensure_fresh(self) -> None:
+        now = time.monotonic()
+        if self._loaded and now - self._last_version_check >= VERSION_CHECK_INTERVAL:
+            self._last_version_check = now
+            try:
+                if await get_resource_version(WEBHOOK_RESOURCE) != self._version:
+                    self._loaded = False
+            except Exception as e:
+                logger.warning(f"Webhook route version check failed: {e}")
+
+        if not self._loaded:
+            async with self._lock:
+                if not self._loaded:
+                    await self.rebuild()
+
+    def _match_trie(
+        self, node: _TrieNode, segments: list[str], method: str, params: dict[str, str]
+    ) -> Optional[WebhookRoute]:
+        if not segments:
+            return node.routes.get(method)
+
+        head, rest = segments[0], segments[1:]
+        child = node.children.get(head)
+        if child is not None:
+            route = self._match_trie(child, rest, method, params)
+            if route is not None:
+                return route
+
+        if node.param_child is not None and head:
+            route = self._match_trie(node.param_child, rest, method, params)
+            if route is not None:
+                params[node.param_name] = head
+                return route
+
+        return None
+
+    async def match(
+        self, method: str, path: str
+    ) -> Optional[tuple[WebhookRoute, dict[str, str]]]:
+        """
+        Resolve an inbound request to a webhook.
+
+        Returns:
+            (route, path_params) or None if no active webhook matches
+        """
+        await self._ensure_fresh()
+        path = _normalize(path)
+
+        route = self._exact.get((method, path))
+        if route is not None:
+            return route, {}
+
+        params: dict[str, str] = {}
+        route = self._match_trie(self._trie, path.split("/"), method, params)
+        if route is not None:
+            return route, params
+        return None
+
+
+# Global instance
+webhook_router = WebhookRouter()
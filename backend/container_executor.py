@@ -1,25 +1,96 @@
 """
 Executor script that runs inside user containers.
 This script loads functions and executes them on demand.
+
+execute_inline requests carry a code_hash (sha256 of the function code) and
+the code itself only when the host does not know the container to have it.
+Compiled code objects are kept in an LRU keyed by that hash. Functions that
+opt in with reuse_module_state also keep their initialized module namespace,
+so module-level setup (imports, clients, lookup tables) runs once per
+container instead of once per call.
+
+Functions that call other functions get a bundle: the caller's allowed
+namespaces, precompiled by a load_functions request with a bundle_version
+(a hash of the member functions' code). execute_inline requests name the
+bundle, and its namespace objects (e.g. payments.charge) are injected into
+the function's globals so nested calls run in-process.
+
+A function written as a generator streams: each value it yields is appended
+as a progress event to PROGRESS_FILE (one JSON line per event), which the
+host tails while the function runs; the generator's return value is the
+result.
 """
+import hashlib
+import inspect
 import json
 import os
 import signal
 import sys
 import time
 import traceback
+from collections import OrderedDict
+from types import SimpleNamespace
 from typing import Any
 
+CODE_CACHE_MAX_ENTRIES = 128  # compiled code objects, keyed by code hash
+MODULE_CACHE_MAX_ENTRIES = 32  # initialized namespaces of reuse_module_state functions
+BUNDLE_CACHE_MAX_ENTRIES = 16  # loaded namespace bundles, keyed by bundle version
+PROGRESS_FILE = "/tmp/exec_progress.jsonl"
+PROGRESS_EVENT_MAX_BYTES = 64 * 1024  # larger events are replaced by a size marker
+
 
 class FunctionTimeoutError(Exception):
     """Raised when a function exceeds its execution timeout."""
     pass
 
 
+class CodeNotCachedError(Exception):
+    """Raised when a request references code by hash that this container does not have."""
+    pass
+
+
+class BundleNotLoadedError(Exception):
+    """Raised when a request references a namespace bundle this container does not have."""
+    pass
+
+
 def _timeout_handler(signum, frame):
     raise FunctionTimeoutError("Function execution timed out")
 
 
+def _stream_progress(gen) -> Any:
+    """Write each value a generator yields as a progress event; return its return value."""
+    with open(PROGRESS_FILE, "a") as f:
+        while True:
+            try:
+                event = next(gen)
+            except StopIteration as stop:
+                return stop.value
+            line = json.dumps({"type": "progress", "data": event}, default=str)
+            if len(line) > PROGRESS_EVENT_MAX_BYTES:
+                line = json.dumps(
+                    {"type": "progress", "data": {"truncated": True, "size": len(line)}}
+                )
+            f.write(line + "\n")
+            f.flush()
+
+
+def _base_namespace() -> dict[str, Any]:
+    namespace = {
+        "__builtins__": __builtins__,
+        "json": json,
+    }
+    try:
+        import datetime
+        import uuid
+
+        namespace["datetime"] = datetime
+        namespace["uuid"] = uuid
+    except ImportError:
+        pass
+    return namespace
+
+
 class ContainerExecutor:
     def __init__(self):
         self.namespace = {
@@ -28,6 +99,12 @@ class ContainerExecutor:
         }
         # Map from "namespace/name" to actual function name in code
         self.function_map = {}
+        # code hash -> compiled code object
+        self.code_cache: OrderedDict[str, Any] = OrderedDict()
+        # (namespace/name, code hash, bundle version) -> initialized module namespace
+        self.module_cache: OrderedDict[tuple[str, str, Any], dict[str, Any]] = OrderedDict()
+        # bundle version -> {namespace: SimpleNamespace of functions}
+        self.bundles: OrderedDict[str, dict[str, SimpleNamespace]] = OrderedDict()
         # Import common modules
         try:
             import datetime
@@ -59,6 +136,86 @@ class ContainerExecutor:
                     print(f"Error loading function {namespace}/{name}: {e}", file=sys.stderr)
                     traceback.print_exc(file=sys.stderr)
 
+    def _compile(self, code_hash: str, function_code: Any, full_name: str) -> Any:
+        """Compiled code for a hash, compiling function_code on a miss."""
+        compiled_code = self.code_cache.get(code_hash)
+        if compiled_code is not None:
+            self.code_cache.move_to_end(code_hash)
+            return compiled_code
+        if function_code is None:
+            raise CodeNotCachedError(f"Code {code_hash} for {full_name} is not cached")
+        compiled_code = compile(function_code, f"<function:{full_name}>", "exec")
+        self.code_cache[code_hash] = compiled_code
+        while len(self.code_cache) > CODE_CACHE_MAX_ENTRIES:
+            self.code_cache.popitem(last=False)
+        return compiled_code
+
+    def load_bundle(self, version: str, functions_data: dict[str, dict[str, Any]]):
+        """Precompile a namespace bundle for in-process function-to-function calls."""
+        objects = {namespace: SimpleNamespace() for namespace in functions_data}
+        for namespace, functions in functions_data.items():
+            for name, func_data in functions.items():
+                full_name = f"{namespace}/{name}"
+                try:
+                    code = func_data["code"]
+                    code_hash = hashlib.sha256(code.encode("utf-8")).hexdigest()
+                    module_namespace = _base_namespace()
+                    module_namespace.update(objects)
+                    exec(self._compile(code_hash, code, full_name), module_namespace)
+                    if callable(module_namespace.get(name)):
+                        setattr(objects[namespace], name, module_namespace[name])
+                except FunctionTimeoutError:
+                    raise
+                except Exception as e:
+                    print(f"Error loading bundle function {full_name}: {e}", file=sys.stderr)
+
+        self.bundles[version] = objects
+        while len(self.bundles) > BUNDLE_CACHE_MAX_ENTRIES:
+            self.bundles.popitem(last=False)
+        print(f"Loaded bundle {version[:12]} ({len(objects)} namespaces)", file=sys.stderr)
+
+    def load_inline(self, request: dict[str, Any]) -> dict[str, Any]:
+        """
+        Namespace with the request's function code executed in it.
+
+        Raises:
+            CodeNotCachedError: The request has no code and its hash is not cached
+            BundleNotLoadedError: The request's namespace bundle is not loaded
+        """
+        full_name = f"{request.get('function_namespace', 'default')}/{request['function_name']}"
+        function_code = request.get("function_code")
+        if function_code is not None:
+            code_hash = hashlib.sha256(function_code.encode("utf-8")).hexdigest()
+        else:
+            code_hash = request.get("code_hash")
+
+        bundle_version = request.get("bundle_version")
+        bundle = None
+        if bundle_version:
+            bundle = self.bundles.get(bundle_version)
+            if bundle is None:
+                raise BundleNotLoadedError(f"Bundle {bundle_version} is not loaded")
+            self.bundles.move_to_end(bundle_version)
+
+        reuse = bool(request.get("reuse_module_state"))
+        module_key = (full_name, code_hash, bundle_version)
+        if reuse and module_key in self.module_cache:
+            self.module_cache.move_to_end(module_key)
+            return self.module_cache[module_key]
+
+        compiled_code = self._compile(code_hash, function_code, full_name)
+
+        namespace = _base_namespace()
+        if bundle:
+            namespace.update(bundle)
+        exec(compiled_code, namespace)
+
+        if reuse:
+            self.module_cache[module_key] = namespace
+            while len(self.module_cache) > MODULE_CACHE_MAX_ENTRIES:
+                self.module_cache.popitem(last=False)
+        return namespace
+
     def execute_function(
         self,
         function_name: str,
@@ -147,16 +304,34 @@ class ContainerExecutor:
                             json.dump(result, f)
 
                     elif action == "load_functions":
-                        # Reload functions
-                        self.load_functions(request["functions"])
+                        result = {"status": "loaded"}
+                        if request.get("bundle_version"):
+                            # Versioned bundle for execute_inline requests. Module-level
+                            # code runs while compiling, so it gets the same timeout
+                            load_timeout = request.get("timeout", 290)
+                            old_handler = signal.signal(signal.SIGALRM, _timeout_handler)
+                            signal.alarm(load_timeout)
+                            try:
+                                self.load_bundle(request["bundle_version"], request["functions"])
+                            except FunctionTimeoutError:
+                                print(f"[exec] TIMEOUT loading bundle {request['bundle_version'][:12]}", file=sys.stderr)
+                                result = {
+                                    "error": f"Loading function bundle timed out after {load_timeout}s",
+                                    "status": "failed",
+                                }
+                            finally:
+                                signal.alarm(0)
+                                signal.signal(signal.SIGALRM, old_handler)
+                        else:
+                            # Reload functions
+                            self.load_functions(request["functions"])
                         with open("/tmp/exec_result.json", "w") as f:
-                            json.dump({"status": "loaded"}, f)
+                            json.dump(result, f)
 
                     elif action == "execute_inline":
                         # Execute function with inline code (no pre-loading required)
                         function_timeout = request.get("timeout", 290)
                         try:
-                            function_code = request["function_code"]
                             function_namespace = request.get("function_namespace", "default")
                             function_name = request["function_name"]
                             input_data = request["input_data"]
@@ -165,29 +340,8 @@ class ContainerExecutor:
 
                             print(f"[exec] Starting {function_namespace}/{function_name} (timeout={function_timeout}s)", file=sys.stderr)
 
-                            # Create temporary namespace for this execution
-                            temp_namespace = {
-                                "__builtins__": __builtins__,
-                                "json": json,
-                            }
-
-                            # Add common modules
-                            try:
-                                import datetime
-                                import uuid
-
-                                temp_namespace["datetime"] = datetime
-                                temp_namespace["uuid"] = uuid
-                            except ImportError:
-                                pass
-
-                            # Compile and execute function code
-                            compiled_code = compile(
-                                function_code,
-                                f"<function:{function_namespace}/{function_name}>",
-                                "exec",
-                            )
-                            exec(compiled_code, temp_namespace)
+                            # Compile (or reuse) and execute function code
+                            temp_namespace = self.load_inline(request)
 
                             # Find the function (usually same name as function_name)
                             if function_name in temp_namespace:
@@ -211,11 +365,17 @@ class ContainerExecutor:
                                     continue
 
                             # Execute function with timeout (SIGALRM)
+                            try:
+                                os.remove(PROGRESS_FILE)
+                            except FileNotFoundError:
+                                pass
                             start_time = time.time()
                             old_handler = signal.signal(signal.SIGALRM, _timeout_handler)
                             signal.alarm(function_timeout)
                             try:
                                 func_result = func(input_data, context)
+                                if inspect.isgenerator(func_result):
+                                    func_result = _stream_progress(func_result)
                             finally:
                                 signal.alarm(0)  # Cancel alarm
                                 signal.signal(signal.SIGALRM, old_handler)
@@ -230,6 +390,24 @@ class ContainerExecutor:
                                 "status": "completed",
                             }
 
+                        except BundleNotLoadedError as e:
+                            # Host loads the bundle and retries
+                            result = {
+                                "error": str(e),
+                                "bundle_not_loaded": True,
+                                "execution_id": execution_id,
+                                "status": "failed",
+                            }
+
+                        except CodeNotCachedError as e:
+                            # Host retries with the code attached
+                            result = {
+                                "error": str(e),
+                                "code_not_cached": True,
+                                "execution_id": execution_id,
+                                "status": "failed",
+                            }
+
                         except FunctionTimeoutError:
                             duration_ms = int((time.time() - start_time) * 1000)
                             print(f"[exec] TIMEOUT {function_namespace}/{function_name} after {duration_ms}ms", file=sys.stderr)
@@ -254,8 +432,6 @@ class ContainerExecutor:
                             json.dump(result, f)
 
                     # Clear request file
-                    import os
-
                     try:
                         os.remove("/tmp/exec_request.json")
                     except:
@@ -110,6 +110,7 @@ export function FunctionEditor() {
     enabled_namespaces: [] as string[],
     shared_pool: false,
     requires_approval: false,
+    reuse_module_state: false,
   });
 
   const [requirementInput, setRequirementInput] = useState('');
@@ -157,6 +158,7 @@ export function FunctionEditor() {
         enabled_namespaces: func.enabled_namespaces || [],
         shared_pool: func.shared_pool || false,
         requires_approval: func.requires_approval || false,
+        reuse_module_state: func.reuse_module_state || false,
       });
     }
   }, [func, isNew]);
@@ -441,6 +443,22 @@ print(details["status"], details["output_data"])`,
                   </span>
                 </label>
               </div>
+
+              <div className="flex items-start">
+                <input
+                  type="checkbox"
+                  id="reuse_module_state"
+                  checked={formData.reuse_module_state}
+                  onChange={(e) => setFormData({ ...formData, reuse_module_state: e.target.checked })}
+                  className="mt-1 h-4 w-4 text-primary-600 focus:ring-primary-500 border-white/10 rounded"
+                />
+                <label htmlFor="reuse_module_state" className="ml-3">
+                  <span className="block text-sm font-medium text-gray-300">Reuse Module State</span>
+                  <span className="block text-xs text-gray-500 mt-0.5">
+                    Run module-level code (imports, clients, lookup tables) once per container and reuse it across calls. Only enable if the function does not rely on fresh globals.
+                  </span>
+                </label>
+              </div>
             </div>
           </div>
         </div>
@@ -72,6 +72,8 @@ export interface Chat {
   created_at: string;
   updated_at: string;
   last_message_at: string | null;
+  message_count: number;
+  last_message_preview: string | null;
 }
 
 export interface ChatCreate {
@@ -298,6 +300,11 @@ export interface Function {
   enabled_namespaces: string[];
   shared_pool: boolean;
   requires_approval: boolean;
+  reuse_module_state: boolean;
+  cache_ttl: number | null;
+  cache_key_fields: string[] | null;
+  cache_max_bytes: number;
+  queue_lane: 'interactive' | 'default' | 'batch' | null;
   is_active: boolean;
   created_at: string;
   updated_at: string;
@@ -314,6 +321,11 @@ export interface FunctionCreate {
   enabled_namespaces?: string[];
   shared_pool?: boolean;
   requires_approval?: boolean;
+  reuse_module_state?: boolean;
+  cache_ttl?: number;
+  cache_key_fields?: string[];
+  cache_max_bytes?: number;
+  queue_lane?: 'interactive' | 'default' | 'batch';
 }
 
 export interface FunctionUpdate {
@@ -327,6 +339,11 @@ export interface FunctionUpdate {
   enabled_namespaces?: string[];
   shared_pool?: boolean;
   requires_approval?: boolean;
+  reuse_module_state?: boolean;
+  cache_ttl?: number;
+  cache_key_fields?: string[];
+  cache_max_bytes?: number;
+  queue_lane?: 'interactive' | 'default' | 'batch' | '';
   is_active?: boolean;
 }
 
@@ -341,6 +358,9 @@ export interface Webhook {
   default_values: Record<string, any> | null;
   is_active: boolean;
   requires_auth: boolean;
+  response_mode: 'sync' | 'async';
+  callback_url: string | null;
+  idempotency_key: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -353,6 +373,9 @@ export interface WebhookCreate {
   description?: string;
   default_values?: Record<string, any>;
   requires_auth?: boolean;
+  response_mode?: 'sync' | 'async';
+  callback_url?: string;
+  idempotency_key?: string;
 }
 
 export interface WebhookUpdate {
@@ -363,6 +386,9 @@ export interface WebhookUpdate {
   default_values?: Record<string, any>;
   is_active?: boolean;
   requires_auth?: boolean;
+  response_mode?: 'sync' | 'async';
+  callback_url?: string;
+  idempotency_key?: string;
 }
 
 // Schedules
@@ -741,6 +767,9 @@ export interface Query {
   output_schema: Record<string, any>;
   timeout_ms: number;
   max_rows: number;
+  cache_ttl: number | null;
+  cache_max_bytes: number;
+  cache_tags: string[];
   is_active: boolean;
   created_at: string;
   updated_at: string | null;
@@ -757,6 +786,9 @@ export interface QueryCreate {
   output_schema?: Record<string, any>;
   timeout_ms?: number;
   max_rows?: number;
+  cache_ttl?: number;
+  cache_max_bytes?: number;
+  cache_tags?: string[];
 }
 
 export interface QueryUpdate {
@@ -770,11 +802,16 @@ export interface QueryUpdate {
   output_schema?: Record<string, any>;
   timeout_ms?: number;
   max_rows?: number;
+  cache_ttl?: number;
+  cache_max_bytes?: number;
+  cache_tags?: string[];
   is_active?: boolean;
 }
 
 export interface QueryExecuteRequest {
   input: Record<string, any>;
+  format?: 'json' | 'ndjson' | 'columnar';
+  chunk_size?: number;
 }
 
 export interface QueryExecuteResponse {
@@ -782,8 +819,39 @@ export interface QueryExecuteResponse {
   operation: string;
   data?: Record<string, any>[];
   row_count?: number;
+  truncated?: boolean;
   affected_rows?: number;
   duration_ms: number;
+  cached?: boolean;
+}
+
+export interface QueryBatchItem {
+  namespace: string;
+  name: string;
+  input?: Record<string, any>;
+}
+
+export interface QueryBatchExecuteRequest {
+  queries: QueryBatchItem[];
+  snapshot?: boolean;
+}
+
+export interface QueryBatchItemResult {
+  namespace: string;
+  name: string;
+  success: boolean;
+  operation?: string;
+  data?: Record<string, any>[];
+  row_count?: number;
+  truncated?: boolean;
+  affected_rows?: number;
+  cached?: boolean;
+  error?: string;
+}
+
+export interface QueryBatchExecuteResponse {
+  results: QueryBatchItemResult[];
+  duration_ms: number;
 }
 
 // File Search
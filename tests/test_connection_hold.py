@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Check that an agent turn does not hold a database connection while the LLM streams.
+
+Runs MessageService.send_message_stream in-process against the configured
+database with a stub LLM provider:
+
+  1. first stream: slow text chunks, then one retrieve_context tool call
+  2. the tool round (runs against the database on its own session)
+  3. follow-up stream: slow text chunks, no tool calls
+
+Connection hold times are taken from the pool checkout/checkin listeners in
+app.core.database (their "Database connection held for ..." log lines). The
+longest hold must stay far below the time spent streaming.
+
+Usage (from the backend directory, with its environment and a migrated database):
+    python ../tests/test_connection_hold.py [chunk_delay_seconds] [chunks_per_stream]
+"""
+
+import asyncio
+import logging
+import os
+import re
+import sys
+import time
+import uuid
+from typing import Any, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from sqlalchemy import delete  # noqa: E402
+
+import app.services.message_service as message_service_module  # noqa: E402
+from app.core.database import AsyncSessionLocal, async_engine  # noqa: E402
+from app.models import Chat, Message, User  # noqa: E402
+from app.providers.base import BaseLLMProvider  # noqa: E402
+from app.services.message_service import MessageService  # noqa: E402
+
+HOLD_PATTERN = re.compile(r"Database connection held for ([\d.]+)(ms|s)")
+
+
+class HoldRecorder(logging.Handler):
+    """Collects the hold times logged by the pool checkin listener."""
+
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.holds: list[float] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        match = HOLD_PATTERN.search(record.getMessage())
+        if match:
+            value = float(match.group(1))
+            self.holds.append(value / 1000 if match.group(2) == "ms" else value)
+
+
+class SlowStreamProvider(BaseLLMProvider):
+    """Streams text slowly; asks for one tool call on the first turn only."""
+
+    def __init__(self, chunk_delay: float, chunks: int):
+        super().__init__()
+        self.chunk_delay = chunk_delay
+        self.chunks = chunks
+        self.streams = 0
+        self.streaming_seconds = 0.0
+
+    async def complete(self, messages, model, tools=None, temperature=0.7, max_tokens=None, **kwargs):
+        raise NotImplementedError("send_message_stream only streams")
+
+    async def stream(self, messages, model, tools=None, temperature=0.7, max_tokens=None, **kwargs):
+        self.streams += 1
+        start = time.monotonic()
+        try:
+            for i in range(self.chunks):
+                await asyncio.sleep(self.chunk_delay)
+                yield {"content": f"chunk {i} "}
+            if self.streams == 1:
+                yield {
+                    "tool_calls": [
+                        {
+                            "index": 0,
+                            "id": f"call_{uuid.uuid4().hex[:12]}",
+                            "type": "function",
+                            "function": {
+                                "name": "retrieve_context",
+                                "arguments": '{"namespace": "preferences"}',
+                            },
+                        }
+                    ]
+                }
+        finally:
+            self.streaming_seconds += time.monotonic() - start
+
+    def format_tool_calls(self, tool_calls: Any) -> list[dict[str, Any]]:
+        return tool_calls or []
+
+    def extract_usage(self, response: Any) -> dict[str, int]:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+async def main():
+    chunk_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 0.2
+    chunks = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    provider = SlowStreamProvider(chunk_delay, chunks)
+
+    async def create_stub_provider(provider_name: Optional[str] = None, model=None, db=None):
+        return provider
+
+    # The service resolves its provider through this module-level name
+    message_service_module.create_provider = create_stub_provider
+
+    recorder = HoldRecorder()
+    db_logger = logging.getLogger("app.core.database")
+    db_logger.setLevel(logging.DEBUG)
+    db_logger.addHandler(recorder)
+
+    user_id = uuid.uuid4()
+    chat_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        db.add(User(id=user_id, email=f"hold-test-{user_id.hex[:8]}@example.com"))
+        await db.flush()
+        db.add(Chat(id=chat_id, user_id=user_id, title="connection hold test"))
+        await db.commit()
+
+    print(f"🧪 Streaming 2 x {chunks} chunks at {chunk_delay}s with one tool round")
+    recorder.holds.clear()
+    events = 0
+    try:
+        async with AsyncSessionLocal() as db:
+            service = MessageService(db)
+            async for _ in service.send_message_stream(
+                chat_id=str(chat_id),
+                user_id=str(user_id),
+                user_token="",
+                content="What are my preferences?",
+            ):
+                events += 1
+    finally:
+        db_logger.removeHandler(recorder)
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Message).where(Message.chat_id == chat_id))
+            await db.execute(delete(Chat).where(Chat.id == chat_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+        await async_engine.dispose()
+
+    assert provider.streams == 2, f"expected a tool round and a follow-up stream, got {provider.streams} streams"
+    assert recorder.holds, "no hold times recorded; are the pool listeners installed?"
+
+    longest = max(recorder.holds)
+    per_stream = provider.streaming_seconds / provider.streams
+    print(
+        f"  {events} events, {provider.streaming_seconds:.2f}s streaming, "
+        f"{len(recorder.holds)} checkouts, longest hold {longest * 1000:.1f}ms"
+    )
+    assert longest < per_stream / 10, (
+        f"a connection was held for {longest:.2f}s while one stream takes {per_stream:.2f}s"
+    )
+    print("✅ No connection held across an LLM stream")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())